@@ -28,25 +28,84 @@ class Settings(BaseSettings):
     OUTPUT_DIR: str = os.getenv("OUTPUT_DIR", "output")
     TEMP_DIR: str = os.getenv("TEMP_DIR", "/tmp")
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "500")) * 1024 * 1024  # 500MB
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))  # 1MB per write
+    UPLOAD_SESSION_TTL: int = int(os.getenv("UPLOAD_SESSION_TTL", "86400"))  # abandoned resumable uploads
+    UPLOAD_FILE_TTL: int = int(os.getenv("UPLOAD_FILE_TTL", "604800"))  # finished uploads stay translatable this long
+    MEDIA_STORE_DIR: str = os.getenv("MEDIA_STORE_DIR", os.path.join(os.getenv("UPLOAD_DIR", "uploads"), "media"))
+    ARTIFACT_CACHE_DIR: str = os.getenv("ARTIFACT_CACHE_DIR", "cache/artifacts")
+    ARTIFACT_CACHE_MAX_BYTES: int = int(os.getenv("ARTIFACT_CACHE_MAX_GB", "10")) * 1024 * 1024 * 1024
+    ARTIFACT_INDEX_FLUSH_INTERVAL: float = float(os.getenv("ARTIFACT_INDEX_FLUSH_INTERVAL", "30"))  # seconds between access-time writes
     
     # Processing Configuration
     MAX_VIDEO_DURATION: int = int(os.getenv("MAX_VIDEO_DURATION", "0"))  # 0 = ไม่จำกัด
     MAX_TEXT_LENGTH: int = int(os.getenv("MAX_TEXT_LENGTH", "0"))  # 0 = ไม่จำกัด
     CONCURRENT_TASKS: int = int(os.getenv("CONCURRENT_TASKS", "5"))  # เพิ่มจำนวน concurrent tasks
     TASK_TIMEOUT: int = int(os.getenv("TASK_TIMEOUT", "14400"))  # 4 hours
-    
+
+    # Per-stage concurrency limits (shared by all pipeline workers)
+    DOWNLOAD_CONCURRENCY: int = int(os.getenv("DOWNLOAD_CONCURRENCY", "2"))
+    EXTRACT_CONCURRENCY: int = int(os.getenv("EXTRACT_CONCURRENCY", "2"))
+    STT_CONCURRENCY: int = int(os.getenv("STT_CONCURRENCY", "1"))
+    TRANSLATE_CONCURRENCY: int = int(os.getenv("TRANSLATE_CONCURRENCY", "3"))
+    TTS_CONCURRENCY: int = int(os.getenv("TTS_CONCURRENCY", "2"))
+    MERGE_CONCURRENCY: int = int(os.getenv("MERGE_CONCURRENCY", "1"))
+    TASK_ESTIMATE_SECONDS: int = int(os.getenv("TASK_ESTIMATE_SECONDS", "600"))  # initial ETA guess per task
+    EVENT_KEEPALIVE_INTERVAL: int = int(os.getenv("EVENT_KEEPALIVE_INTERVAL", "15"))  # idle WebSocket/SSE ping
+
     # External Services
     WHISPER_SERVICE_URL: str = os.getenv("WHISPER_SERVICE_URL", "http://docker-whisper-service-1:5001")
     TTS_SERVICE_URL: str = os.getenv("TTS_SERVICE_URL", "http://docker-tts-service-1:5002")
     TRANSLATION_SERVICE_URL: str = os.getenv("TRANSLATION_SERVICE_URL", "http://docker-libretranslate-1:5000")
     
+    # Shared HTTP client pools (per service)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "10"))  # services without their own limit
+    WHISPER_MAX_CONNECTIONS: int = int(os.getenv("WHISPER_MAX_CONNECTIONS", "4"))  # few long uploads
+    TTS_MAX_CONNECTIONS: int = int(os.getenv("TTS_MAX_CONNECTIONS", "10"))
+    TRANSLATION_MAX_CONNECTIONS: int = int(os.getenv("TRANSLATION_MAX_CONNECTIONS", "20"))  # many short segment requests
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_DEFAULT_TIMEOUT: float = float(os.getenv("HTTP_DEFAULT_TIMEOUT", "30"))
+    WHISPER_TIMEOUT: float = float(os.getenv("WHISPER_TIMEOUT", "3600"))
+    TTS_TIMEOUT: float = float(os.getenv("TTS_TIMEOUT", "300"))
+    TRANSLATION_TIMEOUT: float = float(os.getenv("TRANSLATION_TIMEOUT", "60"))
+    HTTP_RETRIES: int = int(os.getenv("HTTP_RETRIES", "3"))
+    HTTP_BACKOFF_BASE: float = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))  # seconds, doubled per attempt
+    HTTP_MAX_BACKOFF: float = float(os.getenv("HTTP_MAX_BACKOFF", "30"))
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+    CIRCUIT_RESET_SECONDS: float = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+    
     # Whisper Configuration
     WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "medium")
     WHISPER_DEVICE: str = os.getenv("WHISPER_DEVICE", "cpu")  # cpu, cuda
-    
+    WHISPER_SERVICE_URLS: str = os.getenv("WHISPER_SERVICE_URLS", "")  # comma-separated pool; defaults to WHISPER_SERVICE_URL
+    STT_CHUNKED_MIN_SECONDS: int = int(os.getenv("STT_CHUNKED_MIN_SECONDS", "600"))  # longer audio is transcribed in chunks
+    STT_CHUNK_SECONDS: int = int(os.getenv("STT_CHUNK_SECONDS", "300"))
+    STT_CHUNK_OVERLAP: float = float(os.getenv("STT_CHUNK_OVERLAP", "2.0"))  # seconds shared by chunks cut mid-speech
+    STT_CHUNK_CONCURRENCY: int = int(os.getenv("STT_CHUNK_CONCURRENCY", "2"))  # in-flight chunks per Whisper service
+    STT_SILENCE_THRESHOLD: str = os.getenv("STT_SILENCE_THRESHOLD", "-35dB")
+    STT_SILENCE_MIN_DURATION: float = float(os.getenv("STT_SILENCE_MIN_DURATION", "0.5"))
+
+    # Voice activity detection ahead of STT and speech-rate analysis
+    VAD_ENABLED: bool = os.getenv("VAD_ENABLED", "True").lower() == "true"
+    VAD_FRAME_MS: int = int(os.getenv("VAD_FRAME_MS", "30"))
+    VAD_MARGIN_DB: float = float(os.getenv("VAD_MARGIN_DB", "10"))  # speech sits this far above the noise floor
+    VAD_MIN_SPEECH: float = float(os.getenv("VAD_MIN_SPEECH", "0.25"))  # shorter bursts are dropped
+    VAD_MIN_SILENCE: float = float(os.getenv("VAD_MIN_SILENCE", "0.6"))  # shorter pauses stay inside a region
+    VAD_PADDING: float = float(os.getenv("VAD_PADDING", "0.2"))
+    VAD_MAX_SPEECH_RATIO: float = float(os.getenv("VAD_MAX_SPEECH_RATIO", "0.9"))  # above this, send the whole file
+
     # TTS Configuration
     TTS_MODEL_TH: str = os.getenv("TTS_MODEL_TH", "tts_models/th/mai_female/glow-tts")
     TTS_SAMPLE_RATE: int = int(os.getenv("TTS_SAMPLE_RATE", "22050"))
+    TTS_CHUNK_CONCURRENCY: int = int(os.getenv("TTS_CHUNK_CONCURRENCY", "4"))  # chunk requests in flight per task
+    TTS_CHUNK_RETRIES: int = int(os.getenv("TTS_CHUNK_RETRIES", "2"))  # whole-chunk retries on top of HTTP retries
+
+    # Segment-aligned dubbing (per-segment translation + TTS placed at Whisper timestamps)
+    TIMED_DUBBING: bool = os.getenv("TIMED_DUBBING", "True").lower() == "true"
+    DUBBING_MAX_TEMPO: float = float(os.getenv("DUBBING_MAX_TEMPO", "1.5"))  # fastest a clip is sped up to fit its slot
+    TRANSLATE_SEGMENT_CONCURRENCY: int = int(os.getenv("TRANSLATE_SEGMENT_CONCURRENCY", "4"))
+    TRANSLATE_CHUNK_SIZE: int = int(os.getenv("TRANSLATE_CHUNK_SIZE", "4000"))  # longer texts are split and translated concurrently
+    TRANSLATE_CHUNK_CONCURRENCY: int = int(os.getenv("TRANSLATE_CHUNK_CONCURRENCY", "4"))
+    TRANSLATE_CHUNK_RETRIES: int = int(os.getenv("TRANSLATE_CHUNK_RETRIES", "2"))  # per chunk, on top of HTTP retries
     
     # Translation Configuration
     TRANSLATION_API_KEY: str = os.getenv("TRANSLATION_API_KEY", "")
@@ -59,7 +118,15 @@ class Settings(BaseSettings):
     VIDEO_CODEC: str = os.getenv("VIDEO_CODEC", "libx264")
     AUDIO_BITRATE: str = os.getenv("AUDIO_BITRATE", "128k")
     VIDEO_QUALITY: str = os.getenv("VIDEO_QUALITY", "720p")
-    
+    VIDEO_REENCODE: str = os.getenv("VIDEO_REENCODE", "auto")  # auto: only when the merged video is not web-playable; always
+    
+    # Database (task store) - SQLite stand-in for local runs, Postgres in Docker
+    DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///data/tasks.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+    TASK_FLUSH_INTERVAL: float = float(os.getenv("TASK_FLUSH_INTERVAL", "2.0"))  # seconds between batched writes
+    TASK_CACHE_SIZE: int = int(os.getenv("TASK_CACHE_SIZE", "200"))  # finished tasks kept in memory
+
     # Redis Configuration (for production)
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
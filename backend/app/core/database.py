@@ -0,0 +1,110 @@
+# backend/app/core/database.py
+import os
+import logging
+from typing import Optional
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, DateTime, Float, Index, text
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+# Mirrors database/init.sql; task_data holds the full task document (steps, URLs, ...)
+processing_tasks = Table(
+    "processing_tasks",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("task_id", String(50), unique=True, nullable=False),
+    Column("youtube_url", Text, nullable=False),
+    Column("source_language", String(10)),
+    Column("target_language", String(10), default="th"),
+    Column("audio_mixing", String(20), default="overlay"),
+    Column("voice_type", String(20), default="female"),
+    Column("status", String(20), default="queued"),
+    Column("progress", Integer, default=0),
+    Column("message", Text),
+    Column("error", Text),
+    Column("result_file", Text),
+    Column("download_url", Text),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("completed_at", DateTime),
+    Column("processing_time", Float),
+    Column("file_size", Integer),
+    Column("video_duration", Float),
+    Column("task_data", Text),
+    Index("idx_tasks_created_task", "created_at", "task_id"),
+)
+
+_engine: Optional[AsyncEngine] = None
+
+
+def get_database_url() -> str:
+    """
+    Normalize DATABASE_URL to an async driver URL
+    """
+    url = settings.DATABASE_URL
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        url = "postgresql+asyncpg://" + url[len("postgresql://"):]
+    elif url.startswith("sqlite:///"):
+        url = "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    return url
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Get or create the shared pooled async engine
+    """
+    global _engine
+    if _engine is None:
+        url = get_database_url()
+        if url.startswith("sqlite"):
+            # Local stand-in: make sure the database directory exists
+            db_path = url.split(":///", 1)[1]
+            db_dir = os.path.dirname(db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            _engine = create_async_engine(url)
+        else:
+            _engine = create_async_engine(
+                url,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=1800
+            )
+        logger.info(f"Database engine created ({_engine.dialect.name})")
+    return _engine
+
+
+async def init_db():
+    """
+    Create missing tables/columns
+    """
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(metadata.create_all)
+        if engine.dialect.name == "postgresql":
+            # Databases created from an older init.sql lack these columns
+            await conn.execute(text(
+                "ALTER TABLE processing_tasks ADD COLUMN IF NOT EXISTS source_language VARCHAR(10)"
+            ))
+            await conn.execute(text(
+                "ALTER TABLE processing_tasks ADD COLUMN IF NOT EXISTS task_data TEXT"
+            ))
+    logger.info("Database initialized")
+
+
+async def close_db():
+    """
+    Dispose of the connection pool
+    """
+    global _engine
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
@@ -0,0 +1,153 @@
+# backend/app/core/events.py
+import json
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Subscribe to every task (dashboards)
+ALL_TASKS = "*"
+
+
+class Subscription:
+    """
+    One watcher's view of the event bus.
+
+    Events are buffered in a bounded queue; if the consumer falls behind the
+    queue is cleared and `resync` is set so it can send a fresh snapshot
+    instead of an incomplete series of diffs.
+    """
+
+    def __init__(self, bus: "EventBus", topics: Set[str], max_queue: int):
+        self.bus = bus
+        self.topics = topics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.resync: Set[str] = set()
+
+    def push(self, event: Dict[str, Any]):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            dropped = set()
+            while not self.queue.empty():
+                dropped.add(self.queue.get_nowait()["task_id"])
+            dropped.add(event["task_id"])
+            self.resync.update(dropped)
+            logger.warning(f"Event subscriber fell behind, resyncing {len(dropped)} task(s)")
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Next event, or None if nothing arrived within `timeout` seconds
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """
+    In-process pub/sub for task progress.
+
+    The task repository publishes the full task document on every change;
+    the bus keeps the last published copy per watched task and fans out only
+    the top-level fields that changed. Nothing is copied or diffed for
+    tasks nobody is watching.
+    """
+
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+
+    def subscribe(self, task_ids: Optional[Iterable[str]] = None) -> Subscription:
+        """
+        Watch the given tasks, or every task when task_ids is None
+        """
+        topics = set(task_ids) if task_ids else {ALL_TASKS}
+        subscription = Subscription(self, topics, self.max_queue)
+        for topic in topics:
+            self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for topic in subscription.topics:
+            watchers = self._subscribers.get(topic)
+            if watchers is None:
+                continue
+            watchers.discard(subscription)
+            if not watchers:
+                del self._subscribers[topic]
+                self._snapshots.pop(topic, None)
+        if not self._subscribers.get(ALL_TASKS):
+            # Without dashboards only directly watched tasks need snapshots
+            for task_id in list(self._snapshots):
+                if task_id not in self._subscribers:
+                    del self._snapshots[task_id]
+
+    def publish(self, task_id: str, task: Dict[str, Any]):
+        """
+        Send watchers of `task_id` the fields that changed since the last publish
+        """
+        watchers = self._watchers(task_id)
+        if not watchers:
+            return
+
+        # JSON round trip gives a deep copy that is also safe to send as-is
+        current = json.loads(json.dumps(task, default=str))
+        previous = self._snapshots.get(task_id)
+        self._snapshots[task_id] = current
+        if previous is None:
+            event = {"type": "snapshot", "task_id": task_id, "data": current}
+        else:
+            changes = {key: value for key, value in current.items() if previous.get(key) != value}
+            if not changes:
+                return
+            event = {"type": "update", "task_id": task_id, "data": changes}
+
+        for subscription in watchers:
+            subscription.push(event)
+
+        if current.get("status") in ("completed", "failed", "cancelled") and task_id not in self._subscribers:
+            # Dashboards get a fresh snapshot should a finished task change again
+            self._snapshots.pop(task_id, None)
+
+    def prime(self, task_id: str, task: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy of `task` to send as a new watcher's snapshot; also the diff base
+        if nothing was published for it yet
+        """
+        current = json.loads(json.dumps(task, default=str))
+        self._snapshots.setdefault(task_id, current)
+        return current
+
+    def publish_deleted(self, task_id: str):
+        self._snapshots.pop(task_id, None)
+        for subscription in self._watchers(task_id):
+            subscription.push({"type": "deleted", "task_id": task_id, "data": None})
+
+    def get_stats(self) -> Dict[str, Any]:
+        subscriptions = set()
+        for watchers in self._subscribers.values():
+            subscriptions.update(watchers)
+        return {
+            "subscribers": len(subscriptions),
+            "watched_tasks": len([topic for topic in self._subscribers if topic != ALL_TASKS])
+        }
+
+    def _watchers(self, task_id: str) -> Set[Subscription]:
+        return self._subscribers.get(task_id, set()) | self._subscribers.get(ALL_TASKS, set())
+
+
+# Shared bus; the task repository publishes, WebSocket/SSE endpoints subscribe
+event_bus = EventBus()
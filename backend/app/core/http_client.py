@@ -0,0 +1,237 @@
+# backend/app/core/http_client.py
+import time
+import random
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+import httpx
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Responses worth retrying: overloaded or briefly unavailable upstream
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# Failures before a request reached the service (safe to resend). Read
+# timeouts are not retried: the service may still be working on it.
+RETRY_EXCEPTIONS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    httpx.RemoteProtocolError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the service while its circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` failures in a row the circuit opens and calls
+    fail fast for `reset_timeout` seconds; then a single trial request is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self):
+        """Free the half-open trial slot when the trial ended without a result"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold or self.opened_at is not None:
+            self.opened_at = time.monotonic()
+
+
+class ServiceClient:
+    """
+    Pooled keep-alive client for one upstream service with retry and
+    exponential backoff (honouring Retry-After) behind a circuit breaker.
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float, max_connections: int):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.breaker = CircuitBreaker(settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_RESET_SECONDS)
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout, connect=settings.HTTP_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def request(self, method: str, path: str, retries: Optional[int] = None, **kwargs) -> httpx.Response:
+        """
+        Send a request; retries transient failures and returns the final response
+        """
+        is_trial = self.breaker.state == "half_open"
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} service unavailable (circuit open)")
+
+        attempts = (settings.HTTP_RETRIES if retries is None else retries) + 1
+        try:
+            for attempt in range(attempts):
+                self.requests += 1
+                retry_after = None
+                try:
+                    response = await self.client.request(method, path, **kwargs)
+                except RETRY_EXCEPTIONS as e:
+                    if attempt == attempts - 1:
+                        self._record_failure()
+                        raise
+                    logger.warning(f"{self.name} request {method} {path} failed ({type(e).__name__}), retrying")
+                except httpx.HTTPError:
+                    self._record_failure()
+                    raise
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        if response.status_code >= 500:
+                            self._record_failure()
+                        else:
+                            self.breaker.record_success()
+                        return response
+                    if attempt == attempts - 1:
+                        self._record_failure()
+                        return response
+                    retry_after = response.headers.get("Retry-After")
+                    logger.warning(f"{self.name} returned {response.status_code} for {method} {path}, retrying")
+
+                self.retries += 1
+                _rewind_files(kwargs.get("files"))
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        except httpx.HTTPError:
+            raise
+        except Exception:
+            self._record_failure()
+            raise
+        finally:
+            # Cancellation or an unexpected error must not hold the half-open trial forever
+            if is_trial:
+                self.breaker.release_trial()
+
+    async def get(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", path, **kwargs)
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "base_url": self.base_url,
+            "circuit": self.breaker.state,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures
+        }
+
+    async def close(self):
+        await self.client.aclose()
+
+    def _record_failure(self):
+        self.failures += 1
+        was_open = self.breaker.state != "closed"
+        self.breaker.record_failure()
+        if not was_open and self.breaker.state == "open":
+            logger.error(f"{self.name} circuit opened after {self.breaker.failures} consecutive failures")
+
+    def _backoff(self, attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.HTTP_MAX_BACKOFF)
+            except ValueError:
+                pass
+        delay = settings.HTTP_BACKOFF_BASE * (2 ** attempt)
+        return min(delay, settings.HTTP_MAX_BACKOFF) * random.uniform(0.5, 1.0)
+
+
+def _rewind_files(files: Any):
+    """
+    Multipart file objects must be re-read from the start on retry
+    """
+    if not files:
+        return
+    values = files.values() if isinstance(files, dict) else [value for _, value in files]
+    for value in values:
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+
+
+class HttpClients:
+    """
+    Registry of shared service clients, one pool per (service, base URL)
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str], ServiceClient] = {}
+
+    def get(self, name: str, base_url: str) -> ServiceClient:
+        key = (name, base_url.rstrip("/"))
+        if key not in self._clients:
+            self._clients[key] = ServiceClient(
+                name, base_url, self._timeout_for(name), self._max_connections_for(name)
+            )
+        return self._clients[key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {f"{name} {base_url}": client.get_stats() for (name, base_url), client in self._clients.items()}
+
+    async def close(self):
+        for client in self._clients.values():
+            await client.close()
+        self._clients = {}
+
+    def _timeout_for(self, name: str) -> float:
+        return {
+            "whisper": settings.WHISPER_TIMEOUT,
+            "tts": settings.TTS_TIMEOUT,
+            "translation": settings.TRANSLATION_TIMEOUT
+        }.get(name, settings.HTTP_DEFAULT_TIMEOUT)
+
+    def _max_connections_for(self, name: str) -> int:
+        return {
+            "whisper": settings.WHISPER_MAX_CONNECTIONS,
+            "tts": settings.TTS_MAX_CONNECTIONS,
+            "translation": settings.TRANSLATION_MAX_CONNECTIONS
+        }.get(name, settings.HTTP_MAX_CONNECTIONS)
+
+
+# Shared clients for all backend services
+http_clients = HttpClients()
@@ -0,0 +1,246 @@
+# backend/app/core/scheduler.py
+import asyncio
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower value = picked up sooner
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+PIPELINE_STAGES = (
+    "download",
+    "extract_audio",
+    "speech_to_text",
+    "translate",
+    "text_to_speech",
+    "merge_video",
+)
+
+
+@dataclass(order=True)
+class _QueuedJob:
+    priority: int
+    sequence: int
+    task_id: str = field(compare=False)
+    factory: Callable[[], Awaitable[Any]] = field(compare=False)
+    enqueued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+class TaskScheduler:
+    """
+    Bounded worker-pool scheduler for video processing pipelines.
+
+    Jobs wait in a priority queue and are executed by a fixed number of
+    workers (``CONCURRENT_TASKS``). Each pipeline stage additionally has its
+    own semaphore so CPU-heavy steps (STT, merge) never run more copies than
+    the container can handle, even when several pipelines are active.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        stage_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_workers = max(1, max_workers or settings.CONCURRENT_TASKS)
+        self.stage_limits = stage_limits or {
+            "download": settings.DOWNLOAD_CONCURRENCY,
+            "extract_audio": settings.EXTRACT_CONCURRENCY,
+            "speech_to_text": settings.STT_CONCURRENCY,
+            "translate": settings.TRANSLATE_CONCURRENCY,
+            "text_to_speech": settings.TTS_CONCURRENCY,
+            "merge_video": settings.MERGE_CONCURRENCY,
+        }
+        self._stage_semaphores = {
+            stage: asyncio.Semaphore(max(1, limit)) for stage, limit in self.stage_limits.items()
+        }
+        self._stage_active = {stage: 0 for stage in self.stage_limits}
+        self._stage_waiting = {stage: 0 for stage in self.stage_limits}
+
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._pending: Dict[str, _QueuedJob] = {}
+        self._running: Dict[str, asyncio.Task] = {}
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()
+
+        # Exponential moving average of full pipeline duration, used for ETA
+        self._avg_duration = float(settings.TASK_ESTIMATE_SECONDS)
+        self._completed = 0
+
+    async def start(self):
+        """
+        Start the worker pool (idempotent)
+        """
+        if self._workers:
+            return
+        for index in range(self.max_workers):
+            self._workers.append(asyncio.create_task(self._worker(index)))
+        logger.info(
+            f"Task scheduler started with {self.max_workers} workers, stage limits: {self.stage_limits}"
+        )
+
+    async def stop(self):
+        """
+        Cancel running jobs and stop all workers
+        """
+        for runner in list(self._running.values()):
+            runner.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        logger.info("Task scheduler stopped")
+
+    def submit(
+        self,
+        task_id: str,
+        factory: Callable[[], Awaitable[Any]],
+        priority: int = PRIORITY_NORMAL,
+    ) -> int:
+        """
+        Queue a pipeline coroutine factory and return its 1-based queue position
+        """
+        job = _QueuedJob(priority, next(self._sequence), task_id, factory)
+        self._pending[task_id] = job
+        self._queue.put_nowait(job)
+        position = self.get_queue_position(task_id) or 0
+        logger.info(f"Queued task {task_id} (priority {priority}, position {position})")
+        return position
+
+    def cancel(self, task_id: str) -> bool:
+        """
+        Drop a queued job or cancel a running one
+        """
+        if self._pending.pop(task_id, None) is not None:
+            logger.info(f"Removed queued task {task_id}")
+            return True
+        runner = self._running.get(task_id)
+        if runner is not None and not runner.done():
+            runner.cancel()
+            logger.info(f"Cancelled running task {task_id}")
+            return True
+        return False
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """
+        Hold a slot of the given pipeline stage for the duration of the block
+        """
+        semaphore = self._stage_semaphores.get(name)
+        if semaphore is None:
+            yield
+            return
+
+        self._stage_waiting[name] += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._stage_waiting[name] -= 1
+
+        self._stage_active[name] += 1
+        try:
+            yield
+        finally:
+            self._stage_active[name] -= 1
+            semaphore.release()
+
+    def get_queue_position(self, task_id: str) -> Optional[int]:
+        """
+        Return the 1-based position of a queued task, or None if not queued
+        """
+        if task_id not in self._pending:
+            return None
+        ordered = sorted(self._pending.values())
+        for index, job in enumerate(ordered):
+            if job.task_id == task_id:
+                return index + 1
+        return None
+
+    def get_queue_info(self, task_id: str) -> Dict[str, Any]:
+        """
+        Queue position and estimated wait (seconds) for a queued task
+        """
+        position = self.get_queue_position(task_id)
+        if position is None:
+            return {}
+
+        # Jobs ahead of us plus the ones already running share the worker pool
+        rounds = math.ceil((position + len(self._running)) / self.max_workers)
+        return {
+            "queue_position": position,
+            "estimated_time_remaining": int(rounds * self._avg_duration),
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of scheduler load for health/monitoring endpoints
+        """
+        return {
+            "workers": self.max_workers,
+            "running": len(self._running),
+            "queued": len(self._pending),
+            "completed": self._completed,
+            "average_task_seconds": round(self._avg_duration, 1),
+            "stages": {
+                stage: {
+                    "limit": self.stage_limits[stage],
+                    "active": self._stage_active[stage],
+                    "waiting": self._stage_waiting[stage],
+                }
+                for stage in self.stage_limits
+            },
+        }
+
+    async def _worker(self, index: int):
+        """
+        Pull jobs from the priority queue forever
+        """
+        while True:
+            job = await self._queue.get()
+            try:
+                # Skip jobs that were cancelled while still queued
+                if self._pending.get(job.task_id) is not job:
+                    continue
+                del self._pending[job.task_id]
+                await self._run_job(job, index)
+            finally:
+                self._queue.task_done()
+
+    async def _run_job(self, job: _QueuedJob, index: int):
+        """
+        Execute one pipeline and record its duration for ETA estimates
+        """
+        started = time.monotonic()
+        logger.info(
+            f"Worker {index} starting task {job.task_id} after {started - job.enqueued_at:.1f}s in queue"
+        )
+        runner = asyncio.create_task(job.factory())
+        self._running[job.task_id] = runner
+        try:
+            await runner
+        except asyncio.CancelledError:
+            if not runner.cancelled():
+                # The worker itself is being shut down
+                raise
+            logger.info(f"Task {job.task_id} was cancelled")
+        except Exception as e:
+            logger.error(f"Task {job.task_id} raised in worker {index}: {str(e)}")
+        finally:
+            self._running.pop(job.task_id, None)
+
+        duration = time.monotonic() - started
+        self._completed += 1
+        self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+
+# Shared scheduler instance used by the API
+scheduler = TaskScheduler()
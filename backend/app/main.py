@@ -1,8 +1,8 @@
 # backend/app/main.py
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import os
@@ -10,7 +10,7 @@ import uuid
 import json
 import asyncio
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncIterator
 import logging
 
 # Import our services
@@ -18,9 +18,17 @@ from app.services.youtube_service import YouTubeService
 from app.services.audio_service import AudioService
 from app.services.translation_service import TranslationService
 from app.services.tts_service import TTSService
+from app.services.dubbing_service import DubbingService
 from app.services.video_service import VideoService
+from app.services.upload_service import UploadService, UploadError
+from app.services.media_store import media_store
+from app.services.artifact_cache import artifact_cache, stage_key
 from app.models.schemas import ProcessRequest, ProcessStatus, ProcessResponse, FileTranslationRequest
 from app.core.config import settings
+from app.core.scheduler import scheduler
+from app.core.events import event_bus
+from app.core.http_client import http_clients
+from app.services.task_repository import task_repository, TERMINAL_STATUSES
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -52,10 +60,9 @@ youtube_service = YouTubeService()
 audio_service = AudioService()
 translation_service = TranslationService()
 tts_service = TTSService()
+dubbing_service = DubbingService(tts_service)
 video_service = VideoService()
-
-# In-memory task storage (in production, use Redis)
-tasks: Dict[str, Dict[str, Any]] = {}
+upload_service = UploadService()
 
 # Create demo task for testing
 def create_demo_task():
@@ -89,7 +96,7 @@ def create_demo_task():
             "subtitle": f"output/subtitle_{demo_task_id}.srt"
         }
     }
-    tasks[demo_task_id] = demo_task
+    task_repository.create(demo_task)
     
     # Create demo files
     demo_video_path = f"output/final_{demo_task_id}.mp4"
@@ -137,6 +144,44 @@ def create_demo_task():
 # Create demo task on startup
 create_demo_task()
 
+@app.on_event("startup")
+async def start_scheduler():
+    """Open the task store and start the pipeline worker pool"""
+    await task_repository.start()
+    artifact_cache.start()
+    await scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler():
+    """Stop the pipeline worker pool and flush pending task writes"""
+    await scheduler.stop()
+    await task_repository.stop()
+    await artifact_cache.stop()
+    await http_clients.close()
+
+async def get_task_or_404(task_id: str) -> Dict[str, Any]:
+    """Load a task from the store or raise 404"""
+    task = await task_repository.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
+
+def update_task_status(task_id: str, status: str, progress: int, message: str, step: str = None):
+    """Update task progress; persisted in batches by the task repository"""
+    task = task_repository.get_cached(task_id)
+    if task is None:
+        return
+    
+    fields = {"status": status, "progress": progress, "message": message}
+    if status == "completed":
+        fields["completed_at"] = datetime.now().isoformat()
+    
+    if step:
+        task["steps"][step]["status"] = "completed" if progress == 100 else "processing"
+        task["steps"][step]["progress"] = progress
+    
+    task_repository.update(task_id, **fields)
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -157,10 +202,9 @@ async def health_check():
             "ffmpeg": "available"
         }
         
-        # Test Whisper service
+        # Test Whisper service (single attempt; health checks shouldn't retry)
         try:
-            import requests
-            whisper_response = requests.get(f"{settings.WHISPER_SERVICE_URL}/health", timeout=5)
+            whisper_response = await http_clients.get("whisper", settings.WHISPER_SERVICE_URL).get("/health", timeout=5, retries=0)
             if whisper_response.status_code == 200:
                 services_status["whisper"] = "available"
             else:
@@ -170,7 +214,7 @@ async def health_check():
         
         # Test TTS service
         try:
-            tts_response = requests.get(f"{settings.TTS_SERVICE_URL}/health", timeout=5)
+            tts_response = await http_clients.get("tts", settings.TTS_SERVICE_URL).get("/health", timeout=5, retries=0)
             if tts_response.status_code == 200:
                 services_status["tts"] = "available"
             else:
@@ -181,17 +225,19 @@ async def health_check():
         return {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
-            "services": services_status
+            "services": services_status,
+            "scheduler": scheduler.get_stats(),
+            "media_store": media_store.get_stats(),
+            "artifact_cache": artifact_cache.get_stats(),
+            "events": event_bus.get_stats(),
+            "http_clients": http_clients.get_stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
 @app.post("/process-video/", response_model=ProcessResponse)
-async def process_video(
-    request: ProcessRequest,
-    background_tasks: BackgroundTasks
-):
+async def process_video(request: ProcessRequest):
     """
     Start processing a YouTube video
     """
@@ -200,12 +246,13 @@ async def process_video(
         task_id = str(uuid.uuid4())
         
         # Initialize task status
-        tasks[task_id] = {
+        task_repository.create({
             "id": task_id,
             "status": "queued",
             "progress": 0,
             "message": "Task queued for processing",
             "youtube_url": str(request.youtube_url),
+            "source_language": request.source_language or "en",
             "target_language": request.target_language,
             "created_at": datetime.now().isoformat(),
             "steps": {
@@ -217,22 +264,22 @@ async def process_video(
                 "merge_video": {"status": "pending", "progress": 0}
             },
             "updated_at": datetime.now().isoformat()
-        }
+        })
         
-        # Add background task
-        background_tasks.add_task(
-            process_youtube_video_pipeline,
+        # Queue pipeline on the bounded worker pool
+        queue_position = scheduler.submit(
             task_id,
-            request.youtube_url,
-            request.target_language
+            lambda: process_youtube_video_pipeline(task_id, request.youtube_url, request.target_language),
+            priority=request.priority
         )
         
-        logger.info(f"Started processing task {task_id} for URL: {request.youtube_url}")
+        logger.info(f"Queued processing task {task_id} for URL: {request.youtube_url}")
         
         return ProcessResponse(
             task_id=task_id,
             status="queued",
-            message="Video processing started"
+            message="Video processing queued",
+            queue_position=queue_position
         )
         
     except Exception as e:
@@ -240,14 +287,14 @@ async def process_video(
         raise HTTPException(status_code=500, detail=f"Failed to start processing: {str(e)}")
 
 @app.post("/translate")
-async def translate_video(request: ProcessRequest, background_tasks: BackgroundTasks):
+async def translate_video(request: ProcessRequest):
     """
     Alias for process_video endpoint - expected by frontend
     """
-    return await process_video(request, background_tasks)
+    return await process_video(request)
 
 @app.post("/translate-file")
-async def translate_uploaded_file(request: FileTranslationRequest, background_tasks: BackgroundTasks):
+async def translate_uploaded_file(request: FileTranslationRequest):
     """
     Start processing an uploaded video file
     """
@@ -255,17 +302,20 @@ async def translate_uploaded_file(request: FileTranslationRequest, background_ta
         # Generate unique task ID
         task_id = str(uuid.uuid4())
         
-        # Check if file exists
-        if not os.path.exists(request.file_path):
-            raise HTTPException(status_code=404, detail=f"File not found: {request.file_path}")
+        # The task gets its own link to the uploaded video
+        try:
+            video_path = upload_service.attach_to_task(request.file_path, task_id)
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
         
         # Initialize task status
-        tasks[task_id] = {
+        task_repository.create({
             "id": task_id,
             "status": "queued",
             "progress": 0,
             "message": "Task queued for processing",
             "youtube_url": request.file_path,  # Store file path in youtube_url field for compatibility
+            "source_language": request.source_language or "en",
             "target_language": request.target_language,
             "created_at": datetime.now().isoformat(),
             "steps": {
@@ -277,24 +327,26 @@ async def translate_uploaded_file(request: FileTranslationRequest, background_ta
                 "merge_video": {"status": "pending", "progress": 0}
             },
             "updated_at": datetime.now().isoformat()
-        }
+        })
         
-        # Add background task - start from audio extraction
-        background_tasks.add_task(
-            process_uploaded_file_pipeline,
+        # Queue pipeline on the bounded worker pool - starts from audio extraction
+        queue_position = scheduler.submit(
             task_id,
-            request.file_path,
-            request.target_language
+            lambda: process_uploaded_file_pipeline(task_id, video_path, request.target_language),
+            priority=request.priority
         )
         
-        logger.info(f"Started processing uploaded file task {task_id} for file: {request.file_path}")
+        logger.info(f"Queued uploaded file task {task_id} for file: {request.file_path}")
         
         return ProcessResponse(
             task_id=task_id,
             status="queued",
-            message="File processing started"
+            message="File processing queued",
+            queue_position=queue_position
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error starting file processing: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to start processing: {str(e)}")
@@ -307,17 +359,20 @@ async def get_task_status_alias(task_id: str):
     return await get_task_status(task_id)
 
 @app.get("/tasks")
-async def get_task_history(limit: int = 10):
+async def get_task_history(limit: int = 10, cursor: Optional[str] = None):
     """
-    Get task history
+    Get task history (newest first, keyset-paginated via cursor)
     """
     try:
-        # In production, this would query a database
-        # For now, return recent tasks from memory
+        try:
+            page, next_cursor = await task_repository.list_tasks(limit, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         recent_tasks = []
-        for task_id, task_data in list(tasks.items())[-limit:]:
+        for task_data in page:
             recent_tasks.append({
-                "task_id": task_id,
+                "task_id": task_data["id"],
                 "status": task_data.get("status", "unknown"),
                 "youtube_url": task_data.get("youtube_url", ""),
                 "target_language": task_data.get("target_language", "th"),
@@ -325,8 +380,10 @@ async def get_task_history(limit: int = 10):
                 "progress": task_data.get("progress", 0)
             })
         
-        return {"tasks": recent_tasks}
+        return {"tasks": recent_tasks, "next_cursor": next_cursor}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get task history: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -336,16 +393,15 @@ async def cancel_task(task_id: str):
     """
     Cancel a running task
     """
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    task = tasks[task_id]
-    if task["status"] in ["completed", "failed", "cancelled"]:
+    task = await get_task_or_404(task_id)
+    if task["status"] in TERMINAL_STATUSES:
         raise HTTPException(status_code=400, detail="Task already finished")
     
+    # Drop it from the queue or stop the running pipeline
+    scheduler.cancel(task_id)
+    
     # Update task status
-    tasks[task_id]["status"] = "cancelled"
-    tasks[task_id]["message"] = "Task cancelled by user"
+    task_repository.update(task_id, status="cancelled", message="Task cancelled by user")
     
     return {"message": "Task cancelled successfully"}
 
@@ -377,10 +433,11 @@ async def get_statistics():
     Get application statistics
     """
     try:
-        total_tasks = len(tasks)
-        completed_tasks = sum(1 for task in tasks.values() if task.get("status") == "completed")
-        failed_tasks = sum(1 for task in tasks.values() if task.get("status") == "failed")
-        processing_tasks = sum(1 for task in tasks.values() if task.get("status") in ["queued", "processing"])
+        counts = await task_repository.get_stats()
+        total_tasks = sum(counts.values())
+        completed_tasks = counts.get("completed", 0)
+        failed_tasks = counts.get("failed", 0)
+        processing_tasks = counts.get("queued", 0) + counts.get("processing", 0)
         
         return {
             "total_tasks": total_tasks,
@@ -396,76 +453,90 @@ async def get_statistics():
 @app.post("/upload")
 async def upload_video(video: UploadFile = File(...)):
     """
-    Upload a video file
+    Upload a video file (streamed to disk in fixed-size chunks)
     """
     try:
-        # Validate file
-        if not video.filename:
-            raise HTTPException(status_code=400, detail="No file provided")
-        
-        # Check file size (max 500MB)
-        content = await video.read()
-        if len(content) > 500 * 1024 * 1024:  # 500MB
-            raise HTTPException(status_code=413, detail="File too large (max 500MB)")
-        
-        if len(content) == 0:
-            raise HTTPException(status_code=400, detail="Empty file")
-        
-        # Validate file extension
-        allowed_extensions = ['.mp4', '.avi', '.mov', '.webm', '.mkv', '.m4v']
-        file_extension = os.path.splitext(video.filename)[1].lower()
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Invalid file type. Allowed: {', '.join(allowed_extensions)}"
-            )
-        
-        # Ensure uploads directory exists
-        os.makedirs("uploads", exist_ok=True)
-        
-        # Generate unique filename
-        file_id = str(uuid.uuid4())
-        filename = f"uploaded_{file_id}{file_extension}"
-        file_path = os.path.join("uploads", filename)
-        
-        # Check if file already exists (very unlikely with UUID)
-        if os.path.exists(file_path):
-            raise HTTPException(status_code=409, detail="File already exists")
-        
-        # Save uploaded file
-        try:
-            with open(file_path, "wb") as buffer:
-                buffer.write(content)
-            
-            # Verify file was written correctly
-            if not os.path.exists(file_path):
-                raise HTTPException(status_code=500, detail="Failed to save file")
-            
-            file_size = os.path.getsize(file_path)
-            if file_size != len(content):
-                raise HTTPException(status_code=500, detail="File size mismatch")
-            
-            logger.info(f"File uploaded successfully: {filename} ({file_size} bytes)")
-            
-            return {
-                "file_id": file_id,
-                "filename": filename,
-                "file_path": file_path,
-                "size": file_size,
-                "message": "File uploaded successfully"
-            }
-            
-        except IOError as e:
-            logger.error(f"IO Error saving file: {str(e)}")
-            raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+        return {
+            **await upload_service.save_stream(upload_service.iter_upload_file(video), video.filename),
+            "message": "File uploaded successfully"
+        }
         
-    except HTTPException:
-        # Re-raise HTTP exceptions
-        raise
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logger.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@app.post("/uploads")
+async def create_resumable_upload(request: Request):
+    """
+    Start a resumable upload (tus-style). Requires Upload-Length and
+    Upload-Filename headers; returns the upload URL to PATCH data to.
+    """
+    try:
+        length = int(request.headers.get("Upload-Length", "0"))
+        session = upload_service.create_session(request.headers.get("Upload-Filename", ""), length)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Upload-Length header")
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    location = f"/uploads/{session['upload_id']}"
+    return JSONResponse(
+        status_code=201,
+        content={**session, "location": location},
+        headers={"Location": location, "Upload-Offset": "0", "Upload-Length": str(length)}
+    )
+
+@app.head("/uploads/{upload_id}")
+async def get_resumable_upload_offset(upload_id: str):
+    """
+    Report how many bytes of a resumable upload the server already has
+    """
+    try:
+        session = upload_service.get_session(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    return Response(
+        status_code=200,
+        headers={
+            "Upload-Offset": str(session["offset"]),
+            "Upload-Length": str(session["length"]),
+            "Cache-Control": "no-store"
+        }
+    )
+
+@app.patch("/uploads/{upload_id}")
+async def append_resumable_upload(upload_id: str, request: Request):
+    """
+    Append the request body at Upload-Offset; the response includes the
+    file_path once the last byte has been received
+    """
+    try:
+        offset = int(request.headers.get("Upload-Offset", "-1"))
+        result = await upload_service.append(upload_id, offset, request.stream())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Upload-Offset header")
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except Exception as e:
+        logger.error(f"Resumable upload {upload_id} interrupted: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    
+    return JSONResponse(content=result, headers={"Upload-Offset": str(result["offset"])})
+
+@app.delete("/uploads/{upload_id}")
+async def abort_resumable_upload(upload_id: str):
+    """
+    Discard a resumable upload
+    """
+    try:
+        upload_service.abort(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {"message": "Upload aborted"}
+
 @app.post("/share")
 async def create_share_link(request: dict):
     """
@@ -473,7 +544,7 @@ async def create_share_link(request: dict):
     """
     try:
         task_id = request.get("task_id")
-        if not task_id or task_id not in tasks:
+        if not task_id or await task_repository.get(task_id) is None:
             raise HTTPException(status_code=404, detail="Task not found")
         
         # Generate share token
@@ -498,10 +569,11 @@ async def get_task_status(task_id: str):
     """
     Get processing status for a task
     """
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
+    task = await get_task_or_404(task_id)
     
-    task = tasks[task_id]
+    # Report queue position and ETA while waiting for a worker
+    if task.get("status") == "queued":
+        return ProcessStatus(**{**task, **scheduler.get_queue_info(task_id)})
     
     # Add video URL for completed tasks
     if task.get("status") == "completed" and "video_url" in task:
@@ -518,10 +590,7 @@ async def download_result(task_id: str):
     """
     Download the processed video
     """
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    task = tasks[task_id]
+    task = await get_task_or_404(task_id)
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="Task not completed yet")
     
@@ -560,10 +629,7 @@ async def download_video(task_id: str):
     """
     Download the translated video file
     """
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    task = tasks[task_id]
+    task = await get_task_or_404(task_id)
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="Task not completed yet")
     
@@ -602,10 +668,7 @@ async def download_audio(task_id: str):
     """
     Download the translated audio file
     """
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    task = tasks[task_id]
+    task = await get_task_or_404(task_id)
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="Task not completed yet")
     
@@ -649,10 +712,7 @@ async def download_subtitle(task_id: str):
     """
     Download the subtitle file
     """
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    task = tasks[task_id]
+    task = await get_task_or_404(task_id)
     if task["status"] != "completed":
         raise HTTPException(status_code=400, detail="Task not completed yet")
     
@@ -690,8 +750,10 @@ async def delete_task(task_id: str):
     """
     Delete a task and its associated files
     """
-    if task_id not in tasks:
-        raise HTTPException(status_code=404, detail="Task not found")
+    await get_task_or_404(task_id)
+    
+    # Make sure no worker keeps processing it
+    scheduler.cancel(task_id)
     
     # Clean up files
     files_to_clean = [
@@ -700,18 +762,136 @@ async def delete_task(task_id: str):
         f"uploads/transcript_{task_id}.json",
         f"uploads/translated_{task_id}.txt",
         f"uploads/thai_audio_{task_id}.wav",
-        f"output/final_{task_id}.mp4"
+        f"uploads/dub_audio_{task_id}.wav",
+        f"output/final_{task_id}.mp4",
+        f"output/subtitle_{task_id}.srt",
+        f"output/translated_subtitle_{task_id}.srt",
+        f"uploads/subtitle_{task_id}.srt"
     ]
     
     for file_path in files_to_clean:
         if os.path.exists(file_path):
             os.remove(file_path)
     
-    # Remove task from memory
-    del tasks[task_id]
+    # Intermediate audio (VAD timeline, speech track, chunks) and TTS output
+    await audio_service.cleanup_audio_files(task_id)
+    await tts_service.cleanup_tts_files(task_id)
+    
+    # Release the shared source video and remove the task's own link to it
+    # (downloads keep their original extension); drop it if no other task uses it
+    for linked_path in media_store.release(task_id):
+        if os.path.exists(linked_path):
+            os.remove(linked_path)
+    await asyncio.to_thread(media_store.collect_garbage)
+    
+    # Remove task from the store
+    await task_repository.delete(task_id)
     
     return {"message": "Task deleted successfully"}
 
+def in_stage(stage: str, factory):
+    """
+    Wrap a pipeline step so it only takes a stage slot when it actually runs
+    """
+    async def run():
+        async with scheduler.stage(stage):
+            return await factory()
+    return run
+
+async def run_processing_steps(task_id: str, video_path: str, target_language: str) -> str:
+    """
+    Extract, transcribe, translate, synthesize and merge one video.
+
+    Each step's output is cached under a key chained from the source video
+    hash and the step parameters, so a repeat job (e.g. the same video into
+    another language) only reruns the steps whose inputs changed.
+
+    With TIMED_DUBBING and a segmented transcript, translation and TTS run
+    per Whisper segment so the dub and the SRT follow the original timing;
+    otherwise the whole transcript is translated and spoken in one piece.
+    """
+    task = task_repository.get_cached(task_id)
+    source_language = task.get("source_language", "en")  # Default เป็นอังกฤษ
+    voice_type = task.get("voice_type", "female")
+    mixing_mode = task.get("audio_mixing", "overlay")
+    video_key = await asyncio.to_thread(artifact_cache.media_key, video_path)
+    
+    # Step 2: Extract audio
+    update_task_status(task_id, "processing", 30, "Extracting audio from video...", "extract_audio")
+    audio_key = stage_key("extract_audio", video_key)
+    audio_path = await artifact_cache.file_stage(audio_key, task_id, in_stage(
+        "extract_audio", lambda: audio_service.extract_audio(video_path, task_id)
+    ))
+    update_task_status(task_id, "processing", 40, "Audio extracted successfully", "extract_audio")
+    
+    # Step 3: Speech to text (บังคับใช้ภาษาต้นฉบับ)
+    update_task_status(task_id, "processing", 50, "Converting speech to text...", "speech_to_text")
+    
+    async def transcribe():
+        async with scheduler.stage("speech_to_text"):
+            transcript = await audio_service.speech_to_text(audio_path, task_id, source_language)
+        return {
+            "transcript": transcript,
+            "segments": audio_service.load_segments(task_id),
+            "speech_rate_info": task_repository.get_cached(task_id).get("speech_rate_info")
+        }
+    
+    # Any VAD setting changes what Whisper is sent, so all of them are part of the key
+    vad = dict(audio_service.vad_params(), max_speech_ratio=settings.VAD_MAX_SPEECH_RATIO) if settings.VAD_ENABLED else False
+    transcript_key = stage_key(
+        "speech_to_text", audio_key, source_language, settings.WHISPER_MODEL, vad=vad, segments=True
+    )
+    stt_result = await artifact_cache.json_stage(transcript_key, transcribe)
+    transcript = stt_result["transcript"]
+    segments = stt_result.get("segments") or []
+    speech_rate_info = stt_result["speech_rate_info"]
+    task_repository.update(task_id, speech_rate_info=speech_rate_info)
+    update_task_status(task_id, "processing", 60, f"Speech converted to text (source: {source_language})", "speech_to_text")
+    timed = settings.TIMED_DUBBING and bool(segments)
+    
+    # Step 4: Translate text
+    update_task_status(task_id, "processing", 70, "Translating text to Thai...", "translate")
+    if timed:
+        translate_key = stage_key("translate_segments", transcript_key, target_language)
+        translations = await artifact_cache.json_stage(translate_key, in_stage(
+            "translate",
+            lambda: translation_service.translate_segments([s["text"] for s in segments], target_language, source_language)
+        ))
+        dubbing_service.write_srt(segments, translations, task_id)
+    else:
+        translate_key = stage_key("translate", transcript_key, target_language)
+        translated_text = await artifact_cache.json_stage(translate_key, in_stage(
+            "translate", lambda: translation_service.translate(transcript, target_language)
+        ))
+    update_task_status(task_id, "processing", 80, "Text translated successfully", "translate")
+    
+    # Step 5: Text to speech with dynamic speech rate
+    update_task_status(task_id, "processing", 85, "Converting Thai text to speech...", "text_to_speech")
+    if timed:
+        duration = await tts_service.get_audio_duration(audio_path)
+        tts_key = stage_key("timed_dub", translate_key, voice_type, speech_rate_info, settings.DUBBING_MAX_TEMPO)
+        thai_audio_path = await artifact_cache.file_stage(tts_key, task_id, in_stage(
+            "text_to_speech",
+            lambda: dubbing_service.create_dub_track(
+                segments, translations, task_id, duration, language=target_language,
+                voice_type=voice_type, speech_rate_info=speech_rate_info
+            )
+        ))
+    else:
+        tts_key = stage_key("text_to_speech", translate_key, voice_type, speech_rate_info)
+        thai_audio_path = await artifact_cache.file_stage(tts_key, task_id, in_stage(
+            "text_to_speech",
+            lambda: tts_service.text_to_speech(translated_text, task_id, voice_type=voice_type, speech_rate_info=speech_rate_info)
+        ))
+    update_task_status(task_id, "processing", 90, "Thai audio generated", "text_to_speech")
+    
+    # Step 6: Merge audio with video
+    update_task_status(task_id, "processing", 95, "Merging audio with video...", "merge_video")
+    merge_key = stage_key("merge_video", video_key, tts_key, mixing_mode, reencode=settings.VIDEO_REENCODE)
+    return await artifact_cache.file_stage(merge_key, task_id, in_stage(
+        "merge_video", lambda: video_service.merge_audio_video(video_path, thai_audio_path, task_id, mixing_mode)
+    ))
+
 async def process_youtube_video_pipeline(
     task_id: str,
     youtube_url: str,
@@ -723,57 +903,18 @@ async def process_youtube_video_pipeline(
     try:
         logger.info(f"Starting pipeline for task {task_id}")
         
-        # Update task status
-        def update_task_status(status: str, progress: int, message: str, step: str = None):
-            tasks[task_id]["status"] = status
-            tasks[task_id]["progress"] = progress
-            tasks[task_id]["message"] = message
-            tasks[task_id]["updated_at"] = datetime.now().isoformat()
-            
-            if step:
-                tasks[task_id]["steps"][step]["status"] = "completed" if progress == 100 else "processing"
-                tasks[task_id]["steps"][step]["progress"] = progress
-        
         # Step 1: Download YouTube video
-        update_task_status("processing", 10, "Downloading YouTube video...", "download")
+        update_task_status(task_id, "processing", 10, "Downloading YouTube video...", "download")
         # Ensure URL is a string for yt-dlp compatibility
-        video_path = await youtube_service.download_video(str(youtube_url), task_id)
-        update_task_status("processing", 20, "Video downloaded successfully", "download")
-        
-        # Step 2: Extract audio
-        update_task_status("processing", 30, "Extracting audio from video...", "extract_audio")
-        audio_path = await audio_service.extract_audio(video_path, task_id)
-        update_task_status("processing", 40, "Audio extracted successfully", "extract_audio")
-        
-        # Step 3: Speech to text (บังคับใช้ภาษาต้นฉบับ)
-        update_task_status("processing", 50, "Converting speech to text...", "speech_to_text")
-        source_language = tasks[task_id].get("source_language", "en")  # Default เป็นอังกฤษ
-        transcript = await audio_service.speech_to_text(audio_path, task_id, source_language)
-        update_task_status("processing", 60, f"Speech converted to text (source: {source_language})", "speech_to_text")
-        
-        # Step 4: Translate text
-        update_task_status("processing", 70, "Translating text to Thai...", "translate")
-        translated_text = await translation_service.translate(transcript, target_language)
-        update_task_status("processing", 80, "Text translated successfully", "translate")
-        
-        # Step 5: Text to speech with dynamic speech rate (YouTube pipeline)
-        update_task_status("processing", 85, "Converting Thai text to speech...", "text_to_speech")
-        # Get speech rate info from task data if available  
-        task_data = tasks[task_id]
-        speech_rate_info = task_data.get('speech_rate_info')
-        thai_audio_path = await tts_service.text_to_speech(translated_text, task_id, speech_rate_info=speech_rate_info)
-        update_task_status("processing", 90, "Thai audio generated", "text_to_speech")
-        
-        # Step 6: Merge audio with video
-        update_task_status("processing", 95, "Merging audio with video...", "merge_video")
-        final_video_path = await video_service.merge_audio_video(
-            video_path, thai_audio_path, task_id
-        )
-        update_task_status("completed", 100, "Video processing completed!", "merge_video")
+        async with scheduler.stage("download"):
+            video_path = await youtube_service.download_video(str(youtube_url), task_id)
+        update_task_status(task_id, "processing", 20, "Video downloaded successfully", "download")
+        
+        # Steps 2-6 reuse cached artifacts from earlier identical jobs
+        final_video_path = await run_processing_steps(task_id, video_path, target_language)
         
         # Store final result with full URLs
-        tasks[task_id]["result_file"] = final_video_path
-        tasks[task_id]["download_url"] = f"/download/{task_id}"
+        task_repository.update(task_id, result_file=final_video_path, download_url=f"/download/{task_id}")
         
         # Generate video URL for web player
         if final_video_path and os.path.exists(final_video_path):
@@ -791,16 +932,19 @@ async def process_youtube_video_pipeline(
                     logger.error(f"Failed to copy video to static directory: {copy_error}")
             
             # Store web-accessible URLs
-            tasks[task_id]["video_url"] = f"/static/{static_filename}"
-            tasks[task_id]["video_download_url"] = f"/download/{task_id}/video"
+            task_repository.update(
+                task_id,
+                video_url=f"/static/{static_filename}",
+                video_download_url=f"/download/{task_id}/video"
+            )
         
+        # Mark completed last so watchers closing on completion see the result URLs
+        update_task_status(task_id, "completed", 100, "Video processing completed!", "merge_video")
         logger.info(f"Pipeline completed successfully for task {task_id}")
         
     except Exception as e:
         logger.error(f"Pipeline failed for task {task_id}: {str(e)}")
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["message"] = f"Processing failed: {str(e)}"
-        tasks[task_id]["error"] = str(e)
+        task_repository.update(task_id, status="failed", message=f"Processing failed: {str(e)}", error=str(e))
 
 async def process_uploaded_file_pipeline(
     task_id: str,
@@ -813,89 +957,130 @@ async def process_uploaded_file_pipeline(
     try:
         logger.info(f"Starting uploaded file pipeline for task {task_id}")
         
-        # Update task status
-        def update_task_status(status: str, progress: int, message: str, step: str = None):
-            tasks[task_id]["status"] = status
-            tasks[task_id]["progress"] = progress
-            tasks[task_id]["message"] = message
-            tasks[task_id]["updated_at"] = datetime.now().isoformat()
-            
-            if step:
-                tasks[task_id]["steps"][step]["status"] = "completed" if progress == 100 else "processing"
-                tasks[task_id]["steps"][step]["progress"] = progress
-        
         # Step 1: Use uploaded file directly (skip download)
-        update_task_status("processing", 20, "Processing uploaded video...", "download")
+        update_task_status(task_id, "processing", 20, "Processing uploaded video...", "download")
         video_path = file_path  # Use the uploaded file directly
-        update_task_status("processing", 20, "Video ready for processing", "download")
-        
-        # Step 2: Extract audio
-        update_task_status("processing", 30, "Extracting audio from video...", "extract_audio")
-        audio_path = await audio_service.extract_audio(video_path, task_id)
-        update_task_status("processing", 40, "Audio extracted successfully", "extract_audio")
-        
-        # Step 3: Speech to text (บังคับใช้ภาษาต้นฉบับ)
-        update_task_status("processing", 50, "Converting speech to text...", "speech_to_text")
-        source_language = tasks[task_id].get("source_language", "en")  # Default เป็นอังกฤษ
-        transcript = await audio_service.speech_to_text(audio_path, task_id, source_language)
-        update_task_status("processing", 60, f"Speech converted to text (source: {source_language})", "speech_to_text")
-        
-        # Step 4: Translate text
-        update_task_status("processing", 70, "Translating text to Thai...", "translate")
-        translated_text = await translation_service.translate(transcript, target_language)
-        update_task_status("processing", 80, "Text translated successfully", "translate")
-        
-        # Step 5: Text to speech with dynamic speech rate (Upload pipeline)
-        update_task_status("processing", 85, "Converting Thai text to speech...", "text_to_speech")
-        # Get speech rate info from task data if available  
-        task_data = tasks[task_id]
-        speech_rate_info = task_data.get('speech_rate_info')
-        thai_audio_path = await tts_service.text_to_speech(translated_text, task_id, speech_rate_info=speech_rate_info)
-        update_task_status("processing", 90, "Thai audio generated", "text_to_speech")
-        
-        # Step 6: Merge audio with video
-        update_task_status("processing", 95, "Merging audio with video...", "merge_video")
-        final_video_path = await video_service.merge_audio_video(
-            video_path, thai_audio_path, task_id
-        )
-        update_task_status("completed", 100, "Video processing completed!", "merge_video")
+        update_task_status(task_id, "processing", 20, "Video ready for processing", "download")
         
-        # Store final result
-        tasks[task_id]["result_file"] = final_video_path
-        tasks[task_id]["download_url"] = f"/download/{task_id}"
+        # Steps 2-6 reuse cached artifacts from earlier identical jobs
+        final_video_path = await run_processing_steps(task_id, video_path, target_language)
+        
+        # Store final result, then mark completed
+        task_repository.update(task_id, result_file=final_video_path, download_url=f"/download/{task_id}")
+        update_task_status(task_id, "completed", 100, "Video processing completed!", "merge_video")
         
         logger.info(f"Uploaded file pipeline completed successfully for task {task_id}")
         
     except Exception as e:
         logger.error(f"Uploaded file pipeline failed for task {task_id}: {str(e)}")
-        tasks[task_id]["status"] = "failed"
-        tasks[task_id]["message"] = f"Processing failed: {str(e)}"
-        tasks[task_id]["error"] = str(e)
+        task_repository.update(task_id, status="failed", message=f"Processing failed: {str(e)}", error=str(e))
 
-# WebSocket endpoint for real-time updates (optional)
-@app.websocket("/ws/{task_id}")
-async def websocket_endpoint(websocket, task_id: str):
+# Real-time updates: snapshot first, then only the fields that changed
+def parse_task_ids(task_ids: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated task IDs; None means all tasks"""
+    if not task_ids:
+        return None
+    return [task_id.strip() for task_id in task_ids.split(",") if task_id.strip()]
+
+async def iter_task_events(task_ids: Optional[List[str]], until_finished: bool = False) -> AsyncIterator[Optional[Dict[str, Any]]]:
     """
-    WebSocket endpoint for real-time task updates
+    Yield a snapshot per task, then diffs as the task repository publishes them.
+    None is yielded after EVENT_KEEPALIVE_INTERVAL idle seconds so callers can
+    send a keepalive (which also detects dead connections).
     """
+    with event_bus.subscribe(task_ids) as subscription:
+        # Subscribe before reading so no change slips in between
+        if task_ids:
+            initial = [await task_repository.get(task_id) for task_id in task_ids]
+        else:
+            initial = task_repository.list_active()
+        
+        remaining = set(task_ids or [])
+        for task in initial:
+            if task is None:
+                continue
+            yield {"type": "snapshot", "task_id": task["id"], "data": event_bus.prime(task["id"], task)}
+            if task.get("status") in TERMINAL_STATUSES:
+                remaining.discard(task["id"])
+        if task_ids:
+            # Unknown IDs are reported once and not waited for
+            for task_id, task in zip(task_ids, initial):
+                if task is None:
+                    remaining.discard(task_id)
+                    yield {"type": "deleted", "task_id": task_id, "data": None}
+        
+        while not (until_finished and not remaining):
+            while subscription.resync:
+                task_id = subscription.resync.pop()
+                task = await task_repository.get(task_id)
+                if task is not None:
+                    yield {"type": "snapshot", "task_id": task_id, "data": event_bus.prime(task_id, task)}
+            
+            event = await subscription.get(timeout=settings.EVENT_KEEPALIVE_INTERVAL)
+            yield event
+            if event is None:
+                continue
+            if event["type"] == "deleted" or (event["data"] or {}).get("status") in TERMINAL_STATUSES:
+                remaining.discard(event["task_id"])
+
+async def websocket_stream(websocket: WebSocket, task_ids: Optional[List[str]], until_finished: bool):
     await websocket.accept()
-    
     try:
-        while True:
-            if task_id in tasks:
-                task_data = tasks[task_id]
-                await websocket.send_json(task_data)
-                
-                # Close connection if task is completed or failed
-                if task_data["status"] in ["completed", "failed"]:
-                    break
-            
-            await asyncio.sleep(2)  # Update every 2 seconds
-            
+        async for event in iter_task_events(task_ids, until_finished):
+            await websocket.send_json(event or {"type": "keepalive"})
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
-        logger.error(f"WebSocket error for task {task_id}: {str(e)}")
+        logger.error(f"WebSocket error for {task_ids or 'all tasks'}: {str(e)}")
     finally:
-        await websocket.close()
+        try:
+            await websocket.close()
+        except Exception:
+            pass
+
+def sse_stream(request: Request, task_ids: Optional[List[str]], until_finished: bool) -> StreamingResponse:
+    async def stream():
+        async for event in iter_task_events(task_ids, until_finished):
+            if await request.is_disconnected():
+                break
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/ws")
+async def websocket_tasks_endpoint(websocket: WebSocket, task_ids: Optional[str] = None):
+    """
+    WebSocket channel for several tasks (comma-separated task_ids) or all tasks
+    """
+    await websocket_stream(websocket, parse_task_ids(task_ids), until_finished=False)
+
+@app.websocket("/ws/{task_id}")
+async def websocket_endpoint(websocket: WebSocket, task_id: str):
+    """
+    WebSocket endpoint for real-time task updates; closes once the task finishes
+    """
+    await websocket_stream(websocket, [task_id], until_finished=True)
+
+@app.get("/events")
+async def task_events(request: Request, task_ids: Optional[str] = None):
+    """
+    Server-Sent Events channel for several tasks (comma-separated task_ids) or all tasks
+    """
+    return sse_stream(request, parse_task_ids(task_ids), until_finished=False)
+
+@app.get("/events/{task_id}")
+async def task_events_for_task(request: Request, task_id: str):
+    """
+    Server-Sent Events stream for one task; ends once the task finishes
+    """
+    return sse_stream(request, [task_id], until_finished=True)
 
 if __name__ == "__main__":
     uvicorn.run(
@@ -0,0 +1,51 @@
+# backend/app/models/schemas.py
+from typing import Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict
+
+
+class ProcessRequest(BaseModel):
+    """Request to translate a YouTube video"""
+    youtube_url: str
+    target_language: str = "th"
+    source_language: Optional[str] = None
+    priority: int = 5  # lower value = processed sooner
+
+
+class FileTranslationRequest(BaseModel):
+    """Request to translate a previously uploaded video file"""
+    file_path: str
+    target_language: str = "th"
+    source_language: Optional[str] = None
+    priority: int = 5
+
+
+class ProcessResponse(BaseModel):
+    """Response returned when a task is accepted"""
+    task_id: str
+    status: str
+    message: str
+    queue_position: Optional[int] = None
+
+
+class ProcessStatus(BaseModel):
+    """Current state of a processing task"""
+    model_config = ConfigDict(extra="allow")
+
+    id: str
+    status: str
+    progress: int = 0
+    message: Optional[str] = None
+    youtube_url: Optional[str] = None
+    source_language: Optional[str] = None
+    target_language: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    completed_at: Optional[str] = None
+    steps: Optional[Dict[str, Dict[str, Any]]] = None
+    error: Optional[str] = None
+    result_file: Optional[str] = None
+    download_url: Optional[str] = None
+    video_url: Optional[str] = None
+    video_download_url: Optional[str] = None
+    queue_position: Optional[int] = None
+    estimated_time_remaining: Optional[int] = None
@@ -0,0 +1,290 @@
+# backend/app/services/artifact_cache.py
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.core.config import settings
+from app.services.media_store import media_store, link_or_copy
+
+logger = logging.getLogger(__name__)
+
+# Set by services when they return degraded output (fallback translation,
+# placeholder video, ...). Each pipeline runs in its own asyncio task, so the
+# flag sticks for the rest of that job: later stages built on the degraded
+# result are neither read from nor written to the cache.
+_uncacheable: ContextVar[bool] = ContextVar("artifact_uncacheable", default=False)
+
+
+def mark_uncacheable():
+    """
+    Flag the current job's results as fallbacks that must not be cached
+    """
+    _uncacheable.set(True)
+
+
+def stage_key(stage: str, *inputs: Any, **params: Any) -> str:
+    """
+    Hash of a stage name, its upstream keys and its parameters
+    """
+    payload = json.dumps([stage, inputs, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ArtifactCache:
+    """
+    Cache of intermediate pipeline outputs.
+
+    Every stage result (extracted WAV, transcript, translation, TTS audio,
+    final video) is stored under a key derived from the keys of its inputs
+    plus the stage parameters, so a repeat job only reruns the stages whose
+    inputs changed. File artifacts are handed to tasks by hard link and the
+    store is trimmed least-recently-used beyond ARTIFACT_CACHE_MAX_BYTES.
+    Access times from cache hits are only kept in memory and written with
+    the next store/eviction or every ARTIFACT_INDEX_FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or settings.ARTIFACT_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.ARTIFACT_CACHE_MAX_BYTES
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._digests: Dict[tuple, str] = {}
+        self._index_dirty = False
+        self._index_version = 0
+        self._written_version = 0
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+
+    def media_key(self, path: str) -> str:
+        """
+        Key for a source video: its media store key, else a content hash
+        """
+        key = media_store.key_for_path(path)
+        if key:
+            return key
+        stat = os.stat(path)
+        fingerprint = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if fingerprint not in self._digests:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                    hasher.update(chunk)
+            self._digests[fingerprint] = f"sha256_{hasher.hexdigest()}"
+        return self._digests[fingerprint]
+
+    async def file_stage(self, key: str, task_id: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """
+        Return a task-local path to the cached file for `key`, computing it on miss
+        """
+        if _uncacheable.get():
+            return await compute()
+
+        async with self._lock(key):
+            cached = self._fetch_file(key, task_id)
+            if cached:
+                return cached
+
+            path = await compute()
+            if not _uncacheable.get():
+                self._store_file(key, path, task_id)
+            return path
+
+    async def json_stage(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the cached JSON value for `key`, computing it on miss
+        """
+        if _uncacheable.get():
+            return await compute()
+
+        async with self._lock(key):
+            entry = self._hit(key)
+            if entry:
+                with open(entry["path"], "r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            value = await compute()
+            if not _uncacheable.get():
+                self._store_json(key, value)
+            return value
+
+    def start(self):
+        """
+        Start the background writer for batched access-time updates
+        """
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """
+        Stop the background writer and write any pending access times
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Write the index if cache hits changed it since the last write
+        """
+        if not self._index_dirty:
+            return
+        # Serialize on the loop so the index can't change mid-dump; write in a thread
+        payload = json.dumps(self._index)
+        self._index_version += 1
+        self._index_dirty = False
+        try:
+            await asyncio.to_thread(self._write_index, payload, self._index_version)
+        except OSError as e:
+            self._index_dirty = True
+            logger.error(f"Failed to write artifact index: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._index),
+            "bytes": sum(entry["size"] for entry in self._index.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _lock(self, key: str) -> asyncio.Lock:
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def _hit(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._index.get(key)
+        if entry and os.path.exists(entry["path"]):
+            # Written later in a batch; only eviction order depends on it
+            entry["last_used"] = time.time()
+            self._index_dirty = True
+            self.hits += 1
+            return entry
+        if entry:
+            del self._index[key]
+            self._save_index()
+        self.misses += 1
+        return None
+
+    def _fetch_file(self, key: str, task_id: str) -> Optional[str]:
+        entry = self._hit(key)
+        if entry is None:
+            return None
+        # Recreate the file under the name the producing service would have used
+        dest_path = os.path.join(entry["dir"], entry["name"].replace("{task_id}", task_id))
+        os.makedirs(entry["dir"], exist_ok=True)
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        link_or_copy(entry["path"], dest_path)
+        logger.info(f"Artifact cache hit {key[:12]} for task {task_id}: {dest_path}")
+        return dest_path
+
+    def _store_file(self, key: str, path: str, task_id: str):
+        if not path or not os.path.exists(path):
+            return
+        object_path = os.path.join(self.objects_dir, f"{key}{os.path.splitext(path)[1]}")
+        try:
+            if os.path.exists(object_path):
+                os.remove(object_path)
+            link_or_copy(path, object_path)
+        except OSError as e:
+            logger.error(f"Failed to cache artifact {path}: {str(e)}")
+            return
+        self._add_entry(key, object_path, {
+            "dir": os.path.dirname(path),
+            "name": os.path.basename(path).replace(task_id, "{task_id}")
+        })
+
+    def _store_json(self, key: str, value: Any):
+        object_path = os.path.join(self.objects_dir, f"{key}.json")
+        try:
+            with open(object_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+        except (OSError, TypeError) as e:
+            logger.error(f"Failed to cache artifact {key[:12]}: {str(e)}")
+            return
+        self._add_entry(key, object_path, {})
+
+    def _add_entry(self, key: str, object_path: str, extra: Dict[str, Any]):
+        now = time.time()
+        self._index[key] = {
+            "path": object_path,
+            "size": os.path.getsize(object_path),
+            "created_at": now,
+            "last_used": now,
+            **extra
+        }
+        self._evict()
+        self._save_index()
+
+    def _evict(self):
+        """
+        Drop least-recently-used artifacts beyond the size budget
+        """
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._index.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                pass
+            total -= entry["size"]
+            del self._index[key]
+            self._locks.pop(key, None)
+            logger.info(f"Evicted cached artifact {key[:12]}")
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Artifact index unreadable, starting empty: {str(e)}")
+            return {}
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(settings.ARTIFACT_INDEX_FLUSH_INTERVAL)
+            await self.flush()
+
+    def _save_index(self):
+        self._index_version += 1
+        self._write_index(json.dumps(self._index), self._index_version)
+        self._index_dirty = False
+
+    def _write_index(self, payload: str, version: int):
+        with self._write_lock:
+            # A background flush must not overwrite a newer synchronous save
+            if version < self._written_version:
+                return
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.index_path)
+            self._written_version = version
+
+
+# Shared cache used by the processing pipelines
+artifact_cache = ArtifactCache()
@@ -5,12 +5,21 @@ import subprocess
 import json
 import logging
 import tempfile
-import requests
-from typing import Dict, Any, List, Optional
+import re
+import wave
+import struct
+import bisect
+from typing import Dict, Any, List, Optional, Tuple
 from app.core.config import settings
+from app.core.http_client import http_clients
+from app.services.task_repository import task_repository
 
 logger = logging.getLogger(__name__)
 
+# Written without spaces between words: rates come from syllable counts
+NO_SPACE_LANGUAGES = {"th", "zh", "ja", "lo", "my", "km"}
+SYLLABLES_PER_WORD = 1.5
+
 class AudioService:
     """Service for audio processing and speech-to-text"""
     
@@ -79,124 +88,102 @@ class AudioService:
             if not os.path.exists(audio_path):
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
             
-            # Analyze audio for speech rate detection FIRST
-            speech_rate_info = await self._analyze_speech_rate(audio_path)
-            logger.info(f"Speech rate analysis: {speech_rate_info}")
+            # Speech regions drive both the rate estimate and what Whisper hears
+            speech_regions = await self._get_speech_regions(audio_path)
+            
+            # Call external Whisper service with explicit language (chunked for long audio)
+            logger.info(f"Sending to Whisper with FORCED language: {source_language}")
+            result = await self._transcribe(audio_path, task_id, source_language)
+            transcript = result.get('text', '')
+            detected_language = result.get('language', source_language)
             
+            # Analyze speech rate, per segment where Whisper gave timestamps
+            speech_rate_info = await self._analyze_speech_rate(
+                audio_path, speech_regions, result.get('segments'), detected_language
+            )
             # Store speech rate info for TTS adjustment
-            from app.main import tasks  # Import here to avoid circular import
-            if task_id in tasks:
-                tasks[task_id]["speech_rate_info"] = speech_rate_info
-            
-            # Call external Whisper service with explicit language
-            url = f"{self.whisper_service_url}/transcribe"
-            
-            with open(audio_path, 'rb') as audio_file:
-                files = {'file': audio_file}
-                data = {
-                    'language': source_language,  # บังคับภาษาต้นฉบับ
-                    'task': 'transcribe'  # ไม่ใช่ translate
-                }
-                
-                logger.info(f"Sending to Whisper with FORCED language: {source_language}")
-                response = requests.post(url, files=files, data=data)
-                
-                if response.status_code != 200:
-                    raise Exception(f"Whisper service error: {response.text}")
-                
-                result = response.json()
-                transcript = result.get('text', '')
-                detected_language = result.get('language', source_language)
-                
-                # Validate language enforcement
-                if detected_language != source_language:
-                    logger.warning(f"Language mismatch! Requested: {source_language}, Detected: {detected_language}")
-                    logger.warning("This may indicate the source language setting is incorrect")
-                
-                # บันทึกข้อมูลการถอดเสียง
-                transcript_data = {
-                    'text': transcript,
-                    'language': detected_language,
-                    'requested_language': source_language,
-                    'task_id': task_id,
-                    'segments': result.get('segments', [])
-                }
-                
-                # Save transcript to file
-                transcript_path = os.path.join(self.upload_dir, f"transcript_{task_id}.json")
-                with open(transcript_path, 'w', encoding='utf-8') as f:
-                    json.dump(transcript_data, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"Speech-to-text completed for task {task_id}. Detected: {detected_language}, Text length: {len(transcript)}")
-                
-                # ตรวจสอบว่าภาษาที่ตรวจพบตรงกับที่ต้องการหรือไม่
-                if detected_language != source_language:
-                    logger.warning(f"Language mismatch! Requested: {source_language}, Detected: {detected_language}")
-                
-                return transcript
-                
+            task_repository.update(task_id, speech_rate_info=speech_rate_info)
+            
+            # Validate language enforcement
+            if detected_language != source_language:
+                logger.warning(f"Language mismatch! Requested: {source_language}, Detected: {detected_language}")
+                logger.warning("This may indicate the source language setting is incorrect")
+            
+            # บันทึกข้อมูลการถอดเสียง
+            transcript_data = {
+                'text': transcript,
+                'language': detected_language,
+                'requested_language': source_language,
+                'task_id': task_id,
+                'segments': result.get('segments', [])
+            }
+            
+            # Save transcript to file
+            transcript_path = os.path.join(self.upload_dir, f"transcript_{task_id}.json")
+            with open(transcript_path, 'w', encoding='utf-8') as f:
+                json.dump(transcript_data, f, ensure_ascii=False, indent=2)
+            
+            logger.info(f"Speech-to-text completed for task {task_id}. Detected: {detected_language}, Text length: {len(transcript)}")
+            
+            # ตรวจสอบว่าภาษาที่ตรวจพบตรงกับที่ต้องการหรือไม่
+            if detected_language != source_language:
+                logger.warning(f"Language mismatch! Requested: {source_language}, Detected: {detected_language}")
+            
+            return transcript
+            
         except Exception as e:
             logger.error(f"Speech-to-text failed for task {task_id}: {str(e)}")
             raise Exception(f"Failed to convert speech to text: {str(e)}")
-    
-    async def _analyze_speech_rate(self, audio_path: str) -> dict:
+
+    def load_segments(self, task_id: str) -> List[Dict[str, Any]]:
+        """
+        Timed segments ({start, end, text}) saved by speech_to_text, empty when none were returned
+        """
+        transcript_path = os.path.join(self.upload_dir, f"transcript_{task_id}.json")
+        try:
+            with open(transcript_path, 'r', encoding='utf-8') as f:
+                segments = json.load(f).get('segments') or []
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read segments for task {task_id}: {str(e)}")
+            return []
+
+        return [
+            {
+                'start': round(float(segment['start']), 3),
+                'end': round(float(segment['end']), 3),
+                'text': segment.get('text', '').strip()
+            }
+            for segment in segments
+            if segment.get('text', '').strip() and float(segment['end']) > float(segment['start'])
+        ]
+
+    async def _analyze_speech_rate(
+        self,
+        audio_path: str,
+        speech_regions: Optional[Dict[str, Any]] = None,
+        segments: Optional[List[Dict[str, Any]]] = None,
+        language: Optional[str] = None
+    ) -> dict:
         """
         Analyze speech rate from audio file to determine optimal TTS speed
         Returns speed adjustment info for TTS
+        
+        Syllable nuclei (peaks in 300-2500 Hz band energy) are counted on the
+        WAV at its native rate, streamed from a memory map, so memory use is
+        flat for any length. With Whisper segments the rate is measured per
+        segment: words per minute from the text where words are
+        space-separated, otherwise from the syllables inside the segment.
         """
         try:
-            # Try to use librosa for audio analysis
-            try:
-                import librosa
-                import numpy as np
-                
-                # Load audio file
-                y, sr = librosa.load(audio_path, sr=22050)
-                duration = librosa.get_duration(y=y, sr=sr)
-                
-                # Detect voice activity using RMS energy
-                rms = librosa.feature.rms(y=y, frame_length=2048, hop_length=512)[0]
-                rms_threshold = np.percentile(rms, 30)  # 30th percentile as threshold
-                
-                # Count frames with voice activity
-                voice_frames = np.sum(rms > rms_threshold)
-                total_frames = len(rms)
-                voice_ratio = voice_frames / total_frames if total_frames > 0 else 0
-                
-                # Estimate speech segments
-                speech_duration = duration * voice_ratio
-                
-                # Calculate tempo using onset detection
-                tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
-                
-                # Estimate speaking rate (rough calculation)
-                if speech_duration > 0:
-                    # Estimate syllables based on tempo and duration
-                    estimated_syllables = (tempo * speech_duration) / 60 * 2  # rough estimation
-                    estimated_words = estimated_syllables / 2   # ~2 syllables per word average
-                    words_per_minute = (estimated_words / speech_duration) * 60 if speech_duration > 0 else 120
-                else:
-                    words_per_minute = 120  # default
-                
-                analysis_method = "librosa_advanced"
-                
-            except ImportError:
-                logger.warning("librosa not available, using basic audio analysis")
-                # Fallback to basic file analysis
-                import wave
-                
-                with wave.open(audio_path, 'rb') as wav_file:
-                    frames = wav_file.getnframes()
-                    sample_rate = wav_file.getframerate()
-                    duration = frames / float(sample_rate)
-                
-                # Basic estimation without advanced audio processing
-                voice_ratio = 0.7  # assume 70% of audio contains speech
-                speech_duration = duration * voice_ratio
-                words_per_minute = 120  # default WPM
-                tempo = 120
-                analysis_method = "basic_wave"
-                
+            measured = await asyncio.to_thread(self._measure_speech_rate, audio_path, speech_regions, segments, language)
+            duration = measured["duration"]
+            speech_duration = measured["speech_duration"]
+            voice_ratio = speech_duration / duration if duration > 0 else 0
+            words_per_minute = measured["words_per_minute"]
+            syllables_per_second = measured["syllables_per_second"]
+            segment_rates = measured["segment_rates"]
+            analysis_method = "streaming_segments" if segment_rates else "streaming_syllables"
+            
             # Determine TTS speed adjustment based on original speech rate
             if words_per_minute > 180:  # Very fast speech
                 tts_rate = 0.6  # Slow down significantly
@@ -222,7 +209,9 @@ class AudioService:
                 "voice_ratio": voice_ratio,
                 "speech_duration": speech_duration,
                 "estimated_wpm": words_per_minute,
-                "tempo": tempo if 'tempo' in locals() else 120,
+                "syllables_per_second": syllables_per_second,
+                "tempo": syllables_per_second * 60,  # syllables per minute
+                "segment_rates": segment_rates,
                 "tts_rate": tts_rate,
                 "speed_category": speed_category,
                 "analysis_method": analysis_method,
@@ -239,7 +228,9 @@ class AudioService:
                 "voice_ratio": 0.7,
                 "speech_duration": 0,
                 "estimated_wpm": 120,
+                "syllables_per_second": 0,
                 "tempo": 120,
+                "segment_rates": [],
                 "tts_rate": 0.85,  # Safe default
                 "speed_category": "unknown",
                 "analysis_method": "fallback",
@@ -258,45 +249,489 @@ class AudioService:
             if not os.path.exists(audio_path):
                 raise FileNotFoundError(f"Audio file not found: {audio_path}")
             
-            # Call external Whisper service with explicit language
-            url = f"{self.whisper_service_url}/transcribe"
-            
-            with open(audio_path, 'rb') as audio_file:
-                files = {'file': audio_file}
-                data = {
-                    'language': source_language,  # บังคับภาษาต้นฉบับ
-                    'task': 'transcribe',  # ไม่ใช่ translate
-                    'word_timestamps': True  # เพิ่ม timestamps ระดับคำ
-                }
-                response = requests.post(url, files=files, data=data)
-                
-                if response.status_code != 200:
-                    raise Exception(f"Whisper service error: {response.text}")
-                
-                result = response.json()
-                detected_language = result.get('language', source_language)
-                
-                # เพิ่มข้อมูลเพิ่มเติม
-                result['requested_language'] = source_language
-                result['task_id'] = task_id
-                
-                # Save transcript to file
-                transcript_path = os.path.join(self.upload_dir, f"transcript_{task_id}.json")
-                with open(transcript_path, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"Speech-to-text with timestamps completed for task {task_id}. Detected: {detected_language}")
-                
-                # ตรวจสอบความถูกต้องของภาษา
-                if detected_language != source_language:
-                    logger.warning(f"Language mismatch! Requested: {source_language}, Detected: {detected_language}")
-                
-                return result
-                
+            # Call external Whisper service with explicit language (chunked for long audio)
+            result = await self._transcribe(audio_path, task_id, source_language, word_timestamps=True)
+            detected_language = result.get('language', source_language)
+            
+            # เพิ่มข้อมูลเพิ่มเติม
+            result['requested_language'] = source_language
+            result['task_id'] = task_id
+            
+            # Save transcript to file
+            transcript_path = os.path.join(self.upload_dir, f"transcript_{task_id}.json")
+            with open(transcript_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            
+            logger.info(f"Speech-to-text with timestamps completed for task {task_id}. Detected: {detected_language}")
+            
+            # ตรวจสอบความถูกต้องของภาษา
+            if detected_language != source_language:
+                logger.warning(f"Language mismatch! Requested: {source_language}, Detected: {detected_language}")
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Speech-to-text with timestamps failed for task {task_id}: {str(e)}")
             raise Exception(f"Failed to convert speech to text with timestamps: {str(e)}")
     
+    async def _transcribe(self, audio_path: str, task_id: str, language: str, word_timestamps: bool = False) -> Dict[str, Any]:
+        """
+        Transcribe only the speech regions found by VAD, then put the
+        segment timestamps back on the original timeline
+        """
+        speech = await self._speech_only_audio(audio_path, task_id)
+        if speech is None:
+            return await self._transcribe_audio(audio_path, task_id, language, word_timestamps)
+        
+        speech_path, timeline = speech
+        try:
+            result = await self._transcribe_audio(speech_path, task_id, language, word_timestamps)
+        finally:
+            if os.path.exists(speech_path):
+                os.remove(speech_path)
+        return self._restore_timeline(result, timeline)
+    
+    async def _transcribe_audio(self, audio_path: str, task_id: str, language: str, word_timestamps: bool) -> Dict[str, Any]:
+        """
+        Transcribe in one request, or in parallel chunks when the audio is long
+        """
+        duration = await asyncio.to_thread(self._get_audio_duration, audio_path)
+        if duration > settings.STT_CHUNKED_MIN_SECONDS and duration > settings.STT_CHUNK_SECONDS:
+            return await self._transcribe_chunked(audio_path, task_id, language, word_timestamps)
+        return await self._post_transcribe(self.whisper_service_url, audio_path, language, word_timestamps)
+    
+    async def _post_transcribe(self, service_url: str, audio_path: str, language: str, word_timestamps: bool) -> Dict[str, Any]:
+        """
+        Send one file to a Whisper service over the shared pooled client
+        """
+        data = {
+            'language': language,  # บังคับภาษาต้นฉบับ
+            'task': 'transcribe'  # ไม่ใช่ translate
+        }
+        if word_timestamps:
+            data['word_timestamps'] = 'true'  # เพิ่ม timestamps ระดับคำ
+        
+        with open(audio_path, 'rb') as audio_file:
+            files = {'file': (os.path.basename(audio_path), audio_file, 'audio/wav')}
+            response = await http_clients.get("whisper", service_url).post("/transcribe", files=files, data=data)
+        
+        if response.status_code != 200:
+            raise Exception(f"Whisper service error: {response.text}")
+        return response.json()
+    
+    async def _transcribe_chunked(self, audio_path: str, task_id: str, language: str, word_timestamps: bool) -> Dict[str, Any]:
+        """
+        Split on silence, transcribe chunks concurrently across the Whisper
+        service pool and stitch the segments back onto one timeline
+        """
+        chunks = await self.split_audio_for_processing(audio_path, task_id, settings.STT_CHUNK_SECONDS)
+        total = len(chunks)
+        service_urls = [
+            url.strip() for url in (settings.WHISPER_SERVICE_URLS or self.whisper_service_url).split(",") if url.strip()
+        ]
+        logger.info(f"Transcribing {total} chunks for task {task_id} on {len(service_urls)} Whisper service(s)")
+        
+        # One slot per in-flight request; a chunk takes whichever service frees up first
+        slots: asyncio.Queue = asyncio.Queue()
+        for _ in range(max(1, settings.STT_CHUNK_CONCURRENCY)):
+            for url in service_urls:
+                slots.put_nowait(url)
+        
+        completed = 0
+        
+        async def transcribe_chunk(chunk: Dict[str, Any]) -> Dict[str, Any]:
+            nonlocal completed
+            url = await slots.get()
+            try:
+                result = await self._post_transcribe(url, chunk["path"], language, word_timestamps)
+            finally:
+                slots.put_nowait(url)
+            completed += 1
+            self._report_chunk_progress(task_id, completed, total)
+            return result
+        
+        try:
+            results = await asyncio.gather(*(transcribe_chunk(chunk) for chunk in chunks))
+        finally:
+            for chunk in chunks:
+                if chunk["path"] != audio_path and os.path.exists(chunk["path"]):
+                    os.remove(chunk["path"])
+        
+        segments = self._stitch_segments(chunks, results)
+        languages = [result.get('language') for result in results if result.get('language')]
+        return {
+            "text": " ".join(segment["text"].strip() for segment in segments).strip(),
+            "language": max(set(languages), key=languages.count) if languages else language,
+            "segments": segments,
+            "chunks": total
+        }
+    
+    def _stitch_segments(self, chunks: List[Dict[str, Any]], results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Shift chunk-relative segments onto the full timeline. Where chunks
+        overlap, each segment is kept only by the chunk whose own range
+        contains its midpoint; repeated text at the seam is dropped.
+        """
+        stitched: List[Dict[str, Any]] = []
+        for chunk, result in zip(chunks, results):
+            offset = chunk["start"]
+            for segment in result.get("segments", []):
+                start = segment.get("start", 0.0) + offset
+                end = segment.get("end", 0.0) + offset
+                midpoint = (start + end) / 2
+                if not chunk["keep_start"] <= midpoint < chunk["keep_end"]:
+                    continue
+                
+                text = segment.get("text", "").strip()
+                if stitched and text and text == stitched[-1]["text"].strip() and start < stitched[-1]["end"] + settings.STT_CHUNK_OVERLAP:
+                    continue
+                
+                shifted = {**segment, "id": len(stitched), "start": start, "end": end}
+                if segment.get("words"):
+                    shifted["words"] = [
+                        {**word, "start": word.get("start", 0.0) + offset, "end": word.get("end", 0.0) + offset}
+                        for word in segment["words"]
+                    ]
+                stitched.append(shifted)
+        return stitched
+    
+    def _report_chunk_progress(self, task_id: str, completed: int, total: int):
+        """
+        Per-chunk progress within the speech_to_text step (overall 50-60%)
+        """
+        task = task_repository.get_cached(task_id)
+        if task is None:
+            return
+        step = task.get("steps", {}).get("speech_to_text")
+        if step is not None:
+            step["progress"] = int(completed * 100 / total)
+        task_repository.update(
+            task_id,
+            progress=50 + int(completed * 10 / total),
+            message=f"Transcribed audio chunk {completed}/{total}",
+            stt_chunks={"completed": completed, "total": total}
+        )
+    
+    def _measure_speech_rate(
+        self,
+        audio_path: str,
+        speech_regions: Optional[Dict[str, Any]],
+        segments: Optional[List[Dict[str, Any]]],
+        language: Optional[str]
+    ) -> Dict[str, Any]:
+        import numpy as np
+        
+        db, frame_seconds, duration = self._frame_energy_db(audio_path, 20, band=(300.0, 2500.0))
+        if len(db) == 0:
+            raise ValueError("Audio is empty")
+        
+        # Frames inside speech; without a VAD map (VAD disabled) run it uncached
+        if speech_regions is None:
+            speech_regions = self._compute_speech_regions(audio_path)
+        speech = np.zeros(len(db), dtype=bool)
+        for start, end in speech_regions["regions"]:
+            speech[int(start / frame_seconds):int(np.ceil(end / frame_seconds))] = True
+        speech_duration = float(speech.sum()) * frame_seconds
+        
+        syllables = self._syllable_nuclei(db, speech) * frame_seconds
+        syllables_per_second = len(syllables) / speech_duration if speech_duration > 0 else 0.0
+        
+        # Per-segment rates from Whisper timestamps
+        spaced = (language or "").split("-")[0].lower() not in NO_SPACE_LANGUAGES
+        segment_rates = []
+        total_words = 0
+        total_seconds = 0.0
+        for segment in segments or []:
+            start, end = float(segment.get("start", 0.0)), float(segment.get("end", 0.0))
+            if end - start < 0.5:
+                continue
+            if spaced:
+                words = len(segment.get("text", "").split())
+            else:
+                count = int(np.searchsorted(syllables, end) - np.searchsorted(syllables, start))
+                words = count / SYLLABLES_PER_WORD
+            total_words += words
+            total_seconds += end - start
+            segment_rates.append([round(start, 2), round(end, 2), round(words / (end - start) * 60, 1)])
+        
+        if total_seconds > 0:
+            words_per_minute = total_words / total_seconds * 60
+        elif syllables_per_second > 0:
+            words_per_minute = syllables_per_second * 60 / SYLLABLES_PER_WORD
+        else:
+            words_per_minute = 120  # default
+        
+        return {
+            "duration": duration,
+            "speech_duration": speech_duration,
+            "words_per_minute": float(words_per_minute),
+            "syllables_per_second": round(syllables_per_second, 2),
+            "segment_rates": segment_rates
+        }
+    
+    def _syllable_nuclei(self, db, speech):
+        """
+        Frame indices of syllable nuclei: local maxima of smoothed band
+        energy inside speech and above its median, where the energy dips by
+        at least 2 dB between neighbouring peaks
+        """
+        import numpy as np
+        
+        smoothed = np.convolve(db, np.ones(3) / 3, mode='same')
+        if not speech.any() or len(smoothed) < 3:
+            return np.zeros(0)
+        floor = float(np.median(smoothed[speech]))
+        
+        is_peak = (smoothed[1:-1] > smoothed[:-2]) & (smoothed[1:-1] >= smoothed[2:])
+        candidates = np.flatnonzero(is_peak) + 1
+        candidates = candidates[speech[candidates] & (smoothed[candidates] > floor)]
+        
+        kept: List[int] = []
+        for index in candidates:
+            if kept:
+                previous = kept[-1]
+                dip = float(smoothed[previous:index + 1].min())
+                if min(smoothed[previous], smoothed[index]) - dip < 2.0:
+                    # Same nucleus; keep the louder peak
+                    if smoothed[index] > smoothed[previous]:
+                        kept[-1] = index
+                    continue
+            kept.append(index)
+        return np.asarray(kept, dtype=float)
+    
+    def _frame_energy_db(self, audio_path: str, frame_ms: int, band: Optional[Tuple[float, float]] = None):
+        """
+        Energy in dB of consecutive frame_ms frames of a 16-bit PCM WAV,
+        optionally restricted to a frequency band. The file is read through
+        a memory map ten seconds at a time, at its own sample rate.
+        Returns (db per frame, frame length in seconds, duration).
+        """
+        import numpy as np
+        
+        offset, total_frames, sample_rate, channels = self._wav_layout(audio_path)
+        duration = total_frames / float(sample_rate)
+        frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        usable = total_frames // frame_len * frame_len
+        if usable == 0:
+            return np.zeros(0), frame_len / float(sample_rate), duration
+        
+        pcm = np.memmap(audio_path, dtype='<i2', mode='r', offset=offset, shape=(total_frames, channels))
+        block = frame_len * max(1, (sample_rate * 10) // frame_len)
+        if band is not None:
+            window = np.hanning(frame_len).astype(np.float32)
+            freqs = np.fft.rfftfreq(frame_len, 1.0 / sample_rate)
+            in_band = (freqs >= band[0]) & (freqs <= band[1])
+        
+        energies = []
+        for start in range(0, usable, block):
+            chunk = pcm[start:min(start + block, usable)]
+            samples = chunk[:, 0] if channels == 1 else chunk.mean(axis=1)
+            frames = samples.astype(np.float32).reshape(-1, frame_len) / 32768.0
+            if band is None:
+                energies.append(np.mean(frames ** 2, axis=1))
+            else:
+                spectrum = np.abs(np.fft.rfft(frames * window, axis=1)) ** 2
+                energies.append(spectrum[:, in_band].sum(axis=1) / (frame_len * frame_len))
+        del pcm
+        
+        db = 10 * np.log10(np.concatenate(energies) + 1e-10)
+        return db, frame_len / float(sample_rate), duration
+    
+    def _wav_layout(self, audio_path: str) -> Tuple[int, int, int, int]:
+        """
+        (data offset, sample frames, sample rate, channels) of a 16-bit PCM WAV
+        """
+        file_size = os.path.getsize(audio_path)
+        with open(audio_path, 'rb') as f:
+            header = f.read(12)
+            if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                raise ValueError(f"Not a WAV file: {audio_path}")
+            fmt = None
+            while True:
+                chunk = f.read(8)
+                if len(chunk) < 8:
+                    raise ValueError(f"No audio data in {audio_path}")
+                chunk_id, size = chunk[:4], struct.unpack('<I', chunk[4:])[0]
+                if chunk_id == b'fmt ':
+                    fmt = struct.unpack('<HHIIHH', f.read(16))
+                    f.seek(size - 16 + size % 2, 1)
+                elif chunk_id == b'data':
+                    if fmt is None or fmt[0] not in (1, 0xFFFE) or fmt[5] != 16:
+                        raise ValueError(f"Expected 16-bit PCM WAV: {audio_path}")
+                    offset = f.tell()
+                    # ffmpeg writing to a pipe leaves the data size unset
+                    data_size = size if 0 < size <= file_size - offset else file_size - offset
+                    channels = fmt[1]
+                    return offset, data_size // (2 * channels), fmt[2], channels
+                else:
+                    f.seek(size + size % 2, 1)
+    
+    def vad_params(self) -> Dict[str, Any]:
+        """
+        Settings that determine the speech regions
+        """
+        return {
+            "frame_ms": settings.VAD_FRAME_MS,
+            "margin_db": settings.VAD_MARGIN_DB,
+            "min_speech": settings.VAD_MIN_SPEECH,
+            "min_silence": settings.VAD_MIN_SILENCE,
+            "padding": settings.VAD_PADDING
+        }
+    
+    async def detect_speech_regions(self, audio_path: str) -> Dict[str, Any]:
+        """
+        Speech regions of a PCM WAV: {"duration": seconds, "regions": [[start, end], ...]}.
+        Computed once and cached next to the WAV as <name>.vad.json.
+        """
+        vad_path = f"{os.path.splitext(audio_path)[0]}.vad.json"
+        stat = os.stat(audio_path)
+        params = self.vad_params()
+        
+        if os.path.exists(vad_path):
+            try:
+                with open(vad_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns and cached.get("params") == params:
+                    return cached
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable VAD map {vad_path}: {str(e)}")
+        
+        vad = await asyncio.to_thread(self._compute_speech_regions, audio_path)
+        vad.update({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "params": params})
+        with open(vad_path, 'w', encoding='utf-8') as f:
+            json.dump(vad, f)
+        
+        speech_seconds = self._speech_seconds(vad)
+        logger.info(f"VAD: {len(vad['regions'])} speech regions, {speech_seconds:.1f}s of {vad['duration']:.1f}s")
+        return vad
+    
+    async def _get_speech_regions(self, audio_path: str) -> Optional[Dict[str, Any]]:
+        """
+        VAD result, or None when VAD is disabled or fails (callers then use the whole file)
+        """
+        if not settings.VAD_ENABLED:
+            return None
+        try:
+            return await self.detect_speech_regions(audio_path)
+        except Exception as e:
+            logger.error(f"Voice activity detection failed for {audio_path}: {str(e)}")
+            return None
+    
+    def _compute_speech_regions(self, audio_path: str) -> Dict[str, Any]:
+        """
+        Energy-based VAD: frames more than VAD_MARGIN_DB above the noise floor
+        (10th percentile of frame energy) count as speech. Short pauses are
+        bridged, short bursts dropped and regions padded on both sides.
+        """
+        import numpy as np
+        
+        db, frame_seconds, duration = self._frame_energy_db(audio_path, settings.VAD_FRAME_MS)
+        if len(db) == 0:
+            return {"duration": duration, "regions": []}
+        
+        threshold = max(float(np.percentile(db, 10)) + settings.VAD_MARGIN_DB, -60.0)
+        speech = np.concatenate(([False], db > threshold, [False]))
+        edges = np.flatnonzero(np.diff(speech.astype(np.int8)))
+        
+        # Bridge pauses shorter than VAD_MIN_SILENCE
+        runs: List[List[float]] = []
+        for start, end in zip(edges[0::2] * frame_seconds, edges[1::2] * frame_seconds):
+            if runs and start - runs[-1][1] < settings.VAD_MIN_SILENCE:
+                runs[-1][1] = end
+            else:
+                runs.append([start, end])
+        
+        # Drop blips, pad, merge whatever the padding made overlap
+        regions: List[List[float]] = []
+        for start, end in runs:
+            if end - start < settings.VAD_MIN_SPEECH:
+                continue
+            start = max(0.0, start - settings.VAD_PADDING)
+            end = min(duration, end + settings.VAD_PADDING)
+            if regions and start <= regions[-1][1]:
+                regions[-1][1] = end
+            else:
+                regions.append([start, end])
+        
+        return {
+            "duration": duration,
+            "regions": [[round(float(start), 3), round(float(end), 3)] for start, end in regions]
+        }
+    
+    def _speech_seconds(self, speech_regions: Dict[str, Any]) -> float:
+        return sum(end - start for start, end in speech_regions["regions"])
+    
+    async def _speech_only_audio(self, audio_path: str, task_id: str) -> Optional[Tuple[str, List[Tuple[float, float, float]]]]:
+        """
+        Write the speech regions back to back into one WAV.
+        Returns (path, timeline) or None if the whole file should be sent.
+        The timeline holds (start in the new file, original start, original end).
+        """
+        vad = await self._get_speech_regions(audio_path)
+        if vad is None or not vad["regions"] or vad["duration"] <= 0:
+            return None
+        speech_seconds = self._speech_seconds(vad)
+        if speech_seconds / vad["duration"] > settings.VAD_MAX_SPEECH_RATIO:
+            return None
+        
+        speech_path = os.path.join(self.upload_dir, f"speech_{task_id}.wav")
+        try:
+            timeline = await asyncio.to_thread(self._write_regions, audio_path, speech_path, vad["regions"])
+        except Exception as e:
+            logger.error(f"Failed to write speech-only audio for task {task_id}: {str(e)}")
+            return None
+        
+        logger.info(f"Sending {speech_seconds:.1f}s of speech to Whisper instead of {vad['duration']:.1f}s for task {task_id}")
+        return speech_path, timeline
+    
+    def _write_regions(self, audio_path: str, output_path: str, regions: List[List[float]]) -> List[Tuple[float, float, float]]:
+        timeline = []
+        with wave.open(audio_path, 'rb') as source, wave.open(output_path, 'wb') as target:
+            sample_rate = source.getframerate()
+            target.setparams(source.getparams())
+            written = 0
+            for start, end in regions:
+                first = int(start * sample_rate)
+                count = int(end * sample_rate) - first
+                source.setpos(first)
+                timeline.append((written / float(sample_rate), first / float(sample_rate), (first + count) / float(sample_rate)))
+                while count > 0:
+                    data = source.readframes(min(count, sample_rate * 10))
+                    if not data:
+                        break
+                    target.writeframes(data)
+                    frames = len(data) // (source.getsampwidth() * source.getnchannels())
+                    count -= frames
+                    written += frames
+        return timeline
+    
+    def _restore_timeline(self, result: Dict[str, Any], timeline: List[Tuple[float, float, float]]) -> Dict[str, Any]:
+        """
+        Map segment and word times from the speech-only file back to the original audio
+        """
+        starts = [entry[0] for entry in timeline]
+        
+        def to_original(t: float, is_end: bool = False) -> float:
+            # An end time on a region boundary belongs to the region before it
+            index = (bisect.bisect_left(starts, t) if is_end else bisect.bisect_right(starts, t)) - 1
+            speech_start, original_start, original_end = timeline[max(0, index)]
+            return round(min(original_start + max(0.0, t - speech_start), original_end), 3)
+        
+        segments = []
+        for segment in result.get("segments", []):
+            restored = {
+                **segment,
+                "start": to_original(segment.get("start", 0.0)),
+                "end": to_original(segment.get("end", 0.0), is_end=True)
+            }
+            if segment.get("words"):
+                restored["words"] = [
+                    {**word, "start": to_original(word.get("start", 0.0)), "end": to_original(word.get("end", 0.0), is_end=True)}
+                    for word in segment["words"]
+                ]
+            segments.append(restored)
+        return {**result, "segments": segments}
+    
     def _get_audio_duration(self, audio_path: str) -> float:
         """
         Get audio duration using FFprobe
@@ -372,30 +807,39 @@ class AudioService:
             # Return original file if enhancement fails
             return audio_path
     
-    async def split_audio_for_processing(self, audio_path: str, task_id: str, chunk_duration: int = 300) -> List[str]:
+    async def split_audio_for_processing(self, audio_path: str, task_id: str, chunk_duration: int = 300) -> List[Dict[str, Any]]:
         """
-        Split long audio files into smaller chunks for processing
+        Split long audio files into smaller chunks for processing.
+        Cuts are placed in silences where possible; a cut that has to fall
+        mid-speech gets STT_CHUNK_OVERLAP seconds of overlap on both sides.
+        Each chunk: path, start/end (audio range) and keep_start/keep_end
+        (the part of the timeline this chunk is responsible for).
         """
         try:
-            duration = self._get_audio_duration(audio_path)
+            duration = await asyncio.to_thread(self._get_audio_duration, audio_path)
             
             if duration <= chunk_duration:
-                return [audio_path]
+                return [{"path": audio_path, "start": 0.0, "end": duration, "keep_start": 0.0, "keep_end": duration}]
             
             logger.info(f"Splitting audio into chunks for task {task_id}")
             
-            chunks = []
-            chunk_count = int(duration // chunk_duration) + 1
+            silences = await self._detect_silences(audio_path)
+            boundaries, hard_cuts = self._plan_chunk_boundaries(duration, silences, chunk_duration)
+            overlap = settings.STT_CHUNK_OVERLAP
             
-            for i in range(chunk_count):
-                start_time = i * chunk_duration
+            chunks = []
+            for i in range(len(boundaries) - 1):
+                keep_start, keep_end = boundaries[i], boundaries[i + 1]
+                start = keep_start - overlap if i > 0 and hard_cuts[i - 1] else keep_start
+                end = keep_end + overlap if i < len(hard_cuts) and hard_cuts[i] else keep_end
+                start, end = max(0.0, start), min(duration, end)
                 chunk_path = os.path.join(self.upload_dir, f"chunk_{task_id}_{i}.wav")
                 
                 cmd = [
                     'ffmpeg',
+                    '-ss', f"{start:.3f}",
+                    '-t', f"{end - start:.3f}",
                     '-i', audio_path,
-                    '-ss', str(start_time),
-                    '-t', str(chunk_duration),
                     '-c', 'copy',
                     '-y',
                     chunk_path
@@ -409,14 +853,69 @@ class AudioService:
                 
                 await process.communicate()
                 
-                if process.returncode == 0 and os.path.exists(chunk_path):
-                    chunks.append(chunk_path)
-            
+                if process.returncode != 0 or not os.path.exists(chunk_path):
+                    raise Exception(f"Failed to cut chunk {i} ({start:.1f}-{end:.1f}s)")
+                chunks.append({
+                    "path": chunk_path,
+                    "start": start,
+                    "end": end,
+                    "keep_start": keep_start,
+                    "keep_end": keep_end if i < len(boundaries) - 2 else float("inf")
+                })
+            
+            logger.info(f"Split audio into {len(chunks)} chunks ({sum(hard_cuts)} cut mid-speech)")
             return chunks
             
         except Exception as e:
             logger.error(f"Audio splitting failed: {str(e)}")
-            return [audio_path]
+            return [{"path": audio_path, "start": 0.0, "end": 0.0, "keep_start": 0.0, "keep_end": float("inf")}]
+    
+    async def _detect_silences(self, audio_path: str) -> List[float]:
+        """
+        Midpoints of silent stretches, from FFmpeg's silencedetect filter
+        """
+        cmd = [
+            'ffmpeg',
+            '-i', audio_path,
+            '-af', f"silencedetect=noise={settings.STT_SILENCE_THRESHOLD}:d={settings.STT_SILENCE_MIN_DURATION}",
+            '-f', 'null',
+            '-'
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        
+        midpoints = []
+        silence_start = None
+        for line in stderr.decode(errors="ignore").splitlines():
+            match = re.search(r"silence_start: (-?[\d.]+)", line)
+            if match:
+                silence_start = max(0.0, float(match.group(1)))
+                continue
+            match = re.search(r"silence_end: ([\d.]+)", line)
+            if match and silence_start is not None:
+                midpoints.append((silence_start + float(match.group(1))) / 2)
+                silence_start = None
+        return midpoints
+    
+    def _plan_chunk_boundaries(self, duration: float, silences: List[float], chunk_duration: float):
+        """
+        Cut points at most chunk_duration apart, preferring the latest silence
+        in the last 20% of each chunk; returns (boundaries, hard_cut flags)
+        """
+        boundaries = [0.0]
+        hard_cuts = []
+        window = chunk_duration * 0.2
+        while duration - boundaries[-1] > chunk_duration:
+            target = boundaries[-1] + chunk_duration
+            candidates = [mid for mid in silences if target - window <= mid <= target]
+            boundaries.append(max(candidates) if candidates else target)
+            hard_cuts.append(not candidates)
+        boundaries.append(duration)
+        return boundaries, hard_cuts
     
     async def cleanup_audio_files(self, task_id: str):
         """
@@ -425,6 +924,8 @@ class AudioService:
         try:
             files_to_clean = [
                 f"audio_{task_id}.wav",
+                f"audio_{task_id}.vad.json",
+                f"speech_{task_id}.wav",
                 f"enhanced_audio_{task_id}.wav",
                 f"transcript_{task_id}.json"
             ]
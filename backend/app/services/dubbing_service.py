@@ -0,0 +1,273 @@
+# backend/app/services/dubbing_service.py
+import os
+import asyncio
+import logging
+import struct
+from typing import Optional, Dict, Any, List
+import numpy as np
+from app.core.config import settings
+from app.services.artifact_cache import mark_uncacheable
+from app.services.tts_service import TTSService, AUDIO_ENHANCE_FILTER
+
+logger = logging.getLogger(__name__)
+
+# Track layout; matches what TTSService._optimize_audio_for_video produces
+DUB_SAMPLE_RATE = 44100
+DUB_CHANNELS = 2
+WAV_HEADER_SIZE = 44
+
+class DubbingService:
+    """
+    Segment-aligned dubbing.
+
+    Keeps Whisper's segment timing through the pipeline: every translated
+    segment is synthesized on its own and placed at the segment's start on
+    a silent track as long as the source audio. Only clips longer than
+    their slot (up to the next segment's start) are sped up, capped at
+    DUBBING_MAX_TEMPO. The same timing is written out as the SRT.
+
+    Clips arrive as raw PCM in the track layout, so ffmpeg only runs for
+    clips that need stretching and once over the finished track for the
+    same enhancement the optimize pass applies to untimed speech.
+    """
+
+    def __init__(self, tts_service: TTSService):
+        self.tts_service = tts_service
+        self.upload_dir = settings.UPLOAD_DIR
+        self.output_dir = settings.OUTPUT_DIR
+
+        # Ensure directories exist
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    async def create_dub_track(
+        self,
+        segments: List[Dict[str, Any]],
+        translations: List[str],
+        task_id: str,
+        duration: float,
+        language: str = "th",
+        voice_type: str = "female",
+        speech_rate_info: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Synthesize each translated segment and mix it in at its start time.
+        Segments are synthesized TTS_CHUNK_CONCURRENCY at a time; mixing is
+        additive, so completion order does not matter. A segment that still
+        fails after retries is logged and its slot left silent.
+        """
+        mix_path = os.path.join(self.upload_dir, f"dub_mix_{task_id}.wav")
+        track_path = os.path.join(self.upload_dir, f"dub_audio_{task_id}.wav")
+        try:
+            logger.info(f"Starting timed dubbing for task {task_id}: {len(segments)} segments, {duration:.1f}s")
+
+            track_end = max([duration] + [segment['end'] for segment in segments])
+            total_frames = int(round(track_end * DUB_SAMPLE_RATE))
+            await asyncio.to_thread(self._create_silent_track, mix_path, total_frames)
+
+            semaphore = asyncio.Semaphore(max(1, settings.TTS_CHUNK_CONCURRENCY))
+            mix_lock = asyncio.Lock()
+            total = len(segments)
+            completed = 0
+            stretched = 0
+            failed_segments = []
+
+            async def dub_segment(index: int, segment: Dict[str, Any], text: str):
+                nonlocal completed, stretched
+                async with semaphore:
+                    clip_path = None
+                    try:
+                        clip_path = await self.tts_service.synthesize_segment(
+                            text, f"{task_id}_seg_{index:04d}", language=language,
+                            voice_type=voice_type, speech_rate_info=speech_rate_info
+                        )
+                        if clip_path:
+                            slot = self._slot_seconds(segments, index, track_end)
+                            pcm = await asyncio.to_thread(self._read_clip, clip_path)
+                            clip_seconds = len(pcm) / (DUB_SAMPLE_RATE * DUB_CHANNELS * 2)
+
+                            # Speed up only the clips that would run into the next segment
+                            if slot > 0 and clip_seconds > slot:
+                                tempo = min(clip_seconds / slot, settings.DUBBING_MAX_TEMPO)
+                                pcm = await self._stretch_clip(clip_path, tempo)
+                                stretched += 1
+                                logger.debug(f"Segment {index}: {clip_seconds:.2f}s clip in {slot:.2f}s slot, tempo {tempo:.2f}")
+
+                            # Neighbouring clips can overlap, so mixes are serialized
+                            async with mix_lock:
+                                await asyncio.to_thread(self._mix_clip, mix_path, total_frames, segment['start'], pcm)
+                    except Exception as e:
+                        logger.warning(f"Segment {index + 1}/{total} of task {task_id} failed, leaving it silent: {str(e)}")
+                        failed_segments.append(index + 1)
+                    finally:
+                        if clip_path and os.path.exists(clip_path):
+                            os.remove(clip_path)
+
+                completed += 1
+                self.tts_service.report_chunk_progress(task_id, completed, total)
+
+            tasks = [
+                asyncio.create_task(dub_segment(index, segment, text))
+                for index, (segment, text) in enumerate(zip(segments, translations))
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await self.tts_service.cleanup_tts_files(task_id)
+                raise
+
+            if total and len(failed_segments) == total:
+                await self.tts_service.cleanup_tts_files(task_id)
+                raise Exception(f"All {total} segments failed to synthesize")
+            if failed_segments:
+                # Segments ran in child tasks, so flag this job from here
+                mark_uncacheable()
+                logger.warning(f"{len(failed_segments)} of {total} segments left silent: {sorted(failed_segments)}")
+
+            await self._enhance_track(mix_path, track_path)
+            logger.info(f"Timed dubbing completed for task {task_id}: {stretched} of {len(segments)} clips sped up")
+            return track_path
+
+        except Exception as e:
+            logger.error(f"Timed dubbing failed for task {task_id}: {str(e)}")
+            raise Exception(f"Failed to create dubbed audio: {str(e)}")
+
+        finally:
+            # The full-length mix is only an intermediate
+            if os.path.exists(mix_path):
+                os.remove(mix_path)
+
+    def write_srt(self, segments: List[Dict[str, Any]], texts: List[str], task_id: str) -> str:
+        """
+        Write output/subtitle_{task_id}.srt from the segment timings
+        """
+        srt_path = os.path.join(self.output_dir, f"subtitle_{task_id}.srt")
+
+        entries = []
+        for segment, text in zip(segments, texts):
+            text = (text or "").strip()
+            if not text:
+                continue
+            entries.append(
+                f"{len(entries) + 1}\n"
+                f"{self._srt_time(segment['start'])} --> {self._srt_time(segment['end'])}\n"
+                f"{text}\n"
+            )
+
+        with open(srt_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(entries))
+
+        logger.info(f"Wrote {len(entries)} subtitles to {srt_path}")
+        return srt_path
+
+    def _slot_seconds(self, segments: List[Dict[str, Any]], index: int, track_end: float) -> float:
+        """
+        Time a clip may take: up to the next segment's start, never less than its own segment
+        """
+        segment = segments[index]
+        next_start = segments[index + 1]['start'] if index + 1 < len(segments) else track_end
+        return max(next_start, segment['end']) - segment['start']
+
+    def _read_clip(self, clip_path: str) -> bytes:
+        with open(clip_path, 'rb') as f:
+            return f.read()
+
+    async def _stretch_clip(self, clip_path: str, tempo: float) -> bytes:
+        """
+        Speed up a raw PCM clip, keeping the track layout
+        """
+        # atempo accepts at most 2.0 per instance, so chain it for larger factors
+        filters = []
+        while tempo > 2.0:
+            filters.append("atempo=2.0")
+            tempo /= 2.0
+        filters.append(f"atempo={tempo:.4f}")
+
+        pcm_format = ['-f', 's16le', '-ar', str(DUB_SAMPLE_RATE), '-ac', str(DUB_CHANNELS)]
+        cmd = ['ffmpeg', '-v', 'error', *pcm_format, '-i', clip_path, '-af', ','.join(filters),
+               *pcm_format, '-acodec', 'pcm_s16le', '-']
+
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+
+        stdout, stderr = await process.communicate()
+
+        if process.returncode != 0:
+            raise Exception(f"Failed to stretch clip {clip_path}: {stderr.decode()}")
+
+        return stdout
+
+    async def _enhance_track(self, mix_path: str, track_path: str):
+        """
+        Apply the TTS enhancement filter once to the mixed track
+        """
+        cmd = [
+            'ffmpeg', '-v', 'error', '-i', mix_path,
+            '-af', AUDIO_ENHANCE_FILTER,
+            '-acodec', 'pcm_s16le', '-ar', str(DUB_SAMPLE_RATE), '-ac', str(DUB_CHANNELS),
+            '-y', track_path
+        ]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            if os.path.exists(track_path):
+                os.remove(track_path)
+            raise Exception(f"Failed to enhance dub track: {stderr.decode()}")
+
+    def _create_silent_track(self, path: str, total_frames: int):
+        """
+        PCM WAV of `total_frames` silent frames; the data is left sparse
+        """
+        block_align = DUB_CHANNELS * 2
+        data_size = total_frames * block_align
+        # RIFF sizes are 32-bit: about 6.7 hours at 44.1 kHz stereo
+        if 36 + data_size > 0xFFFFFFFF:
+            max_hours = (0xFFFFFFFF - 36) / (DUB_SAMPLE_RATE * block_align) / 3600
+            raise ValueError(f"Dub track of {total_frames / DUB_SAMPLE_RATE / 3600:.1f}h exceeds the WAV limit of {max_hours:.1f}h")
+        header = struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, DUB_CHANNELS, DUB_SAMPLE_RATE, DUB_SAMPLE_RATE * block_align, block_align, 16,
+            b'data', data_size
+        )
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.truncate(WAV_HEADER_SIZE + data_size)
+
+    def _mix_clip(self, path: str, total_frames: int, start_seconds: float, pcm: bytes):
+        """
+        Add a decoded clip into the track at `start_seconds`, clipping rather than wrapping
+        """
+        start = int(round(start_seconds * DUB_SAMPLE_RATE))
+        clip = np.frombuffer(pcm, dtype='<i2')
+        clip = clip[:len(clip) - len(clip) % DUB_CHANNELS].reshape(-1, DUB_CHANNELS)
+        frames = min(len(clip), total_frames - start)
+        if frames <= 0:
+            return
+
+        track = np.memmap(path, dtype='<i2', mode='r+', offset=WAV_HEADER_SIZE, shape=(total_frames, DUB_CHANNELS))
+        try:
+            window = track[start:start + frames]
+            mixed = window.astype(np.int32) + clip[:frames]
+            window[:] = np.clip(mixed, -32768, 32767)
+            track.flush()
+        finally:
+            del track
+
+    @staticmethod
+    def _srt_time(seconds: float) -> str:
+        milliseconds = int(round(max(seconds, 0.0) * 1000))
+        hours, milliseconds = divmod(milliseconds, 3600000)
+        minutes, milliseconds = divmod(milliseconds, 60000)
+        secs, milliseconds = divmod(milliseconds, 1000)
+        return f"{hours:02d}:{minutes:02d}:{secs:02d},{milliseconds:03d}"
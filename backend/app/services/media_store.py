@@ -0,0 +1,203 @@
+# backend/app/services/media_store.py
+import os
+import json
+import time
+import errno
+import shutil
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ioctl request number for FICLONE (reflink) on Linux
+FICLONE = 0x40049409
+
+
+def youtube_key(video_id: str) -> str:
+    return f"yt_{video_id}"
+
+
+def sha256_key(digest: str) -> str:
+    return f"sha256_{digest}"
+
+
+def link_or_copy(source: str, dest: str):
+    """
+    Hard link, then reflink, then plain copy
+    """
+    try:
+        os.link(source, dest)
+        return
+    except OSError as e:
+        if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+    try:
+        import fcntl
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+    shutil.copy2(source, dest)
+
+
+class MediaStore:
+    """
+    Content-addressed store for source videos.
+
+    Each unique video (YouTube ID or SHA-256 of an upload) is stored once
+    under objects/. Tasks get their own path via hard link (or reflink /
+    copy as fallback), and every materialization is recorded as a
+    reference so unreferenced objects can be garbage collected.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.MEDIA_STORE_DIR
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.index_path = os.path.join(self.root, "index.json")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._index: Dict[str, Dict[str, Any]] = self._load_index()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def lock(self, key: str) -> asyncio.Lock:
+        """
+        Per-key lock so concurrent submissions of the same video download once
+        """
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Path of a stored object, or None if not present
+        """
+        entry = self._index.get(key)
+        if entry and os.path.exists(entry["path"]):
+            return entry["path"]
+        if entry:
+            # Object vanished from disk; forget it
+            del self._index[key]
+            self._save_index()
+        return None
+
+    def ingest(self, key: str, source_path: str, owner: str) -> str:
+        """
+        Move a freshly written file into the store and link it back in place.
+        If the object already exists the new copy is discarded.
+        """
+        existing = self.lookup(key)
+        if existing:
+            os.remove(source_path)
+            logger.info(f"Media {key} already stored, deduplicated {source_path}")
+        else:
+            extension = os.path.splitext(source_path)[1]
+            existing = os.path.join(self.objects_dir, f"{key}{extension}")
+            shutil.move(source_path, existing)
+            self._index[key] = {
+                "path": existing,
+                "size": os.path.getsize(existing),
+                "refs": {},
+                "created_at": time.time()
+            }
+            logger.info(f"Stored media {key} ({self._index[key]['size']} bytes)")
+
+        self._link(existing, source_path)
+        self._add_ref(key, owner, source_path)
+        return source_path
+
+    def key_for_path(self, path: str) -> Optional[str]:
+        """
+        Key of the stored object `path` is linked to, if any
+        """
+        for key, entry in self._index.items():
+            try:
+                if os.path.samefile(entry["path"], path):
+                    return key
+            except OSError:
+                continue
+        return None
+
+    def materialize(self, key: str, dest_path: str, owner: str) -> Optional[str]:
+        """
+        Give `owner` its own path to a stored object; returns None on miss
+        """
+        object_path = self.lookup(key)
+        if object_path is None:
+            return None
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        self._link(object_path, dest_path)
+        self._add_ref(key, owner, dest_path)
+        logger.info(f"Materialized media {key} for {owner}: {dest_path}")
+        return dest_path
+
+    def release(self, owner: str) -> List[str]:
+        """
+        Drop every reference held by `owner`; returns the paths it held
+        """
+        released = []
+        for entry in self._index.values():
+            path = entry["refs"].pop(owner, None)
+            if path is not None:
+                released.append(path)
+        if released:
+            self._save_index()
+        return released
+
+    def collect_garbage(self, min_age: float = 0) -> int:
+        """
+        Delete objects nobody references any more; returns bytes freed
+        """
+        freed = 0
+        now = time.time()
+        for key, entry in list(self._index.items()):
+            # A reference whose file was removed no longer pins the object
+            entry["refs"] = {o: p for o, p in entry["refs"].items() if os.path.exists(p)}
+            if entry["refs"] or now - entry.get("last_used", entry["created_at"]) < min_age:
+                continue
+            if os.path.exists(entry["path"]):
+                freed += entry["size"]
+                os.remove(entry["path"])
+            del self._index[key]
+            self._locks.pop(key, None)
+            logger.info(f"Garbage collected media {key}")
+        self._save_index()
+        return freed
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "objects": len(self._index),
+            "bytes": sum(entry["size"] for entry in self._index.values()),
+            "references": sum(len(entry["refs"]) for entry in self._index.values())
+        }
+
+    def _add_ref(self, key: str, owner: str, path: str):
+        entry = self._index[key]
+        entry["refs"][owner] = path
+        entry["last_used"] = time.time()
+        self._save_index()
+
+    def _link(self, source: str, dest: str):
+        link_or_copy(source, dest)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Media index unreadable, starting empty: {str(e)}")
+            return {}
+
+    def _save_index(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+
+
+# Shared store used by the download and upload paths
+media_store = MediaStore()
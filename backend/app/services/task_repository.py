@@ -0,0 +1,344 @@
+# backend/app/services/task_repository.py
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, delete, func, or_, and_, update
+from app.core.config import settings
+from app.core.database import get_engine, init_db, close_db, processing_tasks
+from app.core.events import event_bus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Task keys that map straight onto processing_tasks columns
+_COLUMN_FIELDS = (
+    "youtube_url", "source_language", "target_language", "audio_mixing", "voice_type",
+    "status", "progress", "message", "error", "result_file", "download_url",
+    "processing_time", "file_size", "video_duration"
+)
+_TIMESTAMP_FIELDS = ("created_at", "updated_at", "completed_at")
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def encode_cursor(created_at: str, task_id: str) -> str:
+    """Opaque keyset cursor for task listings"""
+    return f"{created_at}|{task_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    created_at, _, task_id = cursor.partition("|")
+    parsed = _parse_timestamp(created_at)
+    if parsed is None or not task_id:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return parsed, task_id
+
+
+class TaskRepository:
+    """
+    Task store backed by the processing_tasks table.
+
+    Active tasks live in memory and are mutated synchronously by the
+    pipelines; changes are only marked dirty and written in batches by a
+    background flusher every TASK_FLUSH_INTERVAL seconds (immediately on
+    completion/failure). Finished tasks are kept in a bounded LRU and read
+    back from the database once evicted.
+    """
+
+    def __init__(self, cache_size: Optional[int] = None, flush_interval: Optional[float] = None):
+        self.cache_size = cache_size if cache_size is not None else settings.TASK_CACHE_SIZE
+        self.flush_interval = flush_interval if flush_interval is not None else settings.TASK_FLUSH_INTERVAL
+        self._tasks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty: set = set()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+        self._db_ready = False
+
+    async def start(self):
+        """
+        Initialize the database and start the background flusher
+        """
+        try:
+            await init_db()
+            self._db_ready = True
+            await self._fail_interrupted_tasks()
+        except Exception as e:
+            logger.error(f"Task database unavailable, keeping tasks in memory only: {str(e)}")
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """
+        Flush pending writes and release the connection pool
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        if self._db_ready:
+            await close_db()
+            self._db_ready = False
+
+    # ------------------------------------------------------------------
+    # In-memory operations (sync, safe to call from pipeline code)
+    # ------------------------------------------------------------------
+
+    def create(self, task: Dict[str, Any]):
+        """
+        Register a new task and schedule its first write
+        """
+        task_id = task["id"]
+        self._tasks[task_id] = task
+        self._tasks.move_to_end(task_id)
+        self._mark_dirty(task_id, urgent=True)
+        event_bus.publish(task_id, task)
+
+    def get_cached(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the in-memory task document, if loaded
+        """
+        return self._tasks.get(task_id)
+
+    def update(self, task_id: str, **fields) -> Optional[Dict[str, Any]]:
+        """
+        Update task fields in memory; the write is coalesced by the flusher
+        """
+        task = self._tasks.get(task_id)
+        if task is None:
+            logger.warning(f"Update for unknown or evicted task {task_id} ignored")
+            return None
+        task.update(fields)
+        task["updated_at"] = datetime.now().isoformat()
+        self._mark_dirty(task_id, urgent=task.get("status") in TERMINAL_STATUSES)
+        event_bus.publish(task_id, task)
+        return task
+
+    def list_active(self) -> List[Dict[str, Any]]:
+        """
+        Tasks that are still queued or processing
+        """
+        return [task for task in self._tasks.values() if task.get("status") not in TERMINAL_STATUSES]
+
+    # ------------------------------------------------------------------
+    # Async operations (may hit the database)
+    # ------------------------------------------------------------------
+
+    async def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a task in memory, falling back to the database
+        """
+        task = self._tasks.get(task_id)
+        if task is not None:
+            self._tasks.move_to_end(task_id)
+            return task
+        if not self._db_ready:
+            return None
+
+        async with get_engine().connect() as conn:
+            result = await conn.execute(
+                select(processing_tasks).where(processing_tasks.c.task_id == task_id)
+            )
+            row = result.mappings().first()
+        if row is None:
+            return None
+
+        task = self._row_to_task(row)
+        self._tasks[task_id] = task
+        self._evict()
+        return task
+
+    async def delete(self, task_id: str):
+        """
+        Remove a task from memory and the database
+        """
+        self._tasks.pop(task_id, None)
+        self._dirty.discard(task_id)
+        event_bus.publish_deleted(task_id)
+        if self._db_ready:
+            async with get_engine().begin() as conn:
+                await conn.execute(delete(processing_tasks).where(processing_tasks.c.task_id == task_id))
+
+    async def list_tasks(self, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Newest-first keyset page of tasks; returns (tasks, next_cursor)
+        """
+        limit = max(1, min(limit, 100))
+        if not self._db_ready:
+            ordered = sorted(self._tasks.values(), key=lambda t: (t.get("created_at", ""), t["id"]), reverse=True)
+            if cursor:
+                created_at, task_id = cursor.partition("|")[::2]
+                ordered = [t for t in ordered if (t.get("created_at", ""), t["id"]) < (created_at, task_id)]
+            page = ordered[:limit]
+            next_cursor = encode_cursor(page[-1].get("created_at", ""), page[-1]["id"]) if len(ordered) > limit else None
+            return page, next_cursor
+
+        await self.flush()
+        query = select(processing_tasks).order_by(
+            processing_tasks.c.created_at.desc(), processing_tasks.c.task_id.desc()
+        ).limit(limit + 1)
+        if cursor:
+            created_at, task_id = decode_cursor(cursor)
+            query = query.where(or_(
+                processing_tasks.c.created_at < created_at,
+                and_(processing_tasks.c.created_at == created_at, processing_tasks.c.task_id < task_id)
+            ))
+
+        async with get_engine().connect() as conn:
+            rows = (await conn.execute(query)).mappings().all()
+
+        page = [self._tasks.get(row["task_id"]) or self._row_to_task(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = encode_cursor(last["created_at"].isoformat(), last["task_id"])
+        return page, next_cursor
+
+    async def get_stats(self) -> Dict[str, int]:
+        """
+        Task counts per status
+        """
+        if not self._db_ready:
+            counts: Dict[str, int] = {}
+            for task in self._tasks.values():
+                status = task.get("status", "unknown")
+                counts[status] = counts.get(status, 0) + 1
+            return counts
+
+        await self.flush()
+        async with get_engine().connect() as conn:
+            result = await conn.execute(
+                select(processing_tasks.c.status, func.count()).group_by(processing_tasks.c.status)
+            )
+            return {status or "unknown": count for status, count in result.all()}
+
+    async def flush(self):
+        """
+        Write all dirty tasks in a single transaction
+        """
+        if not self._dirty or not self._db_ready:
+            return
+        async with self._flush_lock:
+            task_ids = list(self._dirty)
+            self._dirty.clear()
+            rows = [self._task_to_row(self._tasks[t]) for t in task_ids if t in self._tasks]
+            if not rows:
+                return
+            try:
+                async with get_engine().begin() as conn:
+                    await conn.execute(self._upsert_statement(conn.dialect.name), rows)
+            except Exception as e:
+                # Keep them dirty so the next flush retries
+                self._dirty.update(task_ids)
+                logger.error(f"Failed to persist {len(rows)} task(s): {str(e)}")
+                return
+        self._evict()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _mark_dirty(self, task_id: str, urgent: bool = False):
+        self._dirty.add(task_id)
+        if urgent:
+            self._wakeup.set()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Task flush failed: {str(e)}")
+
+    def _evict(self):
+        """
+        Drop least-recently-used finished tasks beyond the cache size
+        """
+        finished = [
+            task_id for task_id, task in self._tasks.items()
+            if task.get("status") in TERMINAL_STATUSES and task_id not in self._dirty
+        ]
+        overflow = len(finished) - self.cache_size
+        if overflow <= 0 or not self._db_ready:
+            return
+        for task_id in finished[:overflow]:
+            del self._tasks[task_id]
+
+    async def _fail_interrupted_tasks(self):
+        """
+        Tasks that were running when the server stopped can't be resumed
+        """
+        async with get_engine().begin() as conn:
+            result = await conn.execute(
+                update(processing_tasks)
+                .where(processing_tasks.c.status.in_(("queued", "processing")))
+                .values(status="failed", message="Interrupted by server restart", updated_at=datetime.now())
+            )
+        if result.rowcount:
+            logger.warning(f"Marked {result.rowcount} interrupted task(s) as failed")
+
+    def _upsert_statement(self, dialect: str):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(processing_tasks)
+        updatable = {
+            column.name: stmt.excluded[column.name]
+            for column in processing_tasks.columns
+            if column.name not in ("id", "task_id", "created_at")
+        }
+        return stmt.on_conflict_do_update(index_elements=["task_id"], set_=updatable)
+
+    def _task_to_row(self, task: Dict[str, Any]) -> Dict[str, Any]:
+        row = {field: task.get(field) for field in _COLUMN_FIELDS}
+        row["youtube_url"] = row["youtube_url"] or ""
+        for field in _TIMESTAMP_FIELDS:
+            row[field] = _parse_timestamp(task.get(field))
+        row["task_id"] = task["id"]
+        row["audio_mixing"] = row["audio_mixing"] or "overlay"
+        row["voice_type"] = row["voice_type"] or "female"
+        row["task_data"] = json.dumps(task, ensure_ascii=False, default=str)
+        return row
+
+    def _row_to_task(self, row) -> Dict[str, Any]:
+        task: Dict[str, Any] = {}
+        if row.get("task_data"):
+            try:
+                task = json.loads(row["task_data"])
+            except ValueError:
+                task = {}
+        task["id"] = row["task_id"]
+        for field in _COLUMN_FIELDS:
+            if row.get(field) is not None:
+                task[field] = row[field]
+        for field in _TIMESTAMP_FIELDS:
+            if row.get(field) is not None:
+                task[field] = row[field].isoformat()
+        return task
+
+
+# Shared repository instance
+task_repository = TaskRepository()
@@ -1,11 +1,12 @@
 # backend/app/services/translation_service.py
 import os
 import asyncio
-import aiohttp
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import re
 from app.core.config import settings
+from app.core.http_client import http_clients
+from app.services.artifact_cache import mark_uncacheable
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +16,11 @@ class TranslationService:
     def __init__(self):
         self.base_url = settings.TRANSLATION_SERVICE_URL
         self.api_key = settings.TRANSLATION_API_KEY
-        self.session = None
     
-    async def _get_session(self):
-        """Get or create aiohttp session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        return self.session
+    @property
+    def client(self):
+        """Shared pooled client for the translation service"""
+        return http_clients.get("translation", self.base_url)
     
     async def translate(self, text: str, target_language: str = "th", source_language: str = "auto") -> str:
         """
@@ -37,6 +36,10 @@ class TranslationService:
             # Clean and prepare text
             cleaned_text = self._preprocess_text(text)
             
+            # Long transcripts are translated in concurrent chunks
+            if len(cleaned_text) > settings.TRANSLATE_CHUNK_SIZE:
+                return await self._translate_long_text(cleaned_text, target_language, source_language)
+            
             # Try LibreTranslate first
             try:
                 translated = await self._translate_with_libretranslate(cleaned_text, target_language, source_language)
@@ -46,6 +49,7 @@ class TranslationService:
                 logger.warning(f"LibreTranslate failed: {str(e)}")
                 
                 # Fallback to simple translation
+                mark_uncacheable()
                 translated = await self._translate_with_fallback(cleaned_text, target_language, source_language)
                 logger.info("Translation completed with fallback method")
                 return translated
@@ -53,14 +57,45 @@ class TranslationService:
         except Exception as e:
             logger.error(f"Translation failed: {str(e)}")
             raise Exception(f"Failed to translate text: {str(e)}")
-    
+
+    async def translate_segments(self, texts: List[str], target_language: str = "th", source_language: str = "auto") -> List[str]:
+        """
+        Translate timed transcript segments one by one, keeping their order.
+
+        A few requests run at once (TRANSLATE_SEGMENT_CONCURRENCY). Segments
+        that fail fall back individually, and any fallback keeps the whole
+        result out of the artifact cache.
+        """
+        semaphore = asyncio.Semaphore(max(1, settings.TRANSLATE_SEGMENT_CONCURRENCY))
+
+        async def translate_one(text: str):
+            cleaned_text = self._preprocess_text(text)
+            if not cleaned_text:
+                return "", False
+            async with semaphore:
+                try:
+                    return await self._translate_with_libretranslate(cleaned_text, target_language, source_language), False
+                except Exception as e:
+                    logger.warning(f"LibreTranslate failed for segment, using fallback: {str(e)}")
+                    return await self._translate_with_fallback(cleaned_text, target_language, source_language), True
+
+        try:
+            logger.info(f"Translating {len(texts)} segments to {target_language}")
+            results = await asyncio.gather(*(translate_one(text) for text in texts))
+        except Exception as e:
+            logger.error(f"Segment translation failed: {str(e)}")
+            raise Exception(f"Failed to translate segments: {str(e)}")
+
+        # Fallbacks ran in child tasks, so flag this job from here
+        if any(fell_back for _, fell_back in results):
+            mark_uncacheable()
+        return [translated for translated, _ in results]
+
     async def _translate_with_libretranslate(self, text: str, target_language: str, source_language: str) -> str:
         """
         Translate using LibreTranslate
         """
         try:
-            session = await self._get_session()
-            
             # Prepare request data
             data = {
                 "q": text,
@@ -78,23 +113,17 @@ class TranslationService:
             }
             
             # Make translation request
-            async with session.post(
-                f"{self.base_url}/translate",
-                json=data,
-                headers=headers,
-                timeout=30
-            ) as response:
-                
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Translation API error {response.status}: {error_text}")
-                
-                result = await response.json()
-                
-                if "translatedText" not in result:
-                    raise Exception("Invalid response from translation service")
-                
-                return result["translatedText"]
+            response = await self.client.post("/translate", json=data, headers=headers)
+            
+            if response.status_code != 200:
+                raise Exception(f"Translation API error {response.status_code}: {response.text}")
+            
+            result = response.json()
+            
+            if "translatedText" not in result:
+                raise Exception("Invalid response from translation service")
+            
+            return result["translatedText"]
                 
         except Exception as e:
             logger.error(f"LibreTranslate translation failed: {str(e)}")
@@ -329,32 +358,51 @@ class TranslationService:
     
     async def _translate_long_text(self, text: str, target_language: str, source_language: str) -> str:
         """
-        Translate long text by splitting into chunks
+        Translate long text by splitting into chunks.
+
+        Up to TRANSLATE_CHUNK_CONCURRENCY chunks are in flight at once and
+        results are joined in the original order. A chunk is retried
+        TRANSLATE_CHUNK_RETRIES times before it falls back on its own; any
+        fallback is logged with the chunk numbers and keeps the result out
+        of the artifact cache.
         """
-        try:
-            # Split text into chunks
-            chunks = self._split_text_intelligently(text)
-            translated_chunks = []
-            
-            for chunk in chunks:
+        chunks = self._split_text_intelligently(text, settings.TRANSLATE_CHUNK_SIZE)
+        total = len(chunks)
+        semaphore = asyncio.Semaphore(max(1, settings.TRANSLATE_CHUNK_CONCURRENCY))
+        attempts = max(0, settings.TRANSLATE_CHUNK_RETRIES) + 1
+        
+        async def translate_one(i: int, chunk: str):
+            async with semaphore:
                 if len(chunk) > 5000:
                     # For very long chunks, use fallback
-                    translated = await self._translate_with_fallback(chunk, target_language, source_language)
-                else:
-                    # Try LibreTranslate first, then fallback
+                    return await self._translate_with_fallback(chunk, target_language, source_language), True
+                
+                for attempt in range(attempts):
                     try:
-                        translated = await self._translate_with_libretranslate(chunk, target_language, source_language)
-                    except:
-                        translated = await self._translate_with_fallback(chunk, target_language, source_language)
+                        return await self._translate_with_libretranslate(chunk, target_language, source_language), False
+                    except Exception as e:
+                        if attempt == attempts - 1:
+                            logger.warning(f"Chunk {i + 1}/{total} failed after {attempts} attempts, using fallback: {str(e)}")
+                            break
+                        await asyncio.sleep(settings.HTTP_BACKOFF_BASE * (2 ** attempt))
                 
-                translated_chunks.append(translated)
-            
-            # Join translated chunks
-            return " ".join(translated_chunks)
-            
+                return await self._translate_with_fallback(chunk, target_language, source_language), True
+        
+        try:
+            logger.info(f"Translating {total} chunks, up to {settings.TRANSLATE_CHUNK_CONCURRENCY} at a time")
+            results = await asyncio.gather(*(translate_one(i, chunk) for i, chunk in enumerate(chunks)))
         except Exception as e:
             logger.error(f"Long text translation failed: {str(e)}")
             raise e
+        
+        failed_chunks = [i + 1 for i, (_, fell_back) in enumerate(results) if fell_back]
+        if failed_chunks:
+            # Fallbacks ran in child tasks, so flag this job from here
+            mark_uncacheable()
+            logger.warning(f"{len(failed_chunks)} of {total} chunks used fallback translation: {failed_chunks}")
+        
+        # Join translated chunks
+        return " ".join(translated for translated, _ in results)
     
     def _split_text_intelligently(self, text: str, max_chunk_size: int = 4000) -> list:
         """
@@ -469,8 +517,6 @@ class TranslationService:
         Detect the language of input text
         """
         try:
-            session = await self._get_session()
-            
             data = {
                 "q": text[:1000]  # Use first 1000 chars for detection
             }
@@ -478,21 +524,17 @@ class TranslationService:
             if self.api_key:
                 data["api_key"] = self.api_key
             
-            async with session.post(
-                f"{self.base_url}/detect",
-                json=data,
-                timeout=10
-            ) as response:
-                
-                if response.status != 200:
-                    logger.warning("Language detection failed, using 'auto'")
-                    return "auto"
-                
-                result = await response.json()
-                detected_lang = result[0]["language"] if result else "auto"
-                
-                logger.info(f"Detected language: {detected_lang}")
-                return detected_lang
+            response = await self.client.post("/detect", json=data, timeout=10)
+            
+            if response.status_code != 200:
+                logger.warning("Language detection failed, using 'auto'")
+                return "auto"
+            
+            result = response.json()
+            detected_lang = result[0]["language"] if result else "auto"
+            
+            logger.info(f"Detected language: {detected_lang}")
+            return detected_lang
                 
         except Exception as e:
             logger.warning(f"Language detection failed: {str(e)}")
@@ -503,15 +545,13 @@ class TranslationService:
         Get list of supported languages
         """
         try:
-            session = await self._get_session()
-            
-            async with session.get(f"{self.base_url}/languages") as response:
-                if response.status == 200:
-                    languages = await response.json()
-                    return {lang["code"]: lang["name"] for lang in languages}
-                else:
-                    # Return default supported languages
-                    return settings.SUPPORTED_LANGUAGES
+            response = await self.client.get("/languages")
+            if response.status_code == 200:
+                languages = response.json()
+                return {lang["code"]: lang["name"] for lang in languages}
+            else:
+                # Return default supported languages
+                return settings.SUPPORTED_LANGUAGES
                     
         except Exception as e:
             logger.warning(f"Could not fetch supported languages: {str(e)}")
@@ -541,10 +581,3 @@ class TranslationService:
         except Exception as e:
             logger.warning(f"Context-aware translation failed, using regular translation: {str(e)}")
             return await self.translate(text, target_language)
-    
-    async def close(self):
-        """
-        Close the aiohttp session
-        """
-        if self.session and not self.session.closed:
-            await self.session.close()
\ No newline at end of file
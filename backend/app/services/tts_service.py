@@ -3,13 +3,18 @@ import os
 import asyncio
 import logging
 import tempfile
-import requests
-from typing import Optional, Dict, Any
-import subprocess
+from typing import Optional, Dict, Any, List
 from app.core.config import settings
+from app.core.http_client import http_clients
+from app.services.task_repository import task_repository
 
 logger = logging.getLogger(__name__)
 
+# Enhancement applied once to every synthesized track, and the layout it is written in
+AUDIO_ENHANCE_FILTER = 'volume=1.2,highpass=f=80,lowpass=f=8000'
+OUTPUT_SAMPLE_RATE = 44100
+OUTPUT_CHANNELS = 2
+
 def normalize_path(path):
     """
     Normalize a path to avoid duplication issues, especially in Docker environments
@@ -84,54 +89,63 @@ class TTSService:
             logger.error(f"Text-to-speech failed for task {task_id}: {str(e)}")
             raise Exception(f"Failed to convert text to speech: {str(e)}")
     
-    async def _synthesize_text(self, text: str, task_id: str, language: str, voice_type: str, speech_rate_info: Optional[Dict[str, Any]] = None) -> str:
+    async def synthesize_segment(self, text: str, clip_id: str, language: str = "th", voice_type: str = "female", speech_rate_info: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Synthesize one short timed segment as raw s16le PCM at the output
+        layout; returns None when there is nothing to speak
+        """
+        cleaned_text = self._preprocess_text_for_tts(text, language)
+        if not cleaned_text.strip():
+            return None
+
+        return await self.synthesize_with_retry(cleaned_text, clip_id, language, voice_type, speech_rate_info, raw_pcm=True)
+
+    async def _synthesize_text(self, text: str, task_id: str, language: str, voice_type: str, speech_rate_info: Optional[Dict[str, Any]] = None, raw_pcm: bool = False) -> str:
         """
-        Synthesize speech for a single text using external TTS service with dynamic rate adjustment
+        Synthesize speech for a single text using external TTS service with dynamic rate adjustment.
+        With raw_pcm the unoptimized s16le audio is returned for the chunk assembler.
         """
         try:
-            output_path = os.path.join(self.upload_dir, f"thai_audio_{task_id}.wav")
+            output_path = os.path.join(self.upload_dir, f"thai_audio_{task_id}.{'pcm' if raw_pcm else 'wav'}")
             
             # Calculate dynamic speech rate based on analysis
             speech_rate = self._calculate_tts_rate(speech_rate_info)
             
-            # Call external TTS service
-            url = f"{self.tts_service_url}/synthesize"
+            # Call external TTS service over the shared pooled client
+            client = http_clients.get("tts", self.tts_service_url)
             
             payload = {
                 "text": text,
                 "language": language,
                 "voice_type": voice_type,
                 "use_edge_tts": True,
-                "speech_rate": speech_rate  # Add dynamic speech rate
+                "speech_rate": speech_rate,  # Add dynamic speech rate
+                "output_format": "pcm" if raw_pcm else "wav",  # PCM, so optimizing needs no MP3 decode
+                "sample_rate": OUTPUT_SAMPLE_RATE,
+                "channels": OUTPUT_CHANNELS
             }
             
             logger.info(f"TTS request with speech_rate: {speech_rate}")
             
-            response = requests.post(url, json=payload)
+            # Audio comes back in the same response; no separate download
+            response = await client.post("/synthesize/stream", json=payload)
             
             if response.status_code != 200:
                 raise Exception(f"TTS service error: {response.text}")
             
-            result = response.json()
-            audio_filename = result.get('audio_file')
-            
-            if not audio_filename:
-                raise Exception("TTS service did not return audio file")
-            
-            # Download the generated audio file
-            download_url = f"{self.tts_service_url}/download/{audio_filename}"
-            audio_response = requests.get(download_url)
-            
-            if audio_response.status_code != 200:
-                raise Exception("Failed to download generated audio file")
+            if not response.content:
+                raise Exception("TTS service did not return audio")
             
             # Save the audio file
             with open(output_path, 'wb') as f:
-                f.write(audio_response.content)
+                f.write(response.content)
             
             if not os.path.exists(output_path):
                 raise Exception("TTS output file was not created")
             
+            if raw_pcm:
+                return output_path
+            
             # Optimize audio for video merging
             optimized_path = await self._optimize_audio_for_video(output_path, task_id)
             
@@ -144,53 +158,141 @@ class TTSService:
     
     async def _synthesize_long_text(self, text: str, task_id: str, language: str, voice_type: str, speech_rate_info: Optional[Dict[str, Any]] = None) -> str:
         """
-        Synthesize speech for long text by splitting into chunks with dynamic speech rate
+        Synthesize speech for long text by splitting into chunks with dynamic speech rate.
+        Chunks are synthesized concurrently (TTS_CHUNK_CONCURRENCY) as raw PCM and
+        streamed, in order, into a single ffmpeg encode as soon as each is ready.
         """
         try:
             logger.info(f"Synthesizing long text ({len(text)} chars) for task {task_id}")
             
             # Split text into manageable chunks
-            text_chunks = self._split_text_for_tts(text)
-            audio_files = []
+            text_chunks = [chunk for chunk in self._split_text_for_tts(text) if chunk.strip()]
+            if not text_chunks:
+                raise Exception("No audio files were generated")
             
-            # Synthesize each chunk
-            for i, chunk in enumerate(text_chunks):
-                if not chunk.strip():
-                    continue
-                
-                chunk_task_id = f"{task_id}_chunk_{i}"
-                chunk_audio = await self._synthesize_text(chunk, chunk_task_id, language, voice_type, speech_rate_info)
+            total = len(text_chunks)
+            semaphore = asyncio.Semaphore(max(1, settings.TTS_CHUNK_CONCURRENCY))
+            completed = 0
+            
+            async def synthesize_chunk(i: int, chunk: str) -> str:
+                nonlocal completed
+                async with semaphore:
+                    chunk_audio = await self.synthesize_with_retry(
+                        chunk, f"{task_id}_chunk_{i}", language, voice_type, speech_rate_info, raw_pcm=True
+                    )
                 
                 # Validate that the chunk audio file was created
                 if not os.path.exists(chunk_audio):
                     raise Exception(f"Chunk audio file was not created: {chunk_audio}")
                 
-                logger.info(f"Created chunk audio file: {chunk_audio}")
-                audio_files.append(chunk_audio)
-            
-            if not audio_files:
-                raise Exception("No audio files were generated")
-            
-            # Concatenate all audio files
-            if len(audio_files) == 1:
-                final_audio = audio_files[0]
-            else:
-                final_audio = await self._concatenate_audio_files(audio_files, task_id)
-            
-            # Clean up individual chunk files
-            for audio_file in audio_files:
-                if os.path.exists(audio_file) and audio_file != final_audio:
-                    try:
-                        os.remove(audio_file)
-                    except:
-                        pass
+                completed += 1
+                self.report_chunk_progress(task_id, completed, total)
+                return chunk_audio
             
-            return final_audio
+            logger.info(f"Synthesizing {total} chunks for task {task_id}, up to {settings.TTS_CHUNK_CONCURRENCY} at a time")
+            tasks = [asyncio.create_task(synthesize_chunk(i, chunk)) for i, chunk in enumerate(text_chunks)]
+            try:
+                return await self._assemble_chunks(tasks, task_id)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                await self.cleanup_tts_files(task_id)
+                raise
             
         except Exception as e:
             logger.error(f"Long text synthesis failed: {str(e)}")
             raise
     
+    async def _assemble_chunks(self, chunk_tasks: List["asyncio.Task[str]"], task_id: str) -> str:
+        """
+        Feed chunk PCM to one ffmpeg process in chunk order while later chunks are
+        still synthesizing; the enhancement filter and encode run once for the track
+        """
+        output_path = os.path.join(self.upload_dir, f"optimized_audio_{task_id}.wav")
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-f', 's16le', '-ar', str(OUTPUT_SAMPLE_RATE), '-ac', str(OUTPUT_CHANNELS), '-i', 'pipe:0',
+            '-af', AUDIO_ENHANCE_FILTER,
+            '-ar', str(OUTPUT_SAMPLE_RATE),
+            '-ac', str(OUTPUT_CHANNELS),
+            '-y',
+            output_path
+        ]
+        
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stderr_reader = asyncio.create_task(process.stderr.read())
+        
+        try:
+            for chunk_task in chunk_tasks:
+                pcm_path = await chunk_task
+                with open(pcm_path, 'rb') as f:
+                    while True:
+                        block = f.read(1024 * 1024)
+                        if not block:
+                            break
+                        process.stdin.write(block)
+                        await process.stdin.drain()
+                os.remove(pcm_path)
+            
+            process.stdin.close()
+            returncode = await process.wait()
+            stderr = await stderr_reader
+            
+            if returncode != 0:
+                raise Exception(f"Audio assembly failed: {stderr.decode(errors='replace')}")
+            
+            if not os.path.exists(output_path):
+                raise Exception(f"Output file was not created: {output_path}")
+            
+            logger.info(f"Assembled {len(chunk_tasks)} chunks into {output_path}")
+            return output_path
+        
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            stderr_reader.cancel()
+    
+    async def synthesize_with_retry(self, text: str, clip_id: str, language: str, voice_type: str, speech_rate_info: Optional[Dict[str, Any]] = None, raw_pcm: bool = False) -> str:
+        """
+        _synthesize_text for one chunk, retried as a whole (streamed synthesis, then
+        the optimize pass, or straight to raw PCM with raw_pcm) up to
+        TTS_CHUNK_RETRIES times with exponential backoff
+        """
+        attempts = max(0, settings.TTS_CHUNK_RETRIES) + 1
+        for attempt in range(attempts):
+            try:
+                return await self._synthesize_text(text, clip_id, language, voice_type, speech_rate_info, raw_pcm)
+            except Exception as e:
+                if attempt == attempts - 1:
+                    raise
+                delay = settings.HTTP_BACKOFF_BASE * (2 ** attempt)
+                logger.warning(f"TTS chunk {clip_id} failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    def report_chunk_progress(self, task_id: str, completed: int, total: int):
+        """
+        Per-chunk progress within the text_to_speech step (overall 85-90%)
+        """
+        task = task_repository.get_cached(task_id)
+        if task is None:
+            return
+        step = task.get("steps", {}).get("text_to_speech")
+        if step is not None:
+            step["progress"] = int(completed * 100 / total)
+        task_repository.update(
+            task_id,
+            progress=85 + int(completed * 5 / total),
+            message=f"Synthesized speech chunk {completed}/{total}",
+            tts_chunks={"completed": completed, "total": total}
+        )
+    
     def _preprocess_text_for_tts(self, text: str, language: str) -> str:
         """
         Preprocess text for TTS synthesis
@@ -273,101 +375,6 @@ class TTSService:
         
         return chunks
     
-    async def _concatenate_audio_files(self, audio_files: list, task_id: str) -> str:
-        """
-        Concatenate multiple audio files into one
-        """
-        try:
-            output_path = os.path.join(self.upload_dir, f"thai_audio_{task_id}.wav")
-            
-            logger.info(f"=== CONCATENATION DEBUG START ===")
-            logger.info(f"Task ID: {task_id}")
-            logger.info(f"Number of audio files: {len(audio_files)}")
-            logger.info(f"Audio files list: {audio_files}")
-            
-            # Validate that all audio files exist before concatenation
-            for i, audio_file in enumerate(audio_files):
-                logger.info(f"Checking audio file {i+1}: {audio_file}")
-                logger.info(f"  - Type: {type(audio_file)}")
-                logger.info(f"  - Exists: {os.path.exists(audio_file)}")
-                logger.info(f"  - Absolute: {os.path.abspath(audio_file)}")
-                logger.info(f"  - Dirname: {os.path.dirname(audio_file)}")
-                logger.info(f"  - Basename: {os.path.basename(audio_file)}")
-                
-                if not os.path.exists(audio_file):
-                    raise Exception(f"Audio file not found: {audio_file}")
-                logger.info(f"Audio file exists: {audio_file}")
-            
-            # Create file list for FFmpeg
-            filelist_path = os.path.join(self.upload_dir, f"filelist_{task_id}.txt")
-            
-            logger.info(f"Creating filelist at: {filelist_path}")
-            logger.info(f"Current working directory: {os.getcwd()}")
-            logger.info(f"Upload directory: {self.upload_dir}")
-            logger.info(f"Upload directory (absolute): {os.path.abspath(self.upload_dir)}")
-            
-            with open(filelist_path, 'w') as f:
-                for i, audio_file in enumerate(audio_files):
-                    logger.info(f"Processing audio file {i+1}: {audio_file}")
-                    logger.info(f"Audio file exists: {os.path.exists(audio_file)}")
-                    logger.info(f"Audio file (absolute): {os.path.abspath(audio_file)}")
-                    
-                    # Use normalized paths to avoid duplication issues
-                    normalized_audio_file = normalize_path(audio_file)
-                    logger.info(f"Normalized path: {audio_file} -> {normalized_audio_file}")
-                    
-                    file_entry = f"file '{normalized_audio_file}'\n"
-                    f.write(file_entry)
-                    logger.info(f"Wrote to filelist: {file_entry.strip()}")
-            
-            # Log the filelist content for debugging
-            with open(filelist_path, 'r') as f:
-                filelist_content = f.read()
-                logger.info(f"Complete filelist content for task {task_id}:\n{filelist_content}")
-                logger.info(f"Filelist file size: {os.path.getsize(filelist_path)} bytes")
-            
-            # FFmpeg command to concatenate
-            cmd = [
-                'ffmpeg',
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', filelist_path,
-                '-c', 'copy',
-                '-y',
-                output_path
-            ]
-            
-            logger.info(f"Running FFmpeg command: {' '.join(cmd)}")
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            # Clean up filelist
-            try:
-                os.remove(filelist_path)
-            except:
-                pass
-            
-            if process.returncode != 0:
-                logger.error(f"FFmpeg stdout: {stdout.decode()}")
-                logger.error(f"FFmpeg stderr: {stderr.decode()}")
-                raise Exception(f"Audio concatenation failed: {stderr.decode()}")
-            
-            if not os.path.exists(output_path):
-                raise Exception(f"Output file was not created: {output_path}")
-            
-            logger.info(f"Audio concatenation successful: {output_path}")
-            return output_path
-            
-        except Exception as e:
-            logger.error(f"Audio concatenation failed: {str(e)}")
-            raise
-    
     async def _optimize_audio_for_video(self, audio_path: str, task_id: str) -> str:
         """
         Optimize audio for video merging
@@ -380,9 +387,9 @@ class TTSService:
             cmd = [
                 'ffmpeg',
                 '-i', audio_path,
-                '-af', 'volume=1.2,highpass=f=80,lowpass=f=8000',  # Enhance audio
-                '-ar', '44100',  # 44.1kHz sample rate
-                '-ac', '2',      # Stereo
+                '-af', AUDIO_ENHANCE_FILTER,  # Enhance audio
+                '-ar', str(OUTPUT_SAMPLE_RATE),  # 44.1kHz sample rate
+                '-ac', str(OUTPUT_CHANNELS),     # Stereo
                 '-b:a', '192k',  # 192kbps bitrate
                 '-y',
                 optimized_path
@@ -423,11 +430,16 @@ class TTSService:
                 audio_path
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            if result.returncode == 0:
-                return float(result.stdout.strip())
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
+            if process.returncode == 0:
+                return float(stdout.decode().strip())
             else:
-                logger.warning(f"Could not get audio duration: {result.stderr}")
+                logger.warning(f"Could not get audio duration: {stderr.decode()}")
                 return 0.0
                 
         except Exception as e:
@@ -442,7 +454,8 @@ class TTSService:
             files_to_clean = [
                 f"thai_audio_{task_id}.wav",
                 f"optimized_audio_{task_id}.wav",
-                f"filelist_{task_id}.txt"
+                f"dub_audio_{task_id}.wav",
+                f"dub_mix_{task_id}.wav"
             ]
             
             # Also clean up chunk files
@@ -452,10 +465,14 @@ class TTSService:
             files_to_clean.extend([os.path.basename(f) for f in chunk_files])
             
             # Also clean up original chunk files (before optimization)
-            original_chunk_pattern = f"thai_audio_{task_id}_chunk_*.wav"
+            original_chunk_pattern = f"thai_audio_{task_id}_chunk_*"
             original_chunk_files = glob.glob(os.path.join(self.upload_dir, original_chunk_pattern))
             files_to_clean.extend([os.path.basename(f) for f in original_chunk_files])
             
+            # Timed dubbing clips left behind by a failed run
+            segment_files = glob.glob(os.path.join(self.upload_dir, f"*_audio_{task_id}_seg_*"))
+            files_to_clean.extend([os.path.basename(f) for f in segment_files])
+            
             for filename in files_to_clean:
                 file_path = os.path.join(self.upload_dir, filename)
                 if os.path.exists(file_path):
@@ -0,0 +1,301 @@
+# backend/app/services/upload_service.py
+import os
+import json
+import time
+import uuid
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.media_store import media_store, sha256_key
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_EXTENSIONS = ['.mp4', '.avi', '.mov', '.webm', '.mkv', '.m4v']
+
+
+class UploadError(Exception):
+    """Upload rejected; carries the HTTP status code to report"""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class UploadService:
+    """
+    Service for streaming video uploads to disk.
+
+    Files are written in UPLOAD_CHUNK_SIZE pieces with the size cap and
+    SHA-256 computed incrementally, so memory use is constant regardless of
+    file size. Resumable uploads follow the tus model: a session is created
+    with the total length, data is appended with PATCH at an explicit
+    offset, and HEAD reports how much the server already has.
+    """
+
+    def __init__(self):
+        self.upload_dir = settings.UPLOAD_DIR
+        self.partial_dir = os.path.join(self.upload_dir, "partial")
+        self.chunk_size = settings.UPLOAD_CHUNK_SIZE
+        self.max_size = settings.MAX_FILE_SIZE
+        os.makedirs(self.partial_dir, exist_ok=True)
+
+        # upload_id -> (hasher, number of bytes already hashed)
+        self._hashers: Dict[str, Tuple[Any, int]] = {}
+
+    def validate_extension(self, filename: Optional[str]) -> str:
+        """
+        Return the lower-cased extension or raise UploadError
+        """
+        if not filename:
+            raise UploadError(400, "No file provided")
+        file_extension = os.path.splitext(filename)[1].lower()
+        if file_extension not in ALLOWED_EXTENSIONS:
+            raise UploadError(400, f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}")
+        return file_extension
+
+    async def save_stream(self, chunks: AsyncIterator[bytes], filename: str) -> Dict[str, Any]:
+        """
+        Stream a complete upload to disk in one pass
+        """
+        file_extension = self.validate_extension(filename)
+        file_id = str(uuid.uuid4())
+        part_path = os.path.join(self.partial_dir, f"{file_id}.part")
+        hasher = hashlib.sha256()
+        size = 0
+
+        try:
+            with open(part_path, "wb") as buffer:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_size:
+                        raise UploadError(413, f"File too large (max {self.max_size // (1024 * 1024)}MB)")
+                    hasher.update(chunk)
+                    buffer.write(chunk)
+
+            if size == 0:
+                raise UploadError(400, "Empty file")
+
+            return self._finalize(file_id, file_extension, part_path, size, hasher.hexdigest())
+
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+    async def iter_upload_file(self, upload_file) -> AsyncIterator[bytes]:
+        """
+        Read a FastAPI UploadFile in fixed-size chunks
+        """
+        while True:
+            chunk = await upload_file.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+    # ------------------------------------------------------------------
+    # Resumable uploads
+    # ------------------------------------------------------------------
+
+    def create_session(self, filename: str, length: int) -> Dict[str, Any]:
+        """
+        Start a resumable upload of `length` bytes
+        """
+        file_extension = self.validate_extension(filename)
+        if length <= 0:
+            raise UploadError(400, "Upload-Length must be positive")
+        if length > self.max_size:
+            raise UploadError(413, f"File too large (max {self.max_size // (1024 * 1024)}MB)")
+
+        self._purge_stale_sessions()
+
+        upload_id = str(uuid.uuid4())
+        session = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "extension": file_extension,
+            "length": length,
+            "created_at": time.time()
+        }
+        with open(self._session_path(upload_id), "w", encoding="utf-8") as f:
+            json.dump(session, f)
+        open(self._part_path(upload_id), "wb").close()
+        self._hashers[upload_id] = (hashlib.sha256(), 0)
+
+        logger.info(f"Created upload session {upload_id} for {filename} ({length} bytes)")
+        return {**session, "offset": 0}
+
+    def get_session(self, upload_id: str) -> Dict[str, Any]:
+        """
+        Return session metadata including the current offset
+        """
+        session_path = self._session_path(upload_id)
+        if not os.path.exists(session_path):
+            raise UploadError(404, "Upload not found")
+        with open(session_path, "r", encoding="utf-8") as f:
+            session = json.load(f)
+        session["offset"] = os.path.getsize(self._part_path(upload_id))
+        return session
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Append data at `offset`; finalizes the file once all bytes arrived
+        """
+        session = self.get_session(upload_id)
+        if offset != session["offset"]:
+            raise UploadError(409, f"Offset mismatch: server has {session['offset']} bytes")
+
+        hasher = self._get_hasher(upload_id, session["offset"])
+        length = session["length"]
+        written = offset
+
+        try:
+            with open(self._part_path(upload_id), "ab") as buffer:
+                async for chunk in chunks:
+                    if written + len(chunk) > length:
+                        raise UploadError(413, "Upload exceeds declared Upload-Length")
+                    hasher.update(chunk)
+                    buffer.write(chunk)
+                    written += len(chunk)
+                    self._hashers[upload_id] = (hasher, written)
+        except Exception:
+            # Bytes already on disk are kept for the next resume; the hash
+            # state may be ahead of the file, so rebuild it next time
+            self._hashers.pop(upload_id, None)
+            raise
+
+        session["offset"] = written
+        if written < length:
+            return session
+
+        info = self._finalize(
+            upload_id, session["extension"], self._part_path(upload_id), written, hasher.hexdigest()
+        )
+        os.remove(self._session_path(upload_id))
+        self._hashers.pop(upload_id, None)
+        return {**session, **info, "completed": True}
+
+    def abort(self, upload_id: str):
+        """
+        Discard a resumable upload
+        """
+        self.get_session(upload_id)
+        for path in (self._part_path(upload_id), self._session_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+        self._hashers.pop(upload_id, None)
+        logger.info(f"Aborted upload session {upload_id}")
+
+    def attach_to_task(self, file_path: str, task_id: str) -> str:
+        """
+        Give a task its own link to an uploaded file, so deleting the task
+        frees what the task used. Only uploaded_<id> files directly under
+        UPLOAD_DIR are accepted; the upload itself stays available (for
+        another target language) until it expires.
+        """
+        upload_path = os.path.realpath(file_path)
+        name = os.path.basename(upload_path)
+        file_id, extension = os.path.splitext(name[len("uploaded_"):]) if name.startswith("uploaded_") else ("", "")
+        if (os.path.dirname(upload_path) != os.path.realpath(self.upload_dir)
+                or extension.lower() not in ALLOWED_EXTENSIONS):
+            raise UploadError(400, f"Not an uploaded file: {file_path}")
+        try:
+            uuid.UUID(file_id)
+        except ValueError:
+            raise UploadError(400, f"Not an uploaded file: {file_path}")
+        if not os.path.exists(upload_path):
+            raise UploadError(404, f"File not found: {file_path}")
+        
+        key = media_store.key_for_path(upload_path)
+        if key is None:
+            return upload_path
+        
+        task_path = media_store.materialize(key, os.path.join(self.upload_dir, f"video_{task_id}{extension}"), task_id)
+        logger.info(f"Attached upload {name} to task {task_id}: {task_path}")
+        return task_path
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _finalize(self, file_id: str, file_extension: str, part_path: str, size: int, sha256: str) -> Dict[str, Any]:
+        filename = f"uploaded_{file_id}{file_extension}"
+        file_path = os.path.join(self.upload_dir, filename)
+        os.replace(part_path, file_path)
+        
+        # Identical content is stored once; this upload becomes a link to it
+        key = sha256_key(sha256)
+        deduplicated = media_store.lookup(key) is not None
+        media_store.ingest(key, file_path, f"upload_{file_id}")
+        # Expiry counts from the latest upload of this content
+        os.utime(file_path)
+        self._purge_expired_uploads()
+        
+        logger.info(f"File uploaded successfully: {filename} ({size} bytes, sha256 {sha256[:12]}, deduplicated: {deduplicated})")
+        return {
+            "file_id": file_id,
+            "filename": filename,
+            "file_path": file_path,
+            "size": size,
+            "sha256": sha256,
+            "deduplicated": deduplicated
+        }
+
+    def _get_hasher(self, upload_id: str, offset: int):
+        """
+        Resume the running hash; rebuild it from disk after a restart
+        """
+        hasher, hashed = self._hashers.get(upload_id, (None, -1))
+        if hasher is not None and hashed == offset:
+            return hasher
+
+        hasher = hashlib.sha256()
+        with open(self._part_path(upload_id), "rb") as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+        self._hashers[upload_id] = (hasher, offset)
+        return hasher
+
+    def _purge_stale_sessions(self):
+        cutoff = time.time() - settings.UPLOAD_SESSION_TTL
+        for name in os.listdir(self.partial_dir):
+            path = os.path.join(self.partial_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    self._hashers.pop(os.path.splitext(name)[0], None)
+            except OSError:
+                pass
+
+    def _purge_expired_uploads(self):
+        """
+        Drop finished uploads older than UPLOAD_FILE_TTL; tasks keep their own links
+        """
+        cutoff = time.time() - settings.UPLOAD_FILE_TTL
+        for name in os.listdir(self.upload_dir):
+            if not name.startswith("uploaded_"):
+                continue
+            path = os.path.join(self.upload_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    media_store.release(f"upload_{os.path.splitext(name[len('uploaded_'):])[0]}")
+                    logger.info(f"Expired upload {name}")
+            except OSError:
+                pass
+
+    def _session_path(self, upload_id: str) -> str:
+        return os.path.join(self.partial_dir, f"{self._safe_id(upload_id)}.json")
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.partial_dir, f"{self._safe_id(upload_id)}.part")
+
+    def _safe_id(self, upload_id: str) -> str:
+        try:
+            return str(uuid.UUID(upload_id))
+        except ValueError:
+            raise UploadError(404, "Upload not found")
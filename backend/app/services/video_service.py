@@ -6,9 +6,15 @@ import json
 import subprocess
 from typing import Optional, Dict, Any, Tuple
 from app.core.config import settings, FFMPEG_FILTERS
+from app.services.artifact_cache import mark_uncacheable
 
 logger = logging.getLogger(__name__)
 
+# Streams browsers play from MP4 as-is; anything else is re-encoded for the web
+WEB_VIDEO_CODECS = {"h264"}
+WEB_PIXEL_FORMATS = {"yuv420p", "yuvj420p"}
+WEB_AUDIO_CODECS = {"aac", "mp3"}
+
 class VideoService:
     """Service for video processing and audio-video merging"""
     
@@ -75,6 +81,7 @@ class VideoService:
             if not os.path.exists(final_video) or os.path.getsize(final_video) < 1000:
                 logger.error(f"Final video not created properly: {final_video}")
                 # Try to create a simple copy as fallback
+                mark_uncacheable()
                 fallback_path = os.path.join(self.output_dir, f"final_{task_id}.mp4")
                 await self._create_simple_video_copy(video_path, fallback_path)
                 final_video = fallback_path
@@ -93,6 +100,7 @@ class VideoService:
         except Exception as e:
             logger.error(f"Audio-video merge failed for task {task_id}: {str(e)}")
             # Create a fallback video file
+            mark_uncacheable()
             fallback_path = os.path.join(self.output_dir, f"final_{task_id}.mp4")
             await self._create_fallback_video(video_path, fallback_path, task_id)
             return fallback_path
@@ -317,20 +325,25 @@ class VideoService:
     
     async def _optimize_final_video(self, video_path: str, task_id: str) -> str:
         """
-        Optimize final video for web delivery
+        Optimize final video for web delivery.
+
+        The merge already copied the source video stream, so when probing
+        shows it is web-playable (H.264, 4:2:0) this is a remux that only adds
+        +faststart; the video is re-encoded only when it is not (or when
+        VIDEO_REENCODE=always).
         """
         try:
             optimized_path = os.path.join(self.output_dir, f"final_{task_id}.mp4")
             
+            info = await self._get_video_info(video_path)
+            video_args, audio_args = self._web_codec_args(info)
+            
             # FFmpeg optimization for web
             cmd = [
                 'ffmpeg',
                 '-i', video_path,
-                '-c:v', settings.VIDEO_CODEC,
-                '-preset', 'medium',
-                '-crf', '23',  # Quality setting
-                '-c:a', settings.AUDIO_CODEC,
-                '-b:a', settings.AUDIO_BITRATE,
+                *video_args,
+                *audio_args,
                 '-movflags', '+faststart',  # Enable progressive download
                 '-y',
                 optimized_path
@@ -358,6 +371,34 @@ class VideoService:
             logger.warning(f"Video optimization failed, using original: {str(e)}")
             return video_path
     
+    def _web_codec_args(self, info: Dict[str, Any]) -> Tuple[list, list]:
+        """
+        FFmpeg codec arguments for the final file: stream copy for whatever is
+        already web-compatible, encode the rest
+        """
+        video = info.get("video") or {}
+        audio = info.get("audio") or {}
+        
+        web_video = video.get("codec") in WEB_VIDEO_CODECS and video.get("pix_fmt") in WEB_PIXEL_FORMATS
+        if web_video and settings.VIDEO_REENCODE != "always":
+            logger.info(f"Video stream is web-compatible ({video.get('codec')}, {video.get('pix_fmt')}), remuxing without re-encode")
+            video_args = ['-c:v', 'copy']
+        else:
+            logger.info(f"Re-encoding video for web delivery (codec={video.get('codec')}, pix_fmt={video.get('pix_fmt')})")
+            video_args = [
+                '-c:v', settings.VIDEO_CODEC,
+                '-preset', 'medium',
+                '-crf', '23',  # Quality setting
+                '-pix_fmt', 'yuv420p'
+            ]
+        
+        if audio.get("codec") in WEB_AUDIO_CODECS:
+            audio_args = ['-c:a', 'copy']
+        else:
+            audio_args = ['-c:a', settings.AUDIO_CODEC, '-b:a', settings.AUDIO_BITRATE]
+        
+        return video_args, audio_args
+    
     async def _get_video_info(self, video_path: str) -> Dict[str, Any]:
         """
         Get video information using ffprobe
@@ -399,6 +440,7 @@ class VideoService:
                     "codec": video_stream.get('codec_name') if video_stream else None,
                     "width": video_stream.get('width') if video_stream else None,
                     "height": video_stream.get('height') if video_stream else None,
+                    "pix_fmt": video_stream.get('pix_fmt') if video_stream else None,
                     "fps": eval(video_stream.get('r_frame_rate', '0/1')) if video_stream else None
                 },
                 "audio": {
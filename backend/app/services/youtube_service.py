@@ -4,10 +4,12 @@ import asyncio
 import subprocess
 import json
 import logging
+import re
 from typing import Dict, Any, Optional
 from urllib.parse import urlparse, parse_qs
 import yt_dlp
 from app.core.config import settings
+from app.services.media_store import media_store, youtube_key
 
 logger = logging.getLogger(__name__)
 
@@ -79,6 +81,32 @@ class YouTubeService:
             raise Exception(f"Could not extract video information: {str(e)}")
     
     async def download_video(self, youtube_url: str, task_id: str) -> str:
+        """
+        Get the video for a task, reusing the media store copy when this
+        YouTube ID was downloaded before
+        """
+        video_id = self.extract_video_id(youtube_url)
+        if not video_id:
+            return await self._download_video(youtube_url, task_id)
+        
+        key = youtube_key(video_id)
+        # Same video submitted concurrently: the second task waits and reuses the first download
+        async with media_store.lock(key):
+            stored_path = media_store.lookup(key)
+            if stored_path:
+                extension = os.path.splitext(stored_path)[1]
+                task_path = os.path.join(self.upload_dir, f"video_{task_id}{extension}")
+                logger.info(f"Video {video_id} already downloaded, skipping download for task {task_id}")
+                return media_store.materialize(key, task_path, task_id)
+            
+            video_file = await self._download_video(youtube_url, task_id)
+            # The audio-only fallback must not be reused for later submissions
+            if not await self.has_video_stream(video_file):
+                logger.warning(f"Download for {video_id} has no video stream, not storing it for reuse")
+                return video_file
+            return media_store.ingest(key, video_file, task_id)
+    
+    async def _download_video(self, youtube_url: str, task_id: str) -> str:
         """
         Download YouTube video using yt-dlp
         """
@@ -236,6 +264,22 @@ class YouTubeService:
             logger.error(f"Download failed for task {task_id}: {str(e)}")
             raise Exception(f"Failed to download video: {str(e)}")
     
+    def extract_video_id(self, url: str) -> Optional[str]:
+        """
+        Extract the YouTube video ID from a watch or youtu.be URL
+        """
+        try:
+            parsed = urlparse(str(url))
+            if parsed.netloc == 'youtu.be':
+                video_id = parsed.path.strip('/').split('/')[0]
+            elif parsed.netloc in ['youtube.com', 'www.youtube.com', 'm.youtube.com']:
+                video_id = parse_qs(parsed.query).get('v', [''])[0]
+            else:
+                return None
+            return video_id if re.fullmatch(r'[A-Za-z0-9_-]{6,20}', video_id or '') else None
+        except Exception:
+            return None
+    
     def _is_valid_youtube_url(self, url: str) -> bool:
         """
         Validate if the URL is a valid YouTube URL
@@ -335,6 +379,31 @@ class YouTubeService:
         except Exception as e:
             logger.error(f"Error cleaning up files for task {task_id}: {str(e)}")
 
+    async def has_video_stream(self, video_path: str) -> bool:
+        """
+        Whether the file contains a video stream (False when it can't be probed)
+        """
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'ffprobe', '-v', 'quiet', '-print_format', 'json',
+                '-select_streams', 'v', '-show_streams', video_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            
+            stdout, stderr = await process.communicate()
+            
+            if process.returncode != 0:
+                raise Exception(f"ffprobe failed: {stderr.decode()}")
+            
+            streams = json.loads(stdout.decode()).get('streams', [])
+            # Cover art in audio files shows up as a single-frame video stream
+            return any(not stream.get('disposition', {}).get('attached_pic') for stream in streams)
+            
+        except Exception as e:
+            logger.error(f"Failed to probe {video_path}: {str(e)}")
+            return False
+    
     async def get_video_duration(self, video_path: str) -> float:
         """
         Get video duration using ffprobe
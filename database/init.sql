@@ -5,6 +5,7 @@ CREATE TABLE IF NOT EXISTS processing_tasks (
     id SERIAL PRIMARY KEY,
     task_id VARCHAR(50) UNIQUE NOT NULL,
     youtube_url TEXT NOT NULL,
+    source_language VARCHAR(10),
     target_language VARCHAR(10) DEFAULT 'th',
     audio_mixing VARCHAR(20) DEFAULT 'overlay',
     voice_type VARCHAR(20) DEFAULT 'female',
@@ -19,7 +20,8 @@ CREATE TABLE IF NOT EXISTS processing_tasks (
     completed_at TIMESTAMP,
     processing_time FLOAT,
     file_size INTEGER,
-    video_duration FLOAT
+    video_duration FLOAT,
+    task_data TEXT
 );
 
 CREATE TABLE IF NOT EXISTS user_sessions (
@@ -35,6 +37,7 @@ CREATE TABLE IF NOT EXISTS user_sessions (
 CREATE INDEX IF NOT EXISTS idx_task_id ON processing_tasks(task_id);
 CREATE INDEX IF NOT EXISTS idx_session_id ON user_sessions(session_id);
 CREATE INDEX IF NOT EXISTS idx_created_at ON processing_tasks(created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_task ON processing_tasks(created_at, task_id);
 
 ---
 
@@ -20,29 +20,33 @@ export default function ProcessingStatus({ taskId, onComplete, onReset }) {
   };
 
   useEffect(() => {
+    let interval = null;
+
+    const applyStatus = (data) => {
+      setStatus(data.status);
+      setProgress(data.progress || 0);
+      setMessage(data.message || 'กำลังประมวลผล...');
+      setSteps(data.steps || {});
+      
+      if (data.status === 'completed') {
+        onComplete({
+          task_id: taskId,
+          video_url: apiService.getDownloadUrl(taskId, 'video'),
+          audio_url: apiService.getDownloadUrl(taskId, 'audio'),
+          subtitle_url: apiService.getDownloadUrl(taskId, 'subtitle'),
+          file_sizes: data.file_sizes || {}
+        });
+      } else if (data.status === 'failed') {
+        setError(data.error || 'เกิดข้อผิดพลาดในการประมวลผล');
+      }
+    };
+
     const pollStatus = async () => {
       try {
         const response = await apiService.getTaskStatus(taskId);
         // API service returns the data directly, not wrapped in response.data
-        const data = response;
-        
-        setStatus(data.status);
-        setProgress(data.progress || 0);
-        setMessage(data.message || 'กำลังประมวลผล...');
-        setSteps(data.steps || {});
+        applyStatus(response);
         setRetryCount(0); // Reset retry count on success
-        
-        if (data.status === 'completed') {
-          onComplete({
-            task_id: taskId,
-            video_url: apiService.getDownloadUrl(taskId, 'video'),
-            audio_url: apiService.getDownloadUrl(taskId, 'audio'),
-            subtitle_url: apiService.getDownloadUrl(taskId, 'subtitle'),
-            file_sizes: data.file_sizes || {}
-          });
-        } else if (data.status === 'failed') {
-          setError(data.error || 'เกิดข้อผิดพลาดในการประมวลผล');
-        }
       } catch (err) {
         console.error('Status check failed:', err);
         
@@ -63,13 +67,22 @@ export default function ProcessingStatus({ taskId, onComplete, onReset }) {
       }
     };
 
-    // Poll every 3 seconds initially, then every 2 seconds
-    const interval = setInterval(pollStatus, retryCount < 3 ? 3000 : 2000);
-    
-    // Initial check
-    pollStatus();
+    const startPolling = () => {
+      if (interval) return;
+      // Poll every 3 seconds initially, then every 2 seconds
+      interval = setInterval(pollStatus, retryCount < 3 ? 3000 : 2000);
+      pollStatus();
+    };
 
-    return () => clearInterval(interval);
+    // Push updates over Server-Sent Events; fall back to polling if the stream fails
+    const unsubscribe = typeof EventSource !== 'undefined'
+      ? apiService.subscribeToTask(taskId, applyStatus, startPolling)
+      : (startPolling(), () => {});
+
+    return () => {
+      unsubscribe();
+      if (interval) clearInterval(interval);
+    };
   }, [taskId, onComplete, retryCount]);
 
   const getElapsedTime = () => {
@@ -269,6 +269,41 @@ class ApiService {
     return ws;
   }
 
+  // Server-Sent Events: full snapshot first, then only changed fields.
+  // Calls onTask with the merged task; returns a function that closes the stream.
+  subscribeToTask(taskId, onTask, onError) {
+    const source = new EventSource(`${this.baseURL}/events/${taskId}`);
+    let task = null;
+
+    const handle = (event) => {
+      try {
+        const { type, data } = JSON.parse(event.data);
+        if (type === 'deleted') {
+          source.close();
+          if (onError) onError(new Error('404 Task not found'));
+          return;
+        }
+        task = type === 'snapshot' ? data : { ...task, ...data };
+        onTask(task);
+        if (['completed', 'failed', 'cancelled'].includes(task.status)) {
+          source.close();
+        }
+      } catch (error) {
+        console.error('Task event parse error:', error);
+      }
+    };
+
+    source.addEventListener('snapshot', handle);
+    source.addEventListener('update', handle);
+    source.addEventListener('deleted', handle);
+    source.onerror = (error) => {
+      source.close();
+      if (onError) onError(error);
+    };
+
+    return () => source.close();
+  }
+
   // Mock data for development (remove in production)
   async getMockTaskProgress(taskId) {
     // Simulate API delay
@@ -334,6 +369,7 @@ export const {
   getStatistics,
   createShareLink,
   connectWebSocket,
+  subscribeToTask,
   getMockTaskProgress,
   getMockTaskResult,
 } = apiService;
\ No newline at end of file
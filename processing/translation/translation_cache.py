@@ -0,0 +1,251 @@
+# =============================================================================
+# 🗄️ TRANSLATION CACHE
+# processing/translation/translation_cache.py
+# =============================================================================
+
+import os
+import sys
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class TranslationCache:
+    """
+    Thread-safe LRU + TTL cache for translations.
+
+    The in-memory tier is bounded by entry count and by an approximate byte
+    size; least recently used entries are evicted first. Entries expire
+    CACHE_TTL seconds after they were stored, lazily on read and in bulk by
+    a background sweeper. With a db_path, every entry is also written to
+    SQLite so translations survive restarts; a memory miss falls through to
+    disk and promotes the hit.
+    """
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=3600,
+                 db_path=None, max_disk_entries=200000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+
+        self._entries = OrderedDict()  # key -> (value, stored_at, size), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+        self._sweeper = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if db_path:
+            self._open_db(db_path)
+
+    # -------------------------------------------------------------------------
+    # Public API
+    # -------------------------------------------------------------------------
+
+    def get(self, key):
+        """Cached value for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self._expired(entry[1], now):
+                    self._drop(key)
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+
+        row = self._db_get(key, now)
+        if row is not None:
+            value, stored_at = row
+            with self._lock:
+                self._insert(key, value, stored_at)
+                self.disk_hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        """Store value under key in memory (and on disk when enabled)"""
+        now = time.time()
+        with self._lock:
+            self._insert(key, value, now)
+        self._db_set(key, value, now)
+
+    def sweep(self):
+        """Drop expired entries from both tiers and trim the disk tier; returns entries removed"""
+        removed = 0
+        if self.ttl > 0:
+            cutoff = time.time() - self.ttl
+            with self._lock:
+                expired = [key for key, entry in self._entries.items() if entry[1] < cutoff]
+                for key in expired:
+                    self._drop(key)
+                self.expirations += len(expired)
+                removed += len(expired)
+        removed += self._db_sweep()
+        return removed
+
+    def start_sweeper(self, interval=60):
+        """Run sweep() every interval seconds on a daemon thread"""
+        if self._sweeper is not None or interval <= 0:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    removed = self.sweep()
+                    if removed:
+                        logger.info(f"Cache sweep removed {removed} entries")
+                except Exception as e:
+                    logger.error(f"Cache sweep failed: {str(e)}")
+
+        self._sweeper = threading.Thread(target=run, name="translation-cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM translations")
+                self._db.commit()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            stats = {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0
+            }
+        if self._db is not None:
+            with self._db_lock:
+                stats['disk_entries'] = self._db.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            stats['db_path'] = self.db_path
+        return stats
+
+    # -------------------------------------------------------------------------
+    # Memory tier (callers hold self._lock)
+    # -------------------------------------------------------------------------
+
+    def _expired(self, stored_at, now):
+        return self.ttl > 0 and now - stored_at >= self.ttl
+
+    def _insert(self, key, value, stored_at):
+        if key in self._entries:
+            self._drop(key)
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        self._entries[key] = (value, stored_at, size)
+        self._bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    # -------------------------------------------------------------------------
+    # SQLite tier
+    # -------------------------------------------------------------------------
+
+    def _open_db(self, db_path):
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS translations_accessed ON translations (accessed_at)")
+            self._db.commit()
+            logger.info(f"Translation cache persisted to {db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"Could not open cache database {db_path}, using memory only: {str(e)}")
+            self._db = None
+
+    def _db_get(self, key, now):
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM translations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if self._expired(row[1], now):
+                    self._db.execute("DELETE FROM translations WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                self._db.execute("UPDATE translations SET accessed_at = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            return row
+        except sqlite3.Error as e:
+            logger.warning(f"Cache database read failed: {str(e)}")
+            return None
+
+    def _db_set(self, key, value, now):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO translations (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache database write failed: {str(e)}")
+
+    def _db_sweep(self):
+        if self._db is None:
+            return 0
+        removed = 0
+        try:
+            with self._db_lock:
+                if self.ttl > 0:
+                    removed += self._db.execute(
+                        "DELETE FROM translations WHERE stored_at < ?", (time.time() - self.ttl,)
+                    ).rowcount
+                # Keep the most recently used max_disk_entries rows
+                removed += self._db.execute(
+                    "DELETE FROM translations WHERE key IN ("
+                    "SELECT key FROM translations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                ).rowcount
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Cache database sweep failed: {str(e)}")
+        return removed
@@ -14,7 +14,11 @@ import json
 from functools import wraps
 import threading
 from queue import Queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
+from requests.adapters import HTTPAdapter
+from translation_cache import TranslationCache
 
 # Configure logging
 logging.basicConfig(
@@ -40,16 +44,36 @@ LIBRETRANSLATE_URL = os.getenv('LIBRETRANSLATE_URL', 'http://libretranslate:5000
 API_KEY = os.getenv('LIBRETRANSLATE_API_KEY', '')
 REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', '30'))
 MAX_RETRIES = int(os.getenv('MAX_RETRIES', '3'))
+UPSTREAM_POOL_SIZE = int(os.getenv('UPSTREAM_POOL_SIZE', '16'))  # keep-alive connections kept open to LibreTranslate
+LATENCY_WINDOW = int(os.getenv('LATENCY_WINDOW', '1000'))  # recent upstream requests used for latency percentiles
+
+# Server Configuration
+PORT = int(os.getenv('PORT', '5003'))
+SERVER_MODE = os.getenv('SERVER_MODE', 'production')  # production = waitress, development = Flask dev server
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '16'))  # request worker threads in production mode
 
 # Text Processing Configuration
 MAX_TEXT_LENGTH = int(os.getenv('MAX_TEXT_LENGTH', '0'))  # 0 = ไม่จำกัด
 MAX_CHUNK_SIZE = int(os.getenv('MAX_CHUNK_SIZE', '5000'))  # เพิ่มขนาด chunk
 MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', '200'))   # เพิ่ม batch size
+CHUNK_WORKERS = int(os.getenv('CHUNK_WORKERS', '4'))  # chunks of one long text translated in parallel
+CHUNK_RETRIES = int(os.getenv('CHUNK_RETRIES', '1'))  # whole-chunk retries on top of MAX_RETRIES per request
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '4'))  # upstream requests in flight for one /translate_batch call
 
 # Performance Configuration
 CACHE_ENABLED = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'
 CACHE_TTL = int(os.getenv('CACHE_TTL', '3600'))  # 1 hour
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', '10000'))
+CACHE_MAX_MB = int(os.getenv('CACHE_MAX_MB', '64'))  # approximate memory bound
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH', '')  # SQLite file for a cache that survives restarts; empty = memory only
+CACHE_DB_MAX_ENTRIES = int(os.getenv('CACHE_DB_MAX_ENTRIES', '200000'))
+CACHE_SWEEP_INTERVAL = int(os.getenv('CACHE_SWEEP_INTERVAL', '60'))  # seconds between expiry sweeps
+# Translation memory: cache per sentence and only send unseen sentences upstream
+TRANSLATION_MEMORY_ENABLED = os.getenv('TRANSLATION_MEMORY_ENABLED', 'true').lower() == 'true'
 RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+# Match LibreTranslate's own limits so batched calls are not rejected
+LT_REQ_LIMIT = int(os.getenv('LT_REQ_LIMIT', '0'))  # upstream requests per minute; 0 = ไม่จำกัด
+LT_BATCH_LIMIT = int(os.getenv('LT_BATCH_LIMIT', '0'))  # texts per upstream request; 0 = ไม่จำกัด
 
 # Supported Languages
 SUPPORTED_LANGUAGES = {
@@ -138,14 +162,24 @@ SUPPORTED_LANGUAGES = {
 # 🧠 GLOBAL VARIABLES AND CACHE
 # =============================================================================
 
-# Simple in-memory cache
-translation_cache = {}
-cache_timestamps = {}
+# Bounded LRU + TTL cache, optionally backed by SQLite
+translation_cache = TranslationCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_MB * 1024 * 1024,
+    ttl=CACHE_TTL,
+    db_path=CACHE_DB_PATH or None,
+    max_disk_entries=CACHE_DB_MAX_ENTRIES
+)
+if CACHE_ENABLED:
+    translation_cache.start_sweeper(CACHE_SWEEP_INTERVAL)
+
 request_stats = {
     'total_requests': 0,
     'successful_translations': 0,
     'failed_translations': 0,
     'cache_hits': 0,
+    'memory_sentence_hits': 0,
+    'memory_sentence_misses': 0,
     'average_response_time': 0,
     'language_pairs': {}
 }
@@ -153,6 +187,95 @@ request_stats = {
 # Thread-safe lock for stats
 stats_lock = threading.Lock()
 
+# Shared pool for long-text chunk fan-out
+chunk_executor = ThreadPoolExecutor(max_workers=max(1, CHUNK_WORKERS), thread_name_prefix='translate-chunk')
+
+# Shared pool for /translate_batch upstream requests
+batch_executor = ThreadPoolExecutor(max_workers=max(1, BATCH_WORKERS), thread_name_prefix='translate-batch')
+
+class RateLimiter:
+    """Spaces calls evenly so at most per_minute start in any minute, across threads; 0 disables it"""
+    
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+upstream_limiter = RateLimiter(LT_REQ_LIMIT if RATE_LIMIT_ENABLED else 0)
+
+def create_upstream_session():
+    """
+    Shared keep-alive session for LibreTranslate. Connections are reused
+    across requests and threads; pool_block caps open connections per
+    upstream host at UPSTREAM_POOL_SIZE instead of opening extra ones.
+    Retries stay in request_libretranslate.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, UPSTREAM_POOL_SIZE), pool_block=True, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({
+        'User-Agent': 'YouTube-Video-Translator/1.0',
+        'Connection': 'keep-alive'
+    })
+    return session
+
+upstream_session = create_upstream_session()
+
+class LatencyTracker:
+    """Rolling window of upstream request latencies with percentile summaries"""
+    
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+        self.count = 0
+    
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+    
+    def summary(self):
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {'count': count, 'window': 0}
+        
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 1)
+        
+        return {
+            'count': count,
+            'window': len(samples),
+            'p50_ms': percentile(50),
+            'p90_ms': percentile(90),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+            'max_ms': round(samples[-1] * 1000, 1)
+        }
+
+upstream_latency = LatencyTracker(LATENCY_WINDOW)
+
+class PartialTranslationError(Exception):
+    """Some chunks of a long text could not be translated; they are left in the source language"""
+    
+    def __init__(self, translated_text, failed_chunks, total_chunks):
+        super().__init__(f"{len(failed_chunks)} of {total_chunks} chunks failed to translate")
+        self.translated_text = translated_text
+        self.failed_chunks = failed_chunks
+        self.total_chunks = total_chunks
+
 # =============================================================================
 # 🛠️ UTILITY FUNCTIONS
 # =============================================================================
@@ -162,10 +285,6 @@ def generate_cache_key(text, source_lang, target_lang):
     content = f"{text}:{source_lang}:{target_lang}"
     return hashlib.md5(content.encode()).hexdigest()
 
-def is_cache_valid(timestamp):
-    """Check if cache entry is still valid"""
-    return time.time() - timestamp < CACHE_TTL
-
 def update_stats(success=True, response_time=0, source_lang='', target_lang=''):
     """Update request statistics"""
     with stats_lock:
@@ -347,54 +466,62 @@ def postprocess_lao_translation(text):
     return text
 
 def split_text_for_translation(text, max_length=5000):
-    """Split long text into chunks for translation"""
+    """
+    Split long text into chunks for translation at sentence boundaries,
+    keeping each sentence's punctuation and separator so chunks stay
+    translatable sentence by sentence
+    """
     # ถ้า max_length เป็น 0 หรือไม่จำกัด ให้ไม่แบ่ง
     if max_length == 0 or len(text) <= max_length:
         return [text]
     
     chunks = []
-    
-    # First, try to split by paragraphs
-    paragraphs = text.split('\n\n')
     current_chunk = ""
     
-    for paragraph in paragraphs:
-        if len(current_chunk) + len(paragraph) <= max_length:
-            current_chunk += paragraph + "\n\n"
-        else:
-            if current_chunk:
+    for sentence, separator in split_into_sentences(text):
+        piece = sentence + separator
+        if len(current_chunk) + len(piece) <= max_length:
+            current_chunk += piece
+            continue
+        
+        if current_chunk.strip():
+            chunks.append(current_chunk.strip())
+        current_chunk = ""
+        
+        if len(piece) <= max_length:
+            current_chunk = piece
+            continue
+        
+        # Sentence is too long on its own, split by words
+        for word in piece.split(' '):
+            if current_chunk and len(current_chunk) + len(word) + 1 > max_length:
                 chunks.append(current_chunk.strip())
-                current_chunk = paragraph + "\n\n"
-            else:
-                # Paragraph is too long, split by sentences
-                sentences = split_by_sentences(paragraph)
-                for sentence in sentences:
-                    if len(current_chunk) + len(sentence) <= max_length:
-                        current_chunk += sentence + " "
-                    else:
-                        if current_chunk:
-                            chunks.append(current_chunk.strip())
-                        current_chunk = sentence + " "
-    
-    if current_chunk:
+                current_chunk = ""
+            current_chunk += word + " "
+    
+    if current_chunk.strip():
         chunks.append(current_chunk.strip())
     
     return chunks
 
-def split_by_sentences(text):
-    """Split text by sentences using various delimiters"""
-    # Multiple language sentence delimiters
-    sentence_delimiters = r'[.!?।。！？｡]'
-    sentences = re.split(sentence_delimiters, text)
-    
-    # Clean up sentences
-    cleaned_sentences = []
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if sentence:
-            cleaned_sentences.append(sentence)
-    
-    return cleaned_sentences
+# Sentence ends: Latin/Devanagari punctuation followed by whitespace, or CJK full stops
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?।])\s+|(?<=[。！？｡])\s*')
+
+def split_into_sentences(text):
+    """Split text into (sentence, separator) pairs; joining them gives back the text"""
+    pieces = []
+    start = 0
+    for match in SENTENCE_BOUNDARY.finditer(text):
+        if match.start() > start:
+            pieces.append((text[start:match.start()], match.group()))
+            start = match.end()
+    if start < len(text):
+        pieces.append((text[start:], ''))
+    return pieces
+
+def normalize_sentence(sentence):
+    """Translation memory key text: whitespace-insensitive"""
+    return ' '.join(sentence.split())
 
 def validate_language_code(lang_code):
     """Validate language code"""
@@ -425,118 +552,272 @@ def detect_text_language(text):
 # 🌐 CORE TRANSLATION FUNCTIONS
 # =============================================================================
 
+def request_libretranslate(q, source_lang, target_lang):
+    """POST /translate with retries; q may be a string or a list of strings"""
+    translate_data = {
+        'q': q,
+        'source': source_lang,
+        'target': target_lang,
+        'format': 'text'
+    }
+    
+    if API_KEY:
+        translate_data['api_key'] = API_KEY
+    
+    # Make translation request with retries
+    for attempt in range(MAX_RETRIES):
+        try:
+            upstream_limiter.acquire()
+            request_start = time.monotonic()
+            response = upstream_session.post(
+                f"{LIBRETRANSLATE_URL}/translate",
+                json=translate_data,
+                timeout=REQUEST_TIMEOUT
+            )
+            upstream_latency.record(time.monotonic() - request_start)
+            
+            if response.status_code == 200:
+                result = response.json()
+                translated_text = result.get('translatedText', '')
+                
+                if not translated_text:
+                    raise Exception("Empty translation result")
+                
+                return translated_text
+            
+            elif response.status_code == 429:
+                # Rate limited, wait and retry
+                wait_time = 2 ** attempt
+                logger.warning(f"Rate limited, waiting {wait_time}s before retry {attempt + 1}")
+                time.sleep(wait_time)
+                continue
+            
+            else:
+                logger.error(f"Translation API error {response.status_code}: {response.text}")
+                if attempt == MAX_RETRIES - 1:
+                    raise Exception(f"Translation service error: {response.status_code}")
+        
+        except requests.RequestException as e:
+            logger.error(f"Translation request failed (attempt {attempt + 1}): {str(e)}")
+            if attempt == MAX_RETRIES - 1:
+                raise Exception(f"Translation service unavailable: {str(e)}")
+            time.sleep(2 ** attempt)
+    
+    raise Exception("Max retries exceeded")
+
 def translate_chunk(text, source_lang, target_lang):
     """Translate a single chunk of text"""
     try:
+        # Multi-sentence chunks go through the translation memory
+        if CACHE_ENABLED and TRANSLATION_MEMORY_ENABLED:
+            pieces = split_into_sentences(text)
+            if len(pieces) > 1:
+                return translate_with_memory(pieces, source_lang, target_lang)
+        
         # Check cache first
         if CACHE_ENABLED:
             cache_key = generate_cache_key(text, source_lang, target_lang)
-            if cache_key in translation_cache and is_cache_valid(cache_timestamps[cache_key]):
-                request_stats['cache_hits'] += 1
+            cached = translation_cache.get(cache_key)
+            if cached is not None:
+                with stats_lock:
+                    request_stats['cache_hits'] += 1
                 logger.info(f"Cache hit for translation chunk")
-                return translation_cache[cache_key]
-        
-        # Prepare request data
-        translate_data = {
-            'q': text,
-            'source': source_lang,
-            'target': target_lang,
-            'format': 'text'
-        }
+                return cached
         
-        if API_KEY:
-            translate_data['api_key'] = API_KEY
+        translated_text = request_libretranslate(text, source_lang, target_lang)
         
-        headers = {
-            'Content-Type': 'application/json',
-            'User-Agent': 'YouTube-Video-Translator/1.0'
-        }
-        
-        # Make translation request with retries
-        for attempt in range(MAX_RETRIES):
-            try:
-                response = requests.post(
-                    f"{LIBRETRANSLATE_URL}/translate",
-                    json=translate_data,
-                    headers=headers,
-                    timeout=REQUEST_TIMEOUT
-                )
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    translated_text = result.get('translatedText', '')
-                    
-                    if not translated_text:
-                        raise Exception("Empty translation result")
-                    
-                    # Store in cache
-                    if CACHE_ENABLED:
-                        translation_cache[cache_key] = translated_text
-                        cache_timestamps[cache_key] = time.time()
-                    
-                    return translated_text
-                
-                elif response.status_code == 429:
-                    # Rate limited, wait and retry
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Rate limited, waiting {wait_time}s before retry {attempt + 1}")
-                    time.sleep(wait_time)
-                    continue
-                
-                else:
-                    logger.error(f"Translation API error {response.status_code}: {response.text}")
-                    if attempt == MAX_RETRIES - 1:
-                        raise Exception(f"Translation service error: {response.status_code}")
-            
-            except requests.RequestException as e:
-                logger.error(f"Translation request failed (attempt {attempt + 1}): {str(e)}")
-                if attempt == MAX_RETRIES - 1:
-                    raise Exception(f"Translation service unavailable: {str(e)}")
-                time.sleep(2 ** attempt)
+        # Store in cache
+        if CACHE_ENABLED:
+            translation_cache.set(cache_key, translated_text)
         
-        raise Exception("Max retries exceeded")
+        return translated_text
         
     except Exception as e:
         logger.error(f"Translation chunk failed: {str(e)}")
         raise
 
+def translate_with_memory(pieces, source_lang, target_lang):
+    """
+    Translate (sentence, separator) pieces, reusing cached sentence
+    translations and sending only unseen sentences to LibreTranslate
+    """
+    keys = [generate_cache_key(normalize_sentence(sentence), source_lang, target_lang) for sentence, _ in pieces]
+    translations = [translation_cache.get(key) for key in keys]
+    
+    # Each distinct unseen sentence is translated once
+    missing = list(dict.fromkeys(
+        normalize_sentence(sentence) for (sentence, _), translated in zip(pieces, translations) if translated is None
+    ))
+    with stats_lock:
+        request_stats['memory_sentence_hits'] += sum(1 for translated in translations if translated is not None)
+        request_stats['memory_sentence_misses'] += len(missing)
+    logger.info(f"Translation memory: {len(pieces) - len(missing)}/{len(pieces)} sentences cached, {len(missing)} to translate")
+    
+    fresh = {}
+    for batch in batch_sentences(missing, MAX_CHUNK_SIZE, LT_BATCH_LIMIT):
+        for sentence, translated in zip(batch, translate_sentences(batch, source_lang, target_lang)):
+            fresh[sentence] = translated
+            translation_cache.set(generate_cache_key(sentence, source_lang, target_lang), translated)
+    
+    # Reassemble in the original order with the original separators
+    output = []
+    for (sentence, separator), translated in zip(pieces, translations):
+        if translated is None:
+            translated = fresh[normalize_sentence(sentence)]
+        output.append(translated + separator)
+    return ''.join(output).strip()
+
+def batch_sentences(sentences, max_chars, max_items=0):
+    """Group sentences into requests of at most max_chars characters and max_items sentences (0 = no limit)"""
+    batch, size = [], 0
+    for sentence in sentences:
+        if batch and ((max_chars and size + len(sentence) > max_chars) or (max_items and len(batch) >= max_items)):
+            yield batch
+            batch, size = [], 0
+        batch.append(sentence)
+        size += len(sentence)
+    if batch:
+        yield batch
+
+def translate_sentences(sentences, source_lang, target_lang, return_exceptions=False):
+    """
+    One LibreTranslate request for a list of sentences, or one per sentence
+    if the list form is not supported. With return_exceptions, a sentence
+    that fails on its own gets its exception in place of a translation.
+    """
+    if len(sentences) > 1:
+        try:
+            translated = request_libretranslate(sentences, source_lang, target_lang)
+            if isinstance(translated, list) and len(translated) == len(sentences) and all(translated):
+                return translated
+            logger.warning("LibreTranslate did not return one translation per sentence, translating individually")
+        except Exception as e:
+            logger.warning(f"Batched sentence translation failed, translating individually: {str(e)}")
+    if not return_exceptions:
+        return [request_libretranslate(sentence, source_lang, target_lang) for sentence in sentences]
+    
+    results = []
+    for sentence in sentences:
+        try:
+            results.append(request_libretranslate(sentence, source_lang, target_lang))
+        except Exception as e:
+            results.append(e)
+    return results
+
+def translate_chunk_with_retry(chunk, source_lang, target_lang, label=''):
+    """translate_chunk, retried as a whole up to CHUNK_RETRIES times"""
+    for attempt in range(CHUNK_RETRIES + 1):
+        try:
+            return translate_chunk(chunk, source_lang, target_lang)
+        except Exception as e:
+            if attempt == CHUNK_RETRIES:
+                raise
+            logger.warning(f"Chunk {label} failed ({str(e)}), retrying")
+            time.sleep(2 ** attempt)
+
 def translate_long_text(text, source_lang, target_lang):
-    """Translate long text by splitting into chunks"""
-    try:
-        # ถ้าไม่จำกัดความยาว ให้แปลทั้งหมดในครั้งเดียว
-        if MAX_TEXT_LENGTH == 0:
-            return translate_chunk(text, source_lang, target_lang)
-        
-        # แบ่งข้อความเป็นชิ้นเล็กๆ
-        chunks = split_text_for_translation(text, MAX_CHUNK_SIZE)
-        
-        if len(chunks) == 1:
-            # ข้อความสั้น ไม่ต้องแบ่ง
-            return translate_chunk(text, source_lang, target_lang)
-        
-        # แปลทีละชิ้น
-        translated_chunks = []
-        for i, chunk in enumerate(chunks):
-            logger.info(f"Translating chunk {i+1}/{len(chunks)} ({len(chunk)} characters)")
-            
-            translated_chunk = translate_chunk(chunk, source_lang, target_lang)
-            if translated_chunk:
-                translated_chunks.append(translated_chunk)
-            else:
-                logger.error(f"Failed to translate chunk {i+1}")
-                return None
-        
-        # รวมผลลัพธ์
-        final_translation = ' '.join(translated_chunks)
-        
-        # Post-process ตามภาษาเป้าหมาย
-        final_translation = postprocess_translation(final_translation, target_lang)
-        
-        return final_translation
-        
-    except Exception as e:
-        logger.error(f"Error in translate_long_text: {str(e)}")
-        return None
+    """
+    Translate long text by splitting into chunks and translating up to
+    CHUNK_WORKERS of them at once, reassembled in order.
+
+    Raises PartialTranslationError (carrying the text with failed chunks
+    left untranslated) when only some chunks fail, and an ordinary
+    exception when all of them do.
+    """
+    # แบ่งข้อความเป็นชิ้นเล็กๆ
+    chunks = split_text_for_translation(text, MAX_CHUNK_SIZE)
+    
+    if len(chunks) == 1:
+        # ข้อความสั้น ไม่ต้องแบ่ง
+        return translate_chunk_with_retry(text, source_lang, target_lang, '1/1')
+    
+    total = len(chunks)
+    logger.info(f"Translating {total} chunks, up to {CHUNK_WORKERS} at a time")
+    futures = [
+        chunk_executor.submit(translate_chunk_with_retry, chunk, source_lang, target_lang, f"{i + 1}/{total}")
+        for i, chunk in enumerate(chunks)
+    ]
+    
+    # รวมผลลัพธ์ตามลำดับเดิม
+    translated_chunks = []
+    failed_chunks = []
+    for i, (chunk, future) in enumerate(zip(chunks, futures)):
+        try:
+            translated_chunks.append(future.result())
+        except Exception as e:
+            logger.error(f"Failed to translate chunk {i + 1}/{total}: {str(e)}")
+            failed_chunks.append(i)
+            translated_chunks.append(chunk)
+    
+    if len(failed_chunks) == total:
+        raise Exception(f"All {total} chunks failed to translate")
+    
+    # Post-process ตามภาษาเป้าหมาย
+    final_translation = postprocess_translation(' '.join(translated_chunks), target_lang)
+    
+    if failed_chunks:
+        raise PartialTranslationError(final_translation, failed_chunks, total)
+    return final_translation
+
+def translate_batch_texts(texts, source_lang, target_lang):
+    """
+    Translate distinct preprocessed texts for /translate_batch.
+
+    Cache hits are served immediately. The remaining short texts are packed
+    into as few list-form LibreTranslate requests as MAX_CHUNK_SIZE and
+    LT_BATCH_LIMIT allow, run BATCH_WORKERS at a time; longer texts go
+    through translate_long_text. Returns {text: translation or exception}
+    and the set of texts that were only partially translated.
+    """
+    results = {}
+    partial = set()
+    missing = []
+    
+    for text in texts:
+        cached = translation_cache.get(generate_cache_key(text, source_lang, target_lang)) if CACHE_ENABLED else None
+        if cached is not None:
+            results[text] = cached
+        else:
+            missing.append(text)
+    
+    if len(missing) < len(texts):
+        with stats_lock:
+            request_stats['cache_hits'] += len(texts) - len(missing)
+    
+    short_texts = [text for text in missing if len(text) <= MAX_CHUNK_SIZE]
+    long_texts = [text for text in missing if len(text) > MAX_CHUNK_SIZE]
+    groups = list(batch_sentences(short_texts, MAX_CHUNK_SIZE, LT_BATCH_LIMIT))
+    logger.info(
+        f"Batch: {len(texts) - len(missing)} cached, {len(short_texts)} texts in {len(groups)} requests, "
+        f"{len(long_texts)} long texts"
+    )
+    
+    futures = [
+        batch_executor.submit(translate_sentences, group, source_lang, target_lang, True)
+        for group in groups
+    ]
+    
+    # Long texts fan out on chunk_executor while the groups run
+    for text in long_texts:
+        try:
+            results[text] = translate_long_text(text, source_lang, target_lang)
+        except PartialTranslationError as e:
+            results[text] = e.translated_text
+            partial.add(text)
+        except Exception as e:
+            results[text] = e
+    
+    for group, future in zip(groups, futures):
+        try:
+            translations = future.result()
+        except Exception as e:
+            translations = [e] * len(group)
+        for text, translated in zip(group, translations):
+            results[text] = translated
+            if CACHE_ENABLED and not isinstance(translated, Exception):
+                translation_cache.set(generate_cache_key(text, source_lang, target_lang), translated)
+    
+    return results, partial
 
 # =============================================================================
 # 🛣️ API ENDPOINTS
@@ -548,7 +829,7 @@ def health():
     try:
         # Test connection to LibreTranslate
         start_time = time.time()
-        response = requests.get(f"{LIBRETRANSLATE_URL}/languages", timeout=5)
+        response = upstream_session.get(f"{LIBRETRANSLATE_URL}/languages", timeout=5)
         response_time = time.time() - start_time
         
         libretranslate_status = 'connected' if response.status_code == 200 else 'disconnected'
@@ -561,7 +842,9 @@ def health():
             'libretranslate': {
                 'url': LIBRETRANSLATE_URL,
                 'status': libretranslate_status,
-                'response_time': round(response_time, 3)
+                'response_time': round(response_time, 3),
+                'latency': upstream_latency.summary(),
+                'pool_size': UPSTREAM_POOL_SIZE
             },
             'configuration': {
                 'api_key_configured': bool(API_KEY),
@@ -570,6 +853,7 @@ def health():
                 'cache_enabled': CACHE_ENABLED,
                 'cache_ttl': CACHE_TTL
             },
+            'cache': translation_cache.get_stats(),
             'supported_languages': len(SUPPORTED_LANGUAGES),
             'statistics': request_stats
         })
@@ -589,7 +873,7 @@ def get_languages():
     try:
         # Try to get languages from LibreTranslate
         try:
-            response = requests.get(f"{LIBRETRANSLATE_URL}/languages", timeout=10)
+            response = upstream_session.get(f"{LIBRETRANSLATE_URL}/languages", timeout=10)
             
             if response.status_code == 200:
                 languages = response.json()
@@ -644,7 +928,7 @@ def detect_language():
             if API_KEY:
                 detect_data['api_key'] = API_KEY
             
-            response = requests.post(
+            response = upstream_session.post(
                 f"{LIBRETRANSLATE_URL}/detect",
                 json=detect_data,
                 timeout=10
@@ -691,7 +975,7 @@ def translate():
         if not text:
             return jsonify({'error': 'No text provided'}), 400
         
-        if len(text) > MAX_TEXT_LENGTH:
+        if MAX_TEXT_LENGTH and len(text) > MAX_TEXT_LENGTH:
             return jsonify({
                 'error': f'Text too long. Maximum length is {MAX_TEXT_LENGTH} characters'
             }), 400
@@ -719,9 +1003,15 @@ def translate():
         processed_text = preprocess_text(text)
         
         # Choose translation method based on text length
+        failed_chunks = []
         if len(processed_text) > MAX_CHUNK_SIZE:
-            translated_text = translate_long_text(processed_text, source_lang, target_lang)
             processing_method = 'multi_chunk'
+            try:
+                translated_text = translate_long_text(processed_text, source_lang, target_lang)
+            except PartialTranslationError as e:
+                logger.warning(f"Partial translation: {str(e)}")
+                translated_text = e.translated_text
+                failed_chunks = e.failed_chunks
         else:
             translated_text = translate_chunk(processed_text, source_lang, target_lang)
             processing_method = 'single_chunk'
@@ -743,7 +1033,9 @@ def translate():
             'original_length': len(text),
             'translated_length': len(final_translation),
             'processing_method': processing_method,
-            'processing_time': round(processing_time, 3)
+            'processing_time': round(processing_time, 3),
+            'partial': bool(failed_chunks),
+            'failed_chunks': failed_chunks
         })
         
     except Exception as e:
@@ -776,61 +1068,109 @@ def translate_batch():
         if len(texts) > MAX_BATCH_SIZE:
             return jsonify({'error': f'Too many texts. Maximum {MAX_BATCH_SIZE} texts per batch'}), 400
         
+        if not validate_language_code(source_lang):
+            return jsonify({'error': f'Unsupported source language: {source_lang}'}), 400
+        
+        if not validate_language_code(target_lang):
+            return jsonify({'error': f'Unsupported target language: {target_lang}'}), 400
+        
         logger.info(f"Batch translating {len(texts)} texts from {source_lang} to {target_lang}")
         
-        results = []
-        successful = 0
-        failed = 0
+        results = [None] * len(texts)
+        pending = {}  # processed text -> indices of identical inputs
         
         for i, text in enumerate(texts):
-            try:
-                if not text or not text.strip():
-                    results.append({
-                        'index': i,
-                        'success': False,
-                        'error': 'Empty text',
-                        'original_text': text,
-                        'translated_text': ''
-                    })
-                    failed += 1
-                    continue
-                
-                # Preprocess and translate
-                processed_text = preprocess_text(text.strip())
-                
-                if len(processed_text) > MAX_TEXT_LENGTH:
-                    results.append({
-                        'index': i,
-                        'success': False,
-                        'error': f'Text too long (>{MAX_TEXT_LENGTH} chars)',
-                        'original_text': text,
-                        'translated_text': ''
-                    })
-                    failed += 1
-                    continue
-                
-                if len(processed_text) > MAX_CHUNK_SIZE:
-                    translated_text = translate_long_text(processed_text, source_lang, target_lang)
-                else:
-                    translated_text = translate_chunk(processed_text, source_lang, target_lang)
-                
-                final_translation = postprocess_translation(translated_text, target_lang)
-                
-                results.append({
+            if not isinstance(text, str) or not text.strip():
+                results[i] = {
                     'index': i,
-                    'success': True,
+                    'success': False,
+                    'error': 'Empty text',
                     'original_text': text,
-                    'translated_text': final_translation,
-                    'original_length': len(text),
-                    'translated_length': len(final_translation)
-                })
-                successful += 1
-                
-                # Small delay between requests
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"Failed to translate text {i}: {str(e)}")
-                results.append({
+                    'translated_text': ''
+                }
+                continue
+            
+            processed_text = preprocess_text(text.strip())
+            
+            if MAX_TEXT_LENGTH and len(processed_text) > MAX_TEXT_LENGTH:
+                results[i] = {
                     'index': i,
-                    'success': False,
\ No newline at end of file
+                    'success': False,
+                    'error': f'Text too long (>{MAX_TEXT_LENGTH} chars)',
+                    'original_text': text,
+                    'translated_text': ''
+                }
+                continue
+            
+            pending.setdefault(processed_text, []).append(i)
+        
+        if source_lang == target_lang and source_lang != 'auto':
+            translations, partial = {text: text for text in pending}, set()
+        else:
+            translations, partial = translate_batch_texts(list(pending), source_lang, target_lang)
+        
+        for processed_text, indices in pending.items():
+            translated = translations[processed_text]
+            if isinstance(translated, Exception):
+                logger.error(f"Failed to translate texts {indices}: {str(translated)}")
+                entry = {'success': False, 'error': str(translated), 'translated_text': ''}
+            else:
+                final_translation = postprocess_translation(translated, target_lang)
+                entry = {
+                    'success': True,
+                    'translated_text': final_translation,
+                    'translated_length': len(final_translation),
+                    'partial': processed_text in partial
+                }
+            for i in indices:
+                results[i] = dict(entry, index=i, original_text=texts[i], original_length=len(texts[i]))
+        
+        successful = sum(1 for result in results if result['success'])
+        failed = len(results) - successful
+        processing_time = time.time() - start_time
+        
+        # Update statistics
+        update_stats(failed == 0, processing_time, source_lang, target_lang)
+        
+        logger.info(
+            f"Batch completed in {processing_time:.2f}s: {successful} succeeded, {failed} failed, "
+            f"{len(pending)} distinct texts"
+        )
+        
+        return jsonify({
+            'results': results,
+            'total': len(texts),
+            'successful': successful,
+            'failed': failed,
+            'unique_texts': len(pending),
+            'source_language': source_lang,
+            'target_language': target_lang,
+            'processing_time': round(processing_time, 3)
+        })
+        
+    except Exception as e:
+        processing_time = time.time() - start_time
+        update_stats(False, processing_time)
+        
+        logger.error(f"Batch translation failed: {str(e)}")
+        return jsonify({
+            'error': f'Batch translation failed: {str(e)}',
+            'processing_time': round(processing_time, 3)
+        }), 500
+
+def run_server():
+    """Serve with waitress in production mode, falling back to Flask's threaded server"""
+    if SERVER_MODE == 'production':
+        try:
+            from waitress import serve
+            logger.info(f"Starting translation server on port {PORT} (waitress, {SERVER_THREADS} threads)")
+            serve(app, host='0.0.0.0', port=PORT, threads=max(1, SERVER_THREADS))
+            return
+        except ImportError:
+            logger.warning("waitress not installed, using the Flask development server")
+    
+    logger.info(f"Starting translation server on port {PORT} (Flask, threaded)")
+    app.run(host='0.0.0.0', port=PORT, threaded=True)
+
+if __name__ == '__main__':
+    run_server()
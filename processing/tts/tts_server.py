@@ -1,12 +1,18 @@
 #!/usr/bin/env python3
 import os
+import io
+import time
+import hashlib
+import unicodedata
 import tempfile
 import uuid
 import asyncio
 import uvicorn
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 import logging
 import edge_tts
@@ -39,12 +45,298 @@ EDGE_VOICES = {
     "de": "de-DE-KatjaNeural",      # German female voice
 }
 
+# Files written by /synthesize are only kept for the follow-up /download;
+# anything older than TTS_FILE_TTL seconds is swept
+UPLOAD_DIR = os.getenv("TTS_UPLOAD_DIR", "/app/uploads")
+TTS_FILE_TTL = int(os.getenv("TTS_FILE_TTL", "3600"))
+TTS_SWEEP_INTERVAL = int(os.getenv("TTS_SWEEP_INTERVAL", "300"))
+
+# Synthesized phrases (MP3) are cached on disk by normalized text, voice and
+# rate; least recently used entries go once the cache exceeds TTS_CACHE_MAX_MB
+TTS_CACHE_DIR = os.getenv("TTS_PHRASE_CACHE_DIR", "/app/cache/phrases")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+TTS_CACHE_WARM_FILE = os.getenv("TTS_CACHE_WARM_FILE", "")  # one phrase per line, synthesized at startup
+TTS_CACHE_WARM_LANGUAGE = os.getenv("TTS_CACHE_WARM_LANGUAGE", "th")
+TTS_CACHE_WARM_RATE = float(os.getenv("TTS_CACHE_WARM_RATE", "0.85"))
+
+# Output formats for /synthesize/stream; wav and pcm (s16le) are transcoded by ffmpeg
+AUDIO_MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "wav": "audio/wav",
+    "pcm": "audio/L16",
+}
+
+class PhraseCache:
+    """
+    Content-addressed MP3 cache on disk with size-bounded LRU eviction.
+    Recency survives restarts through file mtimes, which are bumped on hit.
+    """
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(text: str, voice: str, speech_rate: float) -> str:
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha256(f"{voice}\0{speech_rate:.3f}\0{normalized}".encode("utf-8")).hexdigest()
+    
+    def load(self):
+        """Index existing entries, least recently used first"""
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".mp3"):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.bytes += size
+        self._evict()
+        logger.info(f"Phrase cache: {len(self._entries)} entries, {self.bytes / 1e6:.1f} MB in {self.directory}")
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+    
+    def get(self, key: str) -> Optional[bytes]:
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self.bytes -= self._entries.pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+    
+    def put(self, key: str, data: bytes):
+        if not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Phrase cache write failed: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        if key in self._entries:
+            self.bytes -= self._entries.pop(key)
+        self._entries[key] = len(data)
+        self.bytes += len(data)
+        self._evict()
+    
+    def get_stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+    
+    def _evict(self):
+        while self.bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self.bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+phrase_cache = PhraseCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024)
+
 class TTSRequest(BaseModel):
     text: str
     language: str = "th"
     voice_type: str = "female"
     use_edge_tts: bool = True
     speech_rate: float = 0.85  # Dynamic speech rate from audio analysis
+    output_format: str = "mp3"  # /synthesize/stream only: mp3, wav or pcm
+    sample_rate: int = 44100  # wav/pcm only
+    channels: int = 2  # wav/pcm only
+
+def build_ssml(request: TTSRequest, voice: str) -> str:
+    """SSML wrapper applying the requested speech rate"""
+    return f"""
+            <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{request.language}">
+                <voice name="{voice}">
+                    <prosody rate="{request.speech_rate}" pitch="0%" volume="100%">
+                        {request.text}
+                    </prosody>
+                </voice>
+            </speak>
+            """
+
+class WarmRequest(BaseModel):
+    phrases: List[str]
+    language: str = "th"
+    use_edge_tts: bool = True
+    speech_rate: float = 0.85
+
+def voice_for(request: TTSRequest) -> str:
+    """Voice that will actually speak the request"""
+    if request.use_edge_tts and request.language in EDGE_VOICES:
+        return EDGE_VOICES[request.language]
+    return "google-tts"
+
+def cache_key_for(request: TTSRequest) -> str:
+    voice = voice_for(request)
+    # gTTS ignores the rate, so it does not split the cache
+    rate = request.speech_rate if voice != "google-tts" else 0.0
+    return PhraseCache.make_key(request.text, f"{voice}:{request.language}", rate)
+
+async def cached_mp3_chunks(request: TTSRequest) -> AsyncIterator[bytes]:
+    """synthesize_mp3_chunks through the phrase cache; only complete audio is stored"""
+    key = cache_key_for(request)
+    cached = phrase_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    
+    parts = []
+    async for chunk in synthesize_mp3_chunks(request):
+        parts.append(chunk)
+        yield chunk
+    phrase_cache.put(key, b"".join(parts))
+
+async def synthesize_mp3_chunks(request: TTSRequest) -> AsyncIterator[bytes]:
+    """MP3 data as it is produced: edge-tts streams, gTTS arrives in one piece"""
+    if request.use_edge_tts and request.language in EDGE_VOICES:
+        voice = EDGE_VOICES[request.language]
+        communicate = edge_tts.Communicate(build_ssml(request, voice), voice)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+    else:
+        tts = gTTS(text=request.text, lang=request.language[:2], slow=True)
+        buffer = io.BytesIO()
+        await asyncio.to_thread(tts.write_to_fp, buffer)
+        yield buffer.getvalue()
+
+async def transcode_chunks(chunks: AsyncIterator[bytes], request: TTSRequest) -> AsyncIterator[bytes]:
+    """Pipe MP3 chunks through ffmpeg and yield WAV or raw s16le as it is decoded"""
+    process = await asyncio.create_subprocess_exec(
+        'ffmpeg', '-v', 'error',
+        '-f', 'mp3', '-i', 'pipe:0',
+        '-f', 'wav' if request.output_format == "wav" else 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ar', str(request.sample_rate),
+        '-ac', str(request.channels),
+        'pipe:1',
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    
+    async def feed():
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+    
+    feeder = asyncio.create_task(feed())
+    try:
+        while True:
+            data = await process.stdout.read(65536)
+            if not data:
+                break
+            yield data
+        
+        # Synthesis errors surface here rather than as truncated audio
+        await feeder
+        if await process.wait() != 0:
+            stderr = await process.stderr.read()
+            raise RuntimeError(f"ffmpeg transcode failed: {stderr.decode(errors='replace')}")
+    finally:
+        feeder.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+def sweep_expired_files() -> int:
+    """Remove generated audio older than TTS_FILE_TTL; returns how many were removed"""
+    removed = 0
+    cutoff = time.time() - TTS_FILE_TTL
+    for entry in os.scandir(UPLOAD_DIR):
+        if entry.is_file() and entry.name.startswith("tts_") and entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+async def file_sweeper():
+    """Background loop for sweep_expired_files"""
+    while True:
+        await asyncio.sleep(TTS_SWEEP_INTERVAL)
+        try:
+            removed = await asyncio.to_thread(sweep_expired_files)
+            if removed:
+                logger.info(f"Swept {removed} expired TTS file(s)")
+        except Exception as e:
+            logger.error(f"TTS file sweep failed: {str(e)}")
+
+async def warm_phrases(phrases: List[str], language: str, use_edge_tts: bool, speech_rate: float) -> Dict[str, int]:
+    """Synthesize phrases that are not cached yet"""
+    counts = {"warmed": 0, "already_cached": 0, "failed": 0}
+    for phrase in phrases:
+        if not phrase.strip():
+            continue
+        request = TTSRequest(text=phrase.strip(), language=language, use_edge_tts=use_edge_tts, speech_rate=speech_rate)
+        if cache_key_for(request) in phrase_cache:
+            counts["already_cached"] += 1
+            continue
+        try:
+            async for _ in cached_mp3_chunks(request):
+                pass
+            counts["warmed"] += 1
+        except Exception as e:
+            logger.warning(f"Failed to warm phrase {phrase[:40]!r}: {str(e)}")
+            counts["failed"] += 1
+    return counts
+
+async def warm_from_file(path: str):
+    """Startup pre-warm from TTS_CACHE_WARM_FILE"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            phrases = f.read().splitlines()
+        counts = await warm_phrases(phrases, TTS_CACHE_WARM_LANGUAGE, True, TTS_CACHE_WARM_RATE)
+        logger.info(f"Phrase cache warm-up from {path}: {counts}")
+    except Exception as e:
+        logger.error(f"Phrase cache warm-up failed: {str(e)}")
+
+@app.on_event("startup")
+async def start_file_sweeper():
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    asyncio.create_task(file_sweeper())
+
+@app.on_event("startup")
+async def load_phrase_cache():
+    phrase_cache.load()
+    if TTS_CACHE_WARM_FILE:
+        asyncio.create_task(warm_from_file(TTS_CACHE_WARM_FILE))
 
 @app.get("/health")
 async def health_check():
@@ -52,7 +344,8 @@ async def health_check():
     return {
         "status": "healthy",
         "available_voices": list(EDGE_VOICES.keys()),
-        "services": ["edge-tts", "google-tts"]
+        "services": ["edge-tts", "google-tts"],
+        "phrase_cache": phrase_cache.get_stats()
     }
 
 @app.post("/synthesize")
@@ -64,33 +357,15 @@ async def synthesize_speech(request: TTSRequest):
         
         # Generate unique filename
         output_filename = f"tts_{uuid.uuid4().hex}.mp3"
-        output_path = os.path.join("/app/uploads", output_filename)
+        output_path = os.path.join(UPLOAD_DIR, output_filename)
         
         logger.info(f"Synthesizing text ({len(request.text)} chars) in {request.language} with speech_rate {request.speech_rate}")
         
-        if request.use_edge_tts and request.language in EDGE_VOICES:
-            # Use Microsoft Edge TTS with dynamic speech rate
-            voice = EDGE_VOICES[request.language]
-            
-            # Add SSML for better speech control with dynamic rate
-            ssml_text = f"""
-            <speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{request.language}">
-                <voice name="{voice}">
-                    <prosody rate="{request.speech_rate}" pitch="0%" volume="100%">
-                        {request.text}
-                    </prosody>
-                </voice>
-            </speak>
-            """
-            
-            communicate = edge_tts.Communicate(ssml_text, voice)
-            await communicate.save(output_path)
-            logger.info(f"Used Edge TTS with voice {voice} and dynamic speed (rate={request.speech_rate})")
-        else:
-            # Fallback to Google TTS with slower speed
-            tts = gTTS(text=request.text, lang=request.language[:2], slow=True)
-            tts.save(output_path)
-            logger.info(f"Used Google TTS with slow=True for better clarity")
+        # Edge TTS with dynamic speech rate, or Google TTS (slow) as fallback; repeats come from the phrase cache
+        audio = b"".join([chunk async for chunk in cached_mp3_chunks(request)])
+        with open(output_path, "wb") as f:
+            f.write(audio)
+        logger.info(f"Used {voice_for(request)} (rate={request.speech_rate})")
         
         if not os.path.exists(output_path):
             raise HTTPException(status_code=500, detail="Failed to generate audio")
@@ -105,7 +380,7 @@ async def synthesize_speech(request: TTSRequest):
             "audio_path": output_path,
             "text_length": len(request.text),
             "file_size": file_size,
-            "voice_used": EDGE_VOICES.get(request.language, "google-tts"),
+            "voice_used": voice_for(request),
             "language": request.language,
             "message": "Speech synthesis completed successfully"
         }
@@ -114,11 +389,54 @@ async def synthesize_speech(request: TTSRequest):
         logger.error(f"TTS synthesis failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"TTS synthesis failed: {str(e)}")
 
+@app.post("/synthesize/stream")
+async def synthesize_speech_stream(request: TTSRequest):
+    """
+    Synthesize speech and return the audio in the response body as it is
+    generated; nothing is written to disk
+    """
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="No text provided")
+    if request.output_format not in AUDIO_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported output_format: {request.output_format}")
+    
+    logger.info(f"Streaming synthesis ({len(request.text)} chars) in {request.language} as {request.output_format} with speech_rate {request.speech_rate}")
+    
+    chunks = cached_mp3_chunks(request)
+    if request.output_format != "mp3":
+        chunks = transcode_chunks(chunks, request)
+    
+    # Wait for the first chunk so synthesis failures still get a proper error status
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="TTS synthesis produced no audio")
+    except Exception as e:
+        logger.error(f"TTS synthesis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"TTS synthesis failed: {str(e)}")
+    
+    async def body():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+    
+    headers = {"X-Voice-Used": voice_for(request)}
+    if request.output_format != "mp3":
+        headers["X-Sample-Rate"] = str(request.sample_rate)
+        headers["X-Channels"] = str(request.channels)
+    return StreamingResponse(body(), media_type=AUDIO_MEDIA_TYPES[request.output_format], headers=headers)
+
+@app.post("/cache/warm")
+async def warm_phrase_cache(request: WarmRequest):
+    """Pre-synthesize recurring phrases (intros, outros, sponsor reads) into the phrase cache"""
+    counts = await warm_phrases(request.phrases, request.language, request.use_edge_tts, request.speech_rate)
+    return {**counts, "phrase_cache": phrase_cache.get_stats()}
+
 @app.get("/download/{filename}")
 async def download_audio(filename: str):
     """Download generated audio file"""
     try:
-        file_path = os.path.join("/app/uploads", filename)
+        file_path = os.path.join(UPLOAD_DIR, filename)
         
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
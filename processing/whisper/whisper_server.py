@@ -1,14 +1,26 @@
 #!/usr/bin/env python3
 import os
+import math
+import time
+import asyncio
+import threading
 import tempfile
+import struct
+import multiprocessing
+import numpy as np
 import uvicorn
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import FastAPI, UploadFile, File, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import logging
 import requests
 import json
 import torch
-from typing import Optional
+from multipart.multipart import MultipartParser, parse_options_header
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -25,31 +37,246 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Try to load Whisper model (lazy loading)
+# Inference runs in WHISPER_WORKERS processes, each holding its own model;
+# at most WHISPER_MAX_QUEUE further requests wait before we answer 429
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))
+WHISPER_MAX_QUEUE = int(os.getenv("WHISPER_MAX_QUEUE", "8"))
+
+# Inference engine: "openai" (openai-whisper / PyTorch), "faster"
+# (faster-whisper / CTranslate2) or "auto" (faster-whisper on CPU if installed)
+WHISPER_BACKEND = os.getenv("WHISPER_BACKEND", "auto")
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "medium")
+WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "")  # default: int8 on CPU, float16 on CUDA
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0"))  # 0: split cores across workers
+WHISPER_BATCH_SIZE = int(os.getenv("WHISPER_BATCH_SIZE", "8"))  # 30s windows per forward pass in /transcribe_batch
+
+# Try to load Whisper model (lazy loading, once per worker process)
 whisper_model = None
 
 def get_device():
-    """Get the best available device (CUDA GPU or CPU)"""
-    if torch.cuda.is_available():
+    """Get the best available device (CUDA GPU or CPU), honouring WHISPER_DEVICE=cpu"""
+    if os.getenv("WHISPER_DEVICE", "").lower() != "cpu" and torch.cuda.is_available():
         return "cuda"
     return "cpu"
 
+class OpenAIWhisperBackend:
+    """openai-whisper running on PyTorch"""
+    name = "openai-whisper"
+    
+    def __init__(self, model_name: str, device: str):
+        import whisper
+        self.model = whisper.load_model(model_name).to(device)
+    
+    @property
+    def device(self) -> str:
+        return str(self.model.device)
+    
+    def transcribe(self, audio: Union[str, np.ndarray], language: Optional[str], use_gpu: bool, word_timestamps: bool) -> Dict[str, Any]:
+        self._to_device(use_gpu)
+        options = {"word_timestamps": word_timestamps}
+        if language:
+            options["language"] = language
+        result = self.model.transcribe(audio, **options)
+        return {
+            "text": result["text"],
+            "language": result.get("language", "unknown"),
+            "segments": result.get("segments", [])
+        }
+    
+    def transcribe_batch(self, audio_paths: List[str], language: Optional[str], use_gpu: bool) -> List[Dict[str, Any]]:
+        """
+        Transcribe several files with shared forward passes.
+        
+        Every file is cut into 30-second windows (the last one padded), and
+        windows from all files are decoded WHISPER_BATCH_SIZE at a time, so
+        a batch of short clips costs a few decoder runs instead of one full
+        transcribe() each. Unlike transcribe() there is no temperature
+        fallback or cross-window prompting, which matters little for clips.
+        """
+        import whisper
+        from whisper.audio import N_SAMPLES, SAMPLE_RATE
+        from whisper.tokenizer import get_tokenizer
+        
+        self._to_device(use_gpu)
+        results: List[Dict[str, Any]] = []
+        windows = []  # (file index, offset in seconds, mel)
+        for index, path in enumerate(audio_paths):
+            try:
+                audio = whisper.load_audio(path)
+            except Exception as e:
+                results.append({"error": str(e)})
+                continue
+            duration = len(audio) / SAMPLE_RATE
+            results.append({"text": "", "language": language, "segments": [], "duration": duration})
+            for start in range(0, max(len(audio), 1), N_SAMPLES):
+                window = whisper.pad_or_trim(audio[start:start + N_SAMPLES])
+                mel = whisper.log_mel_spectrogram(window, self.model.dims.n_mels).to(self.model.device)
+                windows.append((index, start / SAMPLE_RATE, mel))
+        
+        options = whisper.DecodingOptions(language=language, fp16=self.model.device.type == "cuda")
+        decoded = []
+        for i in range(0, len(windows), WHISPER_BATCH_SIZE):
+            mel_batch = torch.stack([mel for _, _, mel in windows[i:i + WHISPER_BATCH_SIZE]])
+            decoded.extend(whisper.decode(self.model, mel_batch, options))
+        
+        tokenizer = get_tokenizer(self.model.is_multilingual, num_languages=self.model.num_languages)
+        for (index, offset, _), window_result in zip(windows, decoded):
+            file_result = results[index]
+            file_result["language"] = file_result["language"] or window_result.language
+            # Same silence rule as whisper's transcribe()
+            if window_result.no_speech_prob > 0.6 and window_result.avg_logprob < -1.0:
+                continue
+            for segment in self._window_segments(tokenizer, window_result, offset, file_result["duration"]):
+                segment["id"] = len(file_result["segments"])
+                file_result["segments"].append(segment)
+        
+        for file_result in results:
+            if "error" not in file_result:
+                file_result["text"] = "".join(segment["text"] for segment in file_result["segments"])
+                file_result["language"] = file_result["language"] or "unknown"
+        return results
+    
+    def _to_device(self, use_gpu: bool):
+        device = "cuda" if use_gpu and get_device() == "cuda" else "cpu"
+        if device != self.model.device.type:
+            self.model = self.model.to(device)
+    
+    def _window_segments(self, tokenizer, window_result, offset: float, duration: float) -> List[Dict[str, Any]]:
+        """Split a window's tokens into segments at its timestamp tokens"""
+        segments = []
+        start = None
+        previous_end = 0.0
+        text_tokens: List[int] = []
+        
+        def add_segment(end: float):
+            nonlocal previous_end
+            # No opening timestamp: the segment follows on from the previous one
+            segment_start = start if start is not None else previous_end
+            previous_end = end
+            segments.append({
+                "seek": int(offset * 100),
+                "start": round(offset + segment_start, 2),
+                "end": round(min(offset + end, duration), 2),
+                "text": tokenizer.decode(text_tokens),
+                "tokens": list(text_tokens),
+                "temperature": window_result.temperature,
+                "avg_logprob": window_result.avg_logprob,
+                "compression_ratio": window_result.compression_ratio,
+                "no_speech_prob": window_result.no_speech_prob
+            })
+        
+        for token in window_result.tokens:
+            if token < tokenizer.timestamp_begin:
+                text_tokens.append(token)
+                continue
+            timestamp = (token - tokenizer.timestamp_begin) * 0.02
+            if text_tokens:
+                add_segment(timestamp)
+                text_tokens = []
+                start = None
+            else:
+                start = timestamp
+        if text_tokens:
+            add_segment(min(30.0, duration - offset))
+        return segments
+
+class FasterWhisperBackend:
+    """
+    faster-whisper: CTranslate2 inference with int8 quantization, several
+    times faster than PyTorch on CPU. Segments are converted to the
+    openai-whisper layout so clients see the same schema.
+    """
+    name = "faster-whisper"
+    
+    def __init__(self, model_name: str, device: str):
+        from faster_whisper import WhisperModel
+        compute_type = WHISPER_COMPUTE_TYPE or ("float16" if device == "cuda" else "int8")
+        cpu_threads = WHISPER_CPU_THREADS or max(1, (os.cpu_count() or 1) // max(1, WHISPER_WORKERS))
+        self.compute_type = compute_type
+        self._device = device
+        self.model = WhisperModel(
+            model_name,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            download_root=os.getenv("WHISPER_CACHE_DIR")
+        )
+        logger.info(f"faster-whisper using compute type {compute_type}, {cpu_threads} CPU threads")
+    
+    @property
+    def device(self) -> str:
+        return self._device
+    
+    def transcribe(self, audio: Union[str, np.ndarray], language: Optional[str], use_gpu: bool, word_timestamps: bool) -> Dict[str, Any]:
+        # Device and quantization are fixed when the model is loaded; use_gpu is ignored
+        segments, info = self.model.transcribe(audio, language=language, word_timestamps=word_timestamps)
+        converted = [self._convert_segment(segment) for segment in segments]
+        return {
+            "text": "".join(segment["text"] for segment in converted),
+            "language": info.language,
+            "segments": converted
+        }
+    
+    def _convert_segment(self, segment) -> Dict[str, Any]:
+        converted = {
+            "id": segment.id,
+            "seek": segment.seek,
+            "start": segment.start,
+            "end": segment.end,
+            "text": segment.text,
+            "tokens": list(segment.tokens),
+            "temperature": segment.temperature,
+            "avg_logprob": segment.avg_logprob,
+            "compression_ratio": segment.compression_ratio,
+            "no_speech_prob": segment.no_speech_prob
+        }
+        if segment.words:
+            converted["words"] = [
+                {"word": word.word, "start": word.start, "end": word.end, "probability": word.probability}
+                for word in segment.words
+            ]
+        return converted
+
+class ApiBackend:
+    """Fallback when no local engine can be loaded"""
+    name = "api"
+    device = "api"
+    
+    def transcribe(self, audio: Union[str, np.ndarray], language: Optional[str], use_gpu: bool, word_timestamps: bool) -> Dict[str, Any]:
+        return transcribe_with_api(audio, language)
+
+def _select_backend(device: str) -> str:
+    choice = WHISPER_BACKEND.lower()
+    if choice in ("faster", "faster-whisper", "ctranslate2"):
+        return "faster"
+    if choice in ("openai", "openai-whisper", "pytorch"):
+        return "openai"
+    if device == "cpu":
+        try:
+            import faster_whisper  # noqa: F401
+            return "faster"
+        except ImportError:
+            pass
+    return "openai"
+
 def get_whisper_model():
     global whisper_model
     if whisper_model is None:
+        device = get_device()
+        backend = _select_backend(device)
         try:
-            import whisper
-            model_name = os.getenv("WHISPER_MODEL", "medium")
-            device = get_device()
-            logger.info(f"Loading Whisper model: {model_name} on {device}")
-            whisper_model = whisper.load_model(model_name).to(device)
+            logger.info(f"Loading Whisper model: {WHISPER_MODEL} on {device} ({backend} backend)")
+            if backend == "faster":
+                whisper_model = FasterWhisperBackend(WHISPER_MODEL, device)
+            else:
+                whisper_model = OpenAIWhisperBackend(WHISPER_MODEL, device)
             logger.info(f"Whisper model loaded successfully on {device}")
         except ImportError:
             logger.warning("Whisper not available, will use external API")
-            whisper_model = "api_only"
+            whisper_model = ApiBackend()
         except Exception as e:
             logger.error(f"Failed to load Whisper model: {e}")
-            whisper_model = "api_only"
+            whisper_model = ApiBackend()
     return whisper_model
 
 def transcribe_with_api(audio_path, language=None):
@@ -83,10 +310,447 @@ def transcribe_with_api(audio_path, language=None):
         logger.error(f"API transcription failed: {e}")
         raise HTTPException(status_code=500, detail="Transcription API failed")
 
+def transcribe_file(audio: Union[str, np.ndarray], language: Optional[str] = None, use_gpu: bool = True, word_timestamps: bool = False) -> Dict[str, Any]:
+    """Transcribe a file path or 16 kHz float32 samples with this process's model (runs inside a worker)"""
+    backend = get_whisper_model()
+    
+    # Apply language forcing if specified
+    if language and language != "auto":
+        logger.info(f"🎯 Forcing Whisper to use language: {language}")
+    else:
+        language = None
+        logger.info("🔍 Using Whisper auto language detection")
+    
+    result = backend.transcribe(audio, language, use_gpu, word_timestamps)
+    return {
+        **result,
+        "transcription_method": "api" if isinstance(backend, ApiBackend) else "local",
+        "backend": backend.name,
+        "device_used": backend.device
+    }
+
+def transcribe_pcm(shm_name: str, num_bytes: int, language: Optional[str] = None, use_gpu: bool = True, word_timestamps: bool = False) -> Dict[str, Any]:
+    """Transcribe 16 kHz mono int16 PCM handed over in shared memory (runs inside a worker)"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        samples = np.frombuffer(shm.buf, dtype=np.int16, count=num_bytes // 2)
+        audio = samples.astype(np.float32) / 32768.0
+        del samples
+    finally:
+        shm.close()
+    return transcribe_file(audio, language, use_gpu, word_timestamps)
+
+def transcribe_files(audio_paths: List[str], language: Optional[str] = None, use_gpu: bool = True) -> Dict[str, Any]:
+    """Transcribe a batch of files in one worker job, results in input order"""
+    backend = get_whisper_model()
+    if not language or language == "auto":
+        language = None
+    
+    started = time.monotonic()
+    if hasattr(backend, "transcribe_batch"):
+        results = backend.transcribe_batch(audio_paths, language, use_gpu)
+    else:
+        # No batched decoder for this engine: one file at a time in this worker
+        results = []
+        for path in audio_paths:
+            try:
+                result = backend.transcribe(path, language, use_gpu, False)
+                segments = result.get("segments") or [{"end": 0.0}]
+                results.append({**result, "duration": segments[-1]["end"]})
+            except Exception as e:
+                results.append({"error": str(e)})
+    wall_seconds = time.monotonic() - started
+    
+    method = "api" if isinstance(backend, ApiBackend) else "local"
+    audio_seconds = 0.0
+    for result in results:
+        if "error" not in result:
+            audio_seconds += result.pop("duration", 0.0)
+            result.update({"transcription_method": method, "backend": backend.name, "device_used": backend.device})
+    
+    throughput = audio_seconds / wall_seconds if wall_seconds > 0 else 0.0
+    logger.info(f"Batch of {len(audio_paths)} files: {audio_seconds:.1f}s audio in {wall_seconds:.1f}s ({throughput:.1f}x realtime)")
+    return {
+        "results": results,
+        "audio_seconds": round(audio_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput": round(throughput, 2)
+    }
+
+def _init_worker():
+    """Load the model once when a worker process starts"""
+    get_whisper_model()
+
+def _timed_call(fn: Callable, *args):
+    """Run fn in the worker and report how long the inference itself took"""
+    started = time.monotonic()
+    result = fn(*args)
+    return result, time.monotonic() - started
+
+def _worker_status() -> Dict[str, Any]:
+    backend = get_whisper_model()
+    return {
+        "model_type": "api" if isinstance(backend, ApiBackend) else "local",
+        "backend": backend.name,
+        "model": WHISPER_MODEL,
+        "compute_type": getattr(backend, "compute_type", None),
+        "device": backend.device
+    }
+
+# Uploads in this format skip the temp file and ffmpeg: the samples go
+# straight to the model. It is what the backend's extract_audio produces.
+PCM_SAMPLE_RATE = 16000
+RAW_PCM_CONTENT_TYPES = ("audio/l16", "audio/pcm", "application/octet-stream")
+RAW_PCM_EXTENSIONS = (".pcm", ".raw")
+MAX_WAV_HEADER = 64 * 1024
+
+def _parse_wav_header(header: bytes) -> Optional[Tuple[int, bool, Optional[int]]]:
+    """
+    Find where the samples start in a WAV header.
+    
+    Returns None if more bytes are needed, otherwise (offset of the sample
+    data, whether it is 16 kHz mono 16-bit PCM, size of the data chunk).
+    The size is None when the writer left it open (streamed WAVs put 0 or
+    0xFFFFFFFF there). Non-WAV input gives (0, False, None).
+    """
+    if len(header) < 12:
+        return None
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return 0, False, None
+    
+    is_pcm = False
+    pos = 12
+    while pos + 8 <= len(header):
+        chunk_id = header[pos:pos + 4]
+        chunk_size = struct.unpack("<I", header[pos + 4:pos + 8])[0]
+        if chunk_id == b"data":
+            data_size = chunk_size if 0 < chunk_size < 0xFFFFFFFF else None
+            return pos + 8, is_pcm, data_size
+        if chunk_id == b"fmt ":
+            if pos + 24 > len(header):
+                return None
+            audio_format, channels, sample_rate = struct.unpack("<HHI", header[pos + 8:pos + 16])
+            bits = struct.unpack("<H", header[pos + 22:pos + 24])[0]
+            is_pcm = audio_format == 1 and channels == 1 and sample_rate == PCM_SAMPLE_RATE and bits == 16
+        pos += 8 + chunk_size + (chunk_size % 2)
+    if len(header) > MAX_WAV_HEADER:
+        return 0, False, None
+    return None
+
+class AudioSink:
+    """
+    Receives uploaded audio as it is parsed.
+    
+    16 kHz mono 16-bit PCM (such a WAV, or headerless samples) is collected
+    in memory for Whisper; anything else is spooled to a temp file for
+    ffmpeg to decode, never holding the whole upload in memory.
+    """
+    
+    def __init__(self, raw_pcm: bool, suffix: str):
+        self.pcm: Optional[bytearray] = bytearray() if raw_pcm else None
+        self.path: Optional[str] = None
+        self.suffix = suffix or ".wav"
+        self._header: Optional[bytearray] = None if raw_pcm else bytearray()
+        self._pcm_limit: Optional[int] = None
+        self._temp_file = None
+    
+    def write(self, data: bytes):
+        if self._header is not None:
+            self._header += data
+            parsed = _parse_wav_header(bytes(self._header))
+            if parsed is None:
+                return
+            data_offset, is_pcm, data_size = parsed
+            header, self._header = bytes(self._header), None
+            if is_pcm:
+                # Chunks after the samples (LIST, id3...) are not audio
+                self._pcm_limit = data_size
+                self.pcm = bytearray()
+                self._collect(header[data_offset:])
+            else:
+                self._spool(header)
+        elif self.pcm is not None:
+            self._collect(data)
+        else:
+            self._spool(data)
+    
+    def close(self):
+        if self._header is not None:
+            # Too short to tell; let ffmpeg deal with it
+            header, self._header = bytes(self._header), None
+            self._spool(header)
+        if self.pcm is not None and len(self.pcm) % 2:
+            # A truncated upload can end halfway through a sample
+            del self.pcm[-1]
+        if self._temp_file is not None:
+            self._temp_file.close()
+    
+    def cleanup(self):
+        self.close()
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+    
+    def _collect(self, data: bytes):
+        if self._pcm_limit is not None:
+            data = data[:self._pcm_limit - len(self.pcm)]
+        self.pcm += data
+    
+    def _spool(self, data: bytes):
+        if self._temp_file is None:
+            self._temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=self.suffix)
+            self.path = self._temp_file.name
+        self._temp_file.write(data)
+
+class StreamingUpload:
+    """
+    Transcription request body parsed while it streams in.
+    
+    Multipart forms are fed chunk by chunk through python-multipart, with
+    the "file" part written into an AudioSink; a raw PCM body goes into
+    the sink directly and its options come from the query string.
+    """
+    
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.sink: Optional[AudioSink] = None
+        self.filename: Optional[str] = None
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part_name = ""
+        self._part_data = bytearray()
+        self._part_sink: Optional[AudioSink] = None
+    
+    @classmethod
+    async def read(cls, request: Request) -> "StreamingUpload":
+        upload = cls()
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        content_type = content_type.decode("latin-1").lower()
+        
+        if content_type == "multipart/form-data":
+            boundary = options.get(b"boundary")
+            if not boundary:
+                raise HTTPException(status_code=400, detail="Missing multipart boundary")
+            parser = MultipartParser(boundary, upload._callbacks())
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+        elif content_type in RAW_PCM_CONTENT_TYPES:
+            upload.fields = dict(request.query_params)
+            upload.filename = upload.fields.get("filename", "audio.pcm")
+            upload.sink = AudioSink(raw_pcm=True, suffix=".pcm")
+            async for chunk in request.stream():
+                upload.sink.write(chunk)
+        else:
+            raise HTTPException(status_code=415, detail="Expected multipart/form-data or raw 16 kHz PCM")
+        
+        if upload.sink is None:
+            raise HTTPException(status_code=400, detail="No audio file provided")
+        upload.sink.close()
+        return upload
+    
+    def option(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.fields.get(name) or default
+    
+    def flag(self, name: str, default: bool) -> bool:
+        value = self.fields.get(name)
+        if value is None or value == "":
+            return default
+        return value.lower() in ("1", "true", "yes", "on")
+    
+    def cleanup(self):
+        if self.sink is not None:
+            self.sink.cleanup()
+    
+    def _callbacks(self) -> Dict[str, Callable]:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end
+        }
+    
+    def _on_part_begin(self):
+        self._headers = {}
+        self._part_name = ""
+        self._part_data = bytearray()
+        self._part_sink = None
+    
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+    
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+    
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+    
+    def _on_headers_finished(self):
+        _, disposition = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._part_name = disposition.get(b"name", b"").decode("utf-8")
+        if self._part_name == "file" and b"filename" in disposition:
+            self.filename = disposition[b"filename"].decode("utf-8")
+            extension = os.path.splitext(self.filename)[1].lower()
+            part_type = self._headers.get(b"content-type", b"").decode("latin-1").split(";")[0].strip().lower()
+            raw_pcm = extension in RAW_PCM_EXTENSIONS or part_type in ("audio/l16", "audio/pcm")
+            self._part_sink = AudioSink(raw_pcm=raw_pcm, suffix=extension)
+    
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._part_sink is not None:
+            self._part_sink.write(data[start:end])
+        else:
+            self._part_data += data[start:end]
+    
+    def _on_part_end(self):
+        if self._part_sink is not None:
+            self.sink = self._part_sink
+        elif self._part_name:
+            self.fields[self._part_name] = self._part_data.decode("utf-8", errors="replace")
+
+class QueueFullError(Exception):
+    """All workers busy and the wait queue is full"""
+    def __init__(self, retry_after: int):
+        super().__init__(f"Transcription queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class InferencePool:
+    """
+    Process pool for Whisper inference with admission control.
+    
+    The event loop only receives uploads and waits on futures, so /health
+    and new requests stay responsive while workers transcribe. Requests
+    beyond workers + max_queue are rejected with an estimated retry delay.
+    """
+    
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self._restart_lock = threading.Lock()
+        self.worker_info: Dict[str, Any] = {}
+        self.pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.avg_latency = 0.0
+        self.avg_processing = 0.0
+    
+    def start(self):
+        # spawn: CUDA and forked torch state don't mix
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        logger.info(f"Started {self.workers} Whisper worker process(es), queue limit {self.max_queue}")
+    
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+    
+    def _restart(self, broken: ProcessPoolExecutor):
+        with self._restart_lock:
+            if self.executor is not broken:
+                return
+            logger.error("Whisper worker pool broken, restarting")
+            self.stop()
+            self.start()
+    
+    async def warm_up(self):
+        """Make every worker load its model before the first request"""
+        try:
+            loop = asyncio.get_running_loop()
+            statuses = await asyncio.gather(*[
+                loop.run_in_executor(self.executor, _worker_status) for _ in range(self.workers)
+            ])
+            self.worker_info = statuses[0]
+            logger.info(f"Whisper workers ready: {self.worker_info}")
+        except Exception as e:
+            logger.error(f"Whisper worker warm-up failed: {e}")
+    
+    def check_capacity(self):
+        """Raise QueueFullError if a new request would exceed the queue limit"""
+        if self.pending >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(self.retry_after())
+    
+    async def run(self, fn: Callable, *args) -> Any:
+        self.check_capacity()
+        self.pending += 1
+        submitted = time.monotonic()
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            result, processing = await loop.run_in_executor(executor, _timed_call, fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); replace the pool once, not once per failed request
+            self.failed += 1
+            self._restart(executor)
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.pending -= 1
+        
+        self.completed += 1
+        self.avg_processing = self._ema(self.avg_processing, processing)
+        self.avg_latency = self._ema(self.avg_latency, time.monotonic() - submitted)
+        return result
+    
+    def retry_after(self) -> int:
+        per_request = self.avg_processing or 30.0
+        return max(1, math.ceil(per_request * (self.queue_depth + 1) / self.workers))
+    
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.workers)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "running": min(self.pending, self.workers),
+            "queue_depth": self.queue_depth,
+            "queue_limit": self.max_queue,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_latency_seconds": round(self.avg_latency, 2),
+            "avg_processing_seconds": round(self.avg_processing, 2),
+            "avg_queue_wait_seconds": round(max(0.0, self.avg_latency - self.avg_processing), 2)
+        }
+    
+    def _ema(self, current: float, sample: float) -> float:
+        return sample if current == 0 else current * 0.8 + sample * 0.2
+
+inference_pool = InferencePool(WHISPER_WORKERS, WHISPER_MAX_QUEUE)
+
+@app.on_event("startup")
+async def start_inference_pool():
+    inference_pool.start()
+    asyncio.create_task(inference_pool.warm_up())
+
+@app.on_event("shutdown")
+async def stop_inference_pool():
+    inference_pool.stop()
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request, exc: QueueFullError):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "queue": inference_pool.get_stats()},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    model = get_whisper_model()
+    """Health check endpoint (never touches the model in this process)"""
     device = get_device()
     gpu_info = None
     
@@ -98,68 +762,67 @@ async def health_check():
         }
     
     return {
-        "status": "healthy",
-        "model_type": "local" if model != "api_only" else "api",
+        "status": "healthy" if inference_pool.worker_info else "loading",
+        "model_type": inference_pool.worker_info.get("model_type", "loading"),
+        "backend": inference_pool.worker_info.get("backend"),
+        "compute_type": inference_pool.worker_info.get("compute_type"),
         "device": device,
         "gpu_info": gpu_info,
-        "available_models": ["tiny", "base", "small", "medium", "large"]
+        "available_models": ["tiny", "base", "small", "medium", "large"],
+        "queue": inference_pool.get_stats()
     }
 
 @app.post("/transcribe")
-async def transcribe_audio(
-    file: UploadFile = File(...), 
-    use_gpu: Optional[bool] = Form(True),
-    language: Optional[str] = Form(None)
-):
-    """Transcribe audio file to text with optional language forcing"""
+async def transcribe_audio(request: Request):
+    """
+    Transcribe audio file to text with optional language forcing
+    
+    Takes a multipart form (file, use_gpu, language, word_timestamps) or a
+    raw 16 kHz mono 16-bit PCM body with those options as query parameters.
+    PCM input (including such WAV files) is passed to the model in memory.
+    """
+    # Reject before reading the upload if we could not serve it anyway
+    inference_pool.check_capacity()
+    
+    upload = None
     try:
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_path = temp_file.name
+        upload = await StreamingUpload.read(request)
+        language = upload.option("language")
+        use_gpu = upload.flag("use_gpu", True)
+        word_timestamps = upload.flag("word_timestamps", False)
+        in_memory = upload.sink.pcm is not None
 
         # Log transcription request with language info
         lang_info = f"forced language: {language}" if language and language != "auto" else "auto-detect"
-        logger.info(f"Transcribing audio file: {file.filename} (GPU: {use_gpu}, {lang_info})")
-        
-        # Get model
-        model = get_whisper_model()
+        logger.info(f"Transcribing audio file: {upload.filename} (GPU: {use_gpu}, {lang_info}, in-memory PCM: {in_memory})")
         
-        if model == "api_only":
-            # Use external API
-            result = transcribe_with_api(temp_path, language)
+        # Transcribe in a worker process
+        if in_memory:
+            result = await run_pcm(upload.sink.pcm, language, use_gpu, word_timestamps)
         else:
-            # Use local Whisper model with language forcing
-            device = "cuda" if use_gpu and torch.cuda.is_available() else "cpu"
-            if device != model.device:
-                model = model.to(device)
-            
-            # Apply language forcing if specified
-            transcribe_options = {}
-            if language and language != "auto":
-                transcribe_options["language"] = language
-                logger.info(f"🎯 Forcing Whisper to use language: {language}")
-            else:
-                logger.info("🔍 Using Whisper auto language detection")
-            
-            result = model.transcribe(temp_path, **transcribe_options)
-        
-        # Clean up temporary file
-        os.unlink(temp_path)
+            result = await inference_pool.run(transcribe_file, upload.sink.path, language, use_gpu, word_timestamps)
         
-        return {
-            "text": result["text"],
-            "language": result.get("language", "unknown"),
-            "segments": result.get("segments", []),
-            "file_processed": file.filename,
-            "transcription_method": "local" if model != "api_only" else "api",
-            "device_used": str(model.device) if model != "api_only" else "api"
-        }
+        return {**result, "file_processed": upload.filename}
         
+    except (QueueFullError, HTTPException):
+        raise
     except Exception as e:
         logger.error(f"Transcription error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Transcription failed: {str(e)}")
+    finally:
+        # Clean up temporary file
+        if upload is not None:
+            upload.cleanup()
+
+async def run_pcm(pcm: bytearray, *args) -> Dict[str, Any]:
+    """Hand PCM samples to a worker through shared memory instead of a file"""
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(pcm)))
+    try:
+        shm.buf[:len(pcm)] = pcm
+        return await inference_pool.run(transcribe_pcm, shm.name, len(pcm), *args)
+    finally:
+        shm.close()
+        shm.unlink()
 
 @app.post("/transcribe_url")
 async def transcribe_from_url(audio_url: str, use_gpu: Optional[bool] = True):
@@ -167,62 +830,64 @@ async def transcribe_from_url(audio_url: str, use_gpu: Optional[bool] = True):
     try:
         logger.info(f"Transcribing from URL: {audio_url} (GPU: {use_gpu})")
         
-        # Download audio file
-        response = requests.get(audio_url)
+        # Download audio file (off the event loop)
+        response = await asyncio.to_thread(requests.get, audio_url)
         response.raise_for_status()
         
         with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
             temp_file.write(response.content)
             temp_path = temp_file.name
         
-        # Get model and transcribe
-        model = get_whisper_model()
-        
-        if model == "api_only":
-            result = transcribe_with_api(temp_path)
-        else:
-            device = "cuda" if use_gpu and torch.cuda.is_available() else "cpu"
-            if device != model.device:
-                model = model.to(device)
-            result = model.transcribe(temp_path)
-        
-        # Clean up
-        os.unlink(temp_path)
+        # Transcribe in a worker process
+        try:
+            result = await inference_pool.run(transcribe_file, temp_path, None, use_gpu)
+        finally:
+            # Clean up
+            os.unlink(temp_path)
         
-        return {
-            "text": result["text"],
-            "language": result.get("language", "unknown"),
-            "segments": result.get("segments", []),
-            "source_url": audio_url,
-            "transcription_method": "local" if model != "api_only" else "api",
-            "device_used": str(model.device) if model != "api_only" else "api"
-        }
+        return {**result, "source_url": audio_url}
         
+    except QueueFullError:
+        raise
     except Exception as e:
         logger.error(f"URL transcription error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"URL transcription failed: {str(e)}")
 
 @app.post("/transcribe_batch")
-async def transcribe_batch(files: list[UploadFile] = File(...), use_gpu: Optional[bool] = True):
-    """Transcribe multiple audio files"""
+async def transcribe_batch(
+    files: list[UploadFile] = File(...),
+    use_gpu: Optional[bool] = True,
+    language: Optional[str] = Form(None)
+):
+    """Transcribe multiple audio files in one batched worker job"""
+    inference_pool.check_capacity()
+    
+    temp_paths = []
     try:
-        results = []
+        for file in files:
+            suffix = os.path.splitext(file.filename or "")[1] or ".wav"
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+                temp_file.write(await file.read())
+                temp_paths.append(temp_file.name)
         
-        for i, file in enumerate(files):
-            try:
-                result = await transcribe_audio(file, use_gpu=use_gpu)
+        logger.info(f"Batch transcribing {len(files)} files (GPU: {use_gpu})")
+        batch = await inference_pool.run(transcribe_files, temp_paths, language, use_gpu)
+        
+        results = []
+        for i, (file, result) in enumerate(zip(files, batch["results"])):
+            if "error" in result:
                 results.append({
                     "index": i,
                     "filename": file.filename,
-                    "success": True,
-                    "result": result
+                    "success": False,
+                    "error": result["error"]
                 })
-            except Exception as e:
+            else:
                 results.append({
                     "index": i,
                     "filename": file.filename,
-                    "success": False,
-                    "error": str(e)
+                    "success": True,
+                    "result": {**result, "file_processed": file.filename}
                 })
         
         return {
@@ -230,12 +895,20 @@ async def transcribe_batch(files: list[UploadFile] = File(...), use_gpu: Optiona
             "total_files": len(files),
             "successful": len([r for r in results if r["success"]]),
             "failed": len([r for r in results if not r["success"]]),
-            "device_used": str(get_whisper_model().device) if get_whisper_model() != "api_only" else "api"
+            "audio_seconds": batch["audio_seconds"],
+            "wall_seconds": batch["wall_seconds"],
+            "throughput": batch["throughput"],
+            "device_used": inference_pool.worker_info.get("device", "unknown")
         }
         
+    except QueueFullError:
+        raise
     except Exception as e:
         logger.error(f"Batch transcription failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Batch transcription failed: {str(e)}")
+    finally:
+        for path in temp_paths:
+            os.unlink(path)
 
 @app.get("/languages")
 async def get_supported_languages():
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processing', 'translation'))
+
+import translation_server  # noqa: E402
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Echo LibreTranslate: returns its input, recording every request"""
+    calls = []
+
+    def fake_request(q, source_lang, target_lang):
+        calls.append(q)
+        return list(q) if isinstance(q, list) else q
+
+    monkeypatch.setattr(translation_server, 'request_libretranslate', fake_request)
+    monkeypatch.setattr(translation_server, 'MAX_CHUNK_SIZE', 200)
+    translation_server.translation_cache.clear()
+    return calls
+
+
+def make_text(sentences=40):
+    endings = ['.', '?', '!']
+    return ' '.join(f"Sentence number {i} is here, is it{endings[i % 3]}" for i in range(sentences))
+
+
+def test_long_text_chunks_keep_punctuation(upstream):
+    text = translation_server.preprocess_text(make_text())
+
+    chunks = translation_server.split_text_for_translation(text, 200)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    assert all(chunk[-1] in '.?!' for chunk in chunks)
+
+    translated = translation_server.translate_long_text(text, 'en', 'fr')
+    assert translated == text
+
+
+def test_long_text_chunks_use_translation_memory(upstream):
+    stats = translation_server.request_stats
+    text = translation_server.preprocess_text(make_text())
+    translation_server.translate_long_text(text, 'en', 'fr')
+    hits_before = stats['memory_sentence_hits']
+    upstream.clear()
+
+    # Same transcript with one new opening sentence: chunk boundaries shift,
+    # but every old sentence comes from the translation memory
+    extended = "A brand new opening line. " + text
+    assert translation_server.translate_long_text(extended, 'en', 'fr') == extended
+    assert stats['memory_sentence_hits'] - hits_before == 40
+    assert upstream == ["A brand new opening line."]